@@ -7,3 +7,6 @@ class BdModelsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bd_models"
     verbose_name = f"{settings.bot_name} models"
+
+    def ready(self):
+        from . import signals  # noqa: F401
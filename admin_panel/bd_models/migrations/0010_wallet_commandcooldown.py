@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0009_ballinstance_deleted_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Wallet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("discord_id", models.BigIntegerField(help_text="Discord user ID")),
+                ("currency", models.CharField(help_text="Name of the wallet", max_length=32)),
+                ("balance", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "wallet",
+                "managed": True,
+                "unique_together": {("discord_id", "currency")},
+            },
+        ),
+        migrations.CreateModel(
+            name="CommandCooldown",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("discord_id", models.BigIntegerField(help_text="Discord user ID")),
+                (
+                    "name",
+                    models.CharField(help_text="Name of the limited command", max_length=64),
+                ),
+                (
+                    "uses",
+                    models.IntegerField(default=0, help_text="Uses since the start of the period"),
+                ),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "commandcooldown",
+                "managed": True,
+                "unique_together": {("discord_id", "name")},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0010_wallet_commandcooldown"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ballinstance",
+            index=models.Index(
+                condition=models.Q(("locked__isnull", False)),
+                fields=["player"],
+                name="ballinstance_locked_player_idx",
+            ),
+        ),
+    ]
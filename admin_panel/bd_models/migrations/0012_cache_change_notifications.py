@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:00
+
+from django.db import migrations
+
+# table name and the column identifying a row for the bot's caches
+TABLES = (
+    ("ball", "id"),
+    ("regime", "id"),
+    ("economy", "id"),
+    ("special", "id"),
+    ("blacklistedid", "discord_id"),
+    ("blacklistedguild", "discord_id"),
+)
+
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION ballsdex_notify_change() RETURNS trigger AS $$
+DECLARE
+    data jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        data := to_jsonb(OLD);
+    ELSE
+        data := to_jsonb(NEW);
+    END IF;
+    PERFORM pg_notify(
+        'ballsdex_cache',
+        json_build_object('table', TG_TABLE_NAME, 'key', data ->> TG_ARGV[0])::text
+    );
+    IF TG_OP = 'UPDATE' AND (to_jsonb(OLD) ->> TG_ARGV[0]) <> (data ->> TG_ARGV[0]) THEN
+        PERFORM pg_notify(
+            'ballsdex_cache',
+            json_build_object('table', TG_TABLE_NAME, 'key', to_jsonb(OLD) ->> TG_ARGV[0])::text
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TRIGGER = """
+CREATE TRIGGER {table}_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON {table}
+FOR EACH ROW EXECUTE FUNCTION ballsdex_notify_change('{column}');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0011_ballinstance_locked_player_idx"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_FUNCTION, "DROP FUNCTION ballsdex_notify_change();"),
+        *(
+            migrations.RunSQL(
+                CREATE_TRIGGER.format(table=table, column=column),
+                f"DROP TRIGGER {table}_notify_change ON {table};",
+            )
+            for table, column in TABLES
+        ),
+    ]
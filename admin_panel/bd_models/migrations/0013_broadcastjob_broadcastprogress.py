@@ -0,0 +1,87 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0012_cache_change_notifications"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BroadcastJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "author_id",
+                    models.BigIntegerField(
+                        help_text="Discord ID of the user who sent the broadcast"
+                    ),
+                ),
+                ("message", models.TextField(blank=True, null=True)),
+                ("attachment", models.BinaryField(blank=True, null=True)),
+                ("filename", models.CharField(blank=True, max_length=256, null=True)),
+                ("spoiler", models.BooleanField(default=False)),
+                (
+                    "report_channel_id",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text="Channel of the message reporting the progress",
+                        null=True,
+                    ),
+                ),
+                ("report_message_id", models.BigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "broadcastjob",
+                "managed": True,
+            },
+        ),
+        migrations.CreateModel(
+            name="BroadcastProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "cluster",
+                    models.IntegerField(
+                        default=0, help_text="Process sending to its spawn channels"
+                    ),
+                ),
+                (
+                    "checkpoint",
+                    models.BigIntegerField(
+                        default=0, help_text="Every channel up to this ID was handled"
+                    ),
+                ),
+                ("total", models.IntegerField(default=0)),
+                ("sent", models.IntegerField(default=0)),
+                ("failed", models.IntegerField(default=0)),
+                ("finished", models.BooleanField(default=False)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="bd_models.broadcastjob"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "broadcastprogress",
+                "managed": True,
+                "unique_together": {("job", "cluster")},
+            },
+        ),
+    ]
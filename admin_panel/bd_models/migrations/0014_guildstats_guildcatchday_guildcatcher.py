@@ -0,0 +1,141 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+# same as RETENTION_DAYS in ballsdex/core/utils/guild_stats.py
+RETENTION_DAYS = 90
+
+BACKFILL = f"""
+INSERT INTO guildstats (guild_id, catches, last_catch, last_catcher, streak)
+SELECT
+    server_id,
+    count(*),
+    max(catch_date),
+    (array_agg(discord_id ORDER BY catch_date DESC))[1],
+    0
+FROM ballinstance
+JOIN player ON player.id = ballinstance.player_id
+WHERE server_id IS NOT NULL
+GROUP BY server_id;
+
+-- consecutive catches of the last catcher, only counted up to the 11 latest catches
+UPDATE guildstats SET streak = latest.streak
+FROM (
+    SELECT
+        server_id,
+        coalesce(min(n) FILTER (WHERE discord_id <> last_catcher) - 1, count(*)) AS streak
+    FROM (
+        SELECT
+            server_id,
+            discord_id,
+            first_value(discord_id) OVER w AS last_catcher,
+            row_number() OVER w AS n
+        FROM ballinstance
+        JOIN player ON player.id = ballinstance.player_id
+        WHERE server_id IS NOT NULL
+        WINDOW w AS (PARTITION BY server_id ORDER BY catch_date DESC)
+    ) AS catches
+    WHERE n <= 11
+    GROUP BY server_id
+) AS latest
+WHERE guildstats.guild_id = latest.server_id;
+
+INSERT INTO guildcatchday (guild_id, day, catches)
+SELECT server_id, (catch_date AT TIME ZONE 'UTC')::date, count(*)
+FROM ballinstance
+WHERE server_id IS NOT NULL AND catch_date >= now() - interval '{RETENTION_DAYS} days'
+GROUP BY 1, 2;
+
+INSERT INTO guildcatcher (guild_id, day, discord_id)
+SELECT DISTINCT server_id, (catch_date AT TIME ZONE 'UTC')::date, discord_id
+FROM ballinstance
+JOIN player ON player.id = ballinstance.player_id
+WHERE server_id IS NOT NULL AND catch_date >= now() - interval '{RETENTION_DAYS} days';
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0013_broadcastjob_broadcastprogress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuildStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("guild_id", models.BigIntegerField(help_text="Discord guild ID", unique=True)),
+                (
+                    "catches",
+                    models.BigIntegerField(default=0, help_text="Total number of catches"),
+                ),
+                ("last_catch", models.DateTimeField(blank=True, null=True)),
+                (
+                    "last_catcher",
+                    models.BigIntegerField(
+                        blank=True, help_text="Discord ID of the user who caught last", null=True
+                    ),
+                ),
+                (
+                    "streak",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Number of consecutive catches made by the last catcher",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "guildstats",
+                "managed": True,
+                "verbose_name_plural": "guild stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="GuildCatchDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("guild_id", models.BigIntegerField(help_text="Discord guild ID")),
+                ("day", models.DateField(help_text="UTC day of the catches")),
+                ("catches", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "guildcatchday",
+                "managed": True,
+                "unique_together": {("guild_id", "day")},
+            },
+        ),
+        migrations.CreateModel(
+            name="GuildCatcher",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("guild_id", models.BigIntegerField(help_text="Discord guild ID")),
+                ("day", models.DateField(help_text="UTC day of the catches")),
+                (
+                    "discord_id",
+                    models.BigIntegerField(help_text="Discord ID of a user who caught that day"),
+                ),
+            ],
+            options={
+                "db_table": "guildcatcher",
+                "managed": True,
+                "unique_together": {("guild_id", "day", "discord_id")},
+            },
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
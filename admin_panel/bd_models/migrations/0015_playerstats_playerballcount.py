@@ -0,0 +1,312 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:00
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+# same as RECENT_DAYS in ballsdex/core/utils/player_stats.py
+RECENT_DAYS = 7
+
+CREATE_FUNCTIONS = f"""
+-- add a catch to the daily counts of a player, recent_catches[1] being recent_day
+CREATE OR REPLACE FUNCTION ballsdex_add_catch(
+    recent_day date, recent_catches integer[], catch_day date
+) RETURNS integer[] AS $$
+DECLARE
+    shift integer := coalesce(catch_day - recent_day, {RECENT_DAYS});
+BEGIN
+    IF shift > 0 THEN
+        -- move the window forward, the oldest days fall out of it
+        recent_catches := array_fill(0, ARRAY[least(shift, {RECENT_DAYS})])
+            || coalesce(recent_catches[1:{RECENT_DAYS} - shift], '{{}}');
+        shift := 0;
+    END IF;
+    IF -shift < {RECENT_DAYS} THEN
+        recent_catches[1 - shift] := coalesce(recent_catches[1 - shift], 0) + 1;
+    END IF;
+    RETURN recent_catches;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- apply an instance gained (delta = 1) or lost (delta = -1) to the statistics of a player
+-- rows are only created when gaining, a missing row is left for the repair job to fix
+CREATE OR REPLACE FUNCTION ballsdex_player_stats_count(
+    p_player integer,
+    p_ball integer,
+    p_caught boolean,
+    p_special boolean,
+    p_delta integer,
+    p_day date
+) RETURNS void AS $$
+DECLARE
+    remaining integer;
+    distinct_delta integer := 0;
+BEGIN
+    IF p_delta > 0 THEN
+        INSERT INTO playerballcount AS c (player_id, ball_id, count)
+        VALUES (p_player, p_ball, p_delta)
+        ON CONFLICT (player_id, ball_id) DO UPDATE SET count = c.count + EXCLUDED.count
+        RETURNING c.count INTO remaining;
+        IF remaining = p_delta THEN
+            distinct_delta := 1;
+        END IF;
+        INSERT INTO playerstats AS s (
+            player_id, balls, caught, specials, distinct_balls, trades,
+            recent_day, recent_catches
+        )
+        VALUES (
+            p_player,
+            p_delta,
+            CASE WHEN p_caught THEN p_delta ELSE 0 END,
+            CASE WHEN p_special THEN p_delta ELSE 0 END,
+            distinct_delta,
+            0,
+            p_day,
+            CASE
+                WHEN p_day IS NULL THEN '{{}}'::integer[]
+                ELSE ballsdex_add_catch(NULL, '{{}}', p_day)
+            END
+        )
+        ON CONFLICT (player_id) DO UPDATE SET
+            balls = s.balls + EXCLUDED.balls,
+            caught = s.caught + EXCLUDED.caught,
+            specials = s.specials + EXCLUDED.specials,
+            distinct_balls = s.distinct_balls + EXCLUDED.distinct_balls,
+            recent_catches = CASE
+                WHEN p_day IS NULL THEN s.recent_catches
+                ELSE ballsdex_add_catch(s.recent_day, s.recent_catches, p_day)
+            END,
+            recent_day = greatest(s.recent_day, p_day);
+        RETURN;
+    END IF;
+    UPDATE playerballcount AS c SET count = c.count + p_delta
+    WHERE c.player_id = p_player AND c.ball_id = p_ball
+    RETURNING c.count INTO remaining;
+    IF remaining <= 0 THEN
+        distinct_delta := -1;
+        DELETE FROM playerballcount AS c WHERE c.player_id = p_player AND c.ball_id = p_ball;
+    END IF;
+    UPDATE playerstats AS s SET
+        balls = s.balls + p_delta,
+        caught = s.caught + CASE WHEN p_caught THEN p_delta ELSE 0 END,
+        specials = s.specials + CASE WHEN p_special THEN p_delta ELSE 0 END,
+        distinct_balls = s.distinct_balls + distinct_delta
+    WHERE s.player_id = p_player;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ballsdex_player_stats_instance() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        IF NOT OLD.deleted THEN
+            PERFORM ballsdex_player_stats_count(
+                OLD.player_id, OLD.ball_id, OLD.trade_player_id IS NULL,
+                OLD.special_id IS NOT NULL, -1, NULL
+            );
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        IF NOT NEW.deleted THEN
+            PERFORM ballsdex_player_stats_count(
+                NEW.player_id, NEW.ball_id, NEW.trade_player_id IS NULL,
+                NEW.special_id IS NOT NULL, 1,
+                CASE WHEN TG_OP = 'INSERT' AND NEW.trade_player_id IS NULL
+                    THEN (NEW.catch_date AT TIME ZONE 'UTC')::date
+                END
+            );
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ballsdex_player_stats_trade() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO playerstats AS s (
+            player_id, balls, caught, specials, distinct_balls, trades,
+            recent_day, recent_catches
+        )
+        SELECT DISTINCT
+            unnest(ARRAY[NEW.player1_id, NEW.player2_id]),
+            0, 0, 0, 0, 1, NULL::date, '{{}}'::integer[]
+        ON CONFLICT (player_id) DO UPDATE SET trades = s.trades + 1;
+    ELSE
+        UPDATE playerstats SET trades = trades - 1
+        WHERE player_id IN (OLD.player1_id, OLD.player2_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_FUNCTIONS = """
+DROP FUNCTION ballsdex_player_stats_trade();
+DROP FUNCTION ballsdex_player_stats_instance();
+DROP FUNCTION ballsdex_player_stats_count(integer, integer, boolean, boolean, integer, date);
+DROP FUNCTION ballsdex_add_catch(date, integer[], date);
+"""
+
+CREATE_TRIGGERS = """
+CREATE TRIGGER ballinstance_player_stats
+AFTER INSERT OR DELETE ON ballinstance
+FOR EACH ROW EXECUTE FUNCTION ballsdex_player_stats_instance();
+
+-- locking, favorites and other updates do not change the statistics
+CREATE TRIGGER ballinstance_player_stats_update
+AFTER UPDATE OF player_id, ball_id, special_id, trade_player_id, deleted ON ballinstance
+FOR EACH ROW
+WHEN (
+    (OLD.player_id, OLD.ball_id, OLD.special_id, OLD.trade_player_id, OLD.deleted)
+    IS DISTINCT FROM (NEW.player_id, NEW.ball_id, NEW.special_id, NEW.trade_player_id, NEW.deleted)
+)
+EXECUTE FUNCTION ballsdex_player_stats_instance();
+
+CREATE TRIGGER trade_player_stats
+AFTER INSERT OR DELETE ON trade
+FOR EACH ROW EXECUTE FUNCTION ballsdex_player_stats_trade();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER trade_player_stats ON trade;
+DROP TRIGGER ballinstance_player_stats_update ON ballinstance;
+DROP TRIGGER ballinstance_player_stats ON ballinstance;
+"""
+
+BACKFILL = f"""
+INSERT INTO playerballcount (player_id, ball_id, count)
+SELECT player_id, ball_id, count(*)
+FROM ballinstance
+WHERE NOT deleted
+GROUP BY 1, 2;
+
+INSERT INTO playerstats (
+    player_id, balls, caught, specials, distinct_balls, trades, recent_day, recent_catches
+)
+SELECT
+    player.id,
+    count(ballinstance.id),
+    count(ballinstance.id) FILTER (WHERE ballinstance.trade_player_id IS NULL),
+    count(ballinstance.id) FILTER (WHERE ballinstance.special_id IS NOT NULL),
+    count(DISTINCT ballinstance.ball_id),
+    (SELECT count(*) FROM trade WHERE player.id IN (trade.player1_id, trade.player2_id)),
+    (now() AT TIME ZONE 'UTC')::date,
+    ARRAY(
+        SELECT count(recent.id)::integer
+        FROM generate_series(0, {RECENT_DAYS - 1}) AS n
+        LEFT JOIN ballinstance AS recent
+        ON recent.player_id = player.id
+            AND recent.trade_player_id IS NULL
+            AND (recent.catch_date AT TIME ZONE 'UTC')::date
+                = (now() AT TIME ZONE 'UTC')::date - n
+        GROUP BY n
+        ORDER BY n
+    )
+FROM player
+LEFT JOIN ballinstance ON ballinstance.player_id = player.id AND NOT ballinstance.deleted
+GROUP BY player.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bd_models", "0014_guildstats_guildcatchday_guildcatcher"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "balls",
+                    models.IntegerField(default=0, help_text="Number of owned instances"),
+                ),
+                (
+                    "caught",
+                    models.IntegerField(
+                        default=0, help_text="Owned instances caught by the player"
+                    ),
+                ),
+                (
+                    "specials",
+                    models.IntegerField(default=0, help_text="Owned instances with a special"),
+                ),
+                (
+                    "distinct_balls",
+                    models.IntegerField(default=0, help_text="Number of different balls owned"),
+                ),
+                ("trades", models.IntegerField(default=0, help_text="Number of trades made")),
+                (
+                    "recent_day",
+                    models.DateField(
+                        blank=True, help_text="UTC day of the latest catch", null=True
+                    ),
+                ),
+                (
+                    "recent_catches",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(),
+                        blank=True,
+                        default=list,
+                        help_text="Catches of each day, from recent_day backwards",
+                        size=None,
+                    ),
+                ),
+                (
+                    "player",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, to="bd_models.player"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "playerstats",
+                "managed": True,
+                "verbose_name_plural": "player stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="PlayerBallCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "count",
+                    models.IntegerField(
+                        default=0, help_text="Number of owned instances of this ball"
+                    ),
+                ),
+                (
+                    "ball",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="bd_models.ball"
+                    ),
+                ),
+                (
+                    "player",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="bd_models.player"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "playerballcount",
+                "managed": True,
+                "unique_together": {("player", "ball")},
+            },
+        ),
+        migrations.RunSQL(CREATE_FUNCTIONS, DROP_FUNCTIONS),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -4,6 +4,7 @@ from datetime import timedelta
 from typing import Iterable, cast
 
 from django.contrib import admin
+from django.contrib.postgres.fields import ArrayField
 from django.core.cache import cache
 from django.db import models
 from django.utils.safestring import SafeText, mark_safe
@@ -330,7 +331,14 @@ class BallInstance(models.Model):
         db_table = "ballinstance"
         unique_together = (("player", "id"),)
         verbose_name = f"{settings.collectible_name} instance"
-        indexes = [models.Index(fields=("deleted",))]
+        indexes = [
+            models.Index(fields=("deleted",)),
+            models.Index(
+                fields=("player",),
+                condition=models.Q(locked__isnull=False),
+                name="ballinstance_locked_player_idx",
+            ),
+        ]
 
 
 class BlacklistedID(models.Model):
@@ -422,3 +430,163 @@ class Block(models.Model):
     class Meta:
         managed = True
         db_table = "block"
+
+
+class Wallet(models.Model):
+    discord_id = models.BigIntegerField(help_text="Discord user ID")
+    currency = models.CharField(max_length=32, help_text="Name of the wallet")
+    balance = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.currency})"
+
+    class Meta:
+        managed = True
+        db_table = "wallet"
+        unique_together = (("discord_id", "currency"),)
+
+
+class CommandCooldown(models.Model):
+    discord_id = models.BigIntegerField(help_text="Discord user ID")
+    name = models.CharField(max_length=64, help_text="Name of the limited command")
+    uses = models.IntegerField(default=0, help_text="Uses since the start of the period")
+    started_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.name})"
+
+    class Meta:
+        managed = True
+        db_table = "commandcooldown"
+        unique_together = (("discord_id", "name"),)
+
+
+class BroadcastJob(models.Model):
+    author_id = models.BigIntegerField(help_text="Discord ID of the user who sent the broadcast")
+    message = models.TextField(blank=True, null=True)
+    attachment = models.BinaryField(blank=True, null=True)
+    filename = models.CharField(max_length=256, blank=True, null=True)
+    spoiler = models.BooleanField(default=False)
+    report_channel_id = models.BigIntegerField(
+        blank=True, null=True, help_text="Channel of the message reporting the progress"
+    )
+    report_message_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    broadcastprogress_set: models.QuerySet[BroadcastProgress]
+
+    def __str__(self) -> str:
+        return f"Broadcast #{self.pk}"
+
+    class Meta:
+        managed = True
+        db_table = "broadcastjob"
+
+
+class BroadcastProgress(models.Model):
+    job = models.ForeignKey(BroadcastJob, on_delete=models.CASCADE)
+    job_id: int
+    cluster = models.IntegerField(default=0, help_text="Process sending to its spawn channels")
+    checkpoint = models.BigIntegerField(
+        default=0, help_text="Every channel up to this ID was handled"
+    )
+    total = models.IntegerField(default=0)
+    sent = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    finished = models.BooleanField(default=False)
+
+    def __str__(self) -> str:
+        return f"Broadcast #{self.job_id} ({self.cluster})"
+
+    class Meta:
+        managed = True
+        db_table = "broadcastprogress"
+        unique_together = (("job", "cluster"),)
+
+
+class GuildStats(models.Model):
+    guild_id = models.BigIntegerField(unique=True, help_text="Discord guild ID")
+    catches = models.BigIntegerField(default=0, help_text="Total number of catches")
+    last_catch = models.DateTimeField(blank=True, null=True)
+    last_catcher = models.BigIntegerField(
+        blank=True, null=True, help_text="Discord ID of the user who caught last"
+    )
+    streak = models.IntegerField(
+        default=0, help_text="Number of consecutive catches made by the last catcher"
+    )
+
+    def __str__(self) -> str:
+        return str(self.guild_id)
+
+    class Meta:
+        managed = True
+        db_table = "guildstats"
+        verbose_name_plural = "guild stats"
+
+
+class GuildCatchDay(models.Model):
+    guild_id = models.BigIntegerField(help_text="Discord guild ID")
+    day = models.DateField(help_text="UTC day of the catches")
+    catches = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.guild_id} ({self.day})"
+
+    class Meta:
+        managed = True
+        db_table = "guildcatchday"
+        unique_together = (("guild_id", "day"),)
+
+
+class GuildCatcher(models.Model):
+    guild_id = models.BigIntegerField(help_text="Discord guild ID")
+    day = models.DateField(help_text="UTC day of the catches")
+    discord_id = models.BigIntegerField(help_text="Discord ID of a user who caught that day")
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.guild_id}, {self.day})"
+
+    class Meta:
+        managed = True
+        db_table = "guildcatcher"
+        unique_together = (("guild_id", "day", "discord_id"),)
+
+
+class PlayerStats(models.Model):
+    player = models.OneToOneField(Player, on_delete=models.CASCADE)
+    player_id: int
+    balls = models.IntegerField(default=0, help_text="Number of owned instances")
+    caught = models.IntegerField(default=0, help_text="Owned instances caught by the player")
+    specials = models.IntegerField(default=0, help_text="Owned instances with a special")
+    distinct_balls = models.IntegerField(default=0, help_text="Number of different balls owned")
+    trades = models.IntegerField(default=0, help_text="Number of trades made")
+    recent_day = models.DateField(blank=True, null=True, help_text="UTC day of the latest catch")
+    recent_catches = ArrayField(
+        models.IntegerField(),
+        blank=True,
+        default=list,
+        help_text="Catches of each day, from recent_day backwards",
+    )
+
+    def __str__(self) -> str:
+        return str(self.player_id)
+
+    class Meta:
+        managed = True
+        db_table = "playerstats"
+        verbose_name_plural = "player stats"
+
+
+class PlayerBallCount(models.Model):
+    player = models.ForeignKey(Player, on_delete=models.CASCADE)
+    player_id: int
+    ball = models.ForeignKey(Ball, on_delete=models.CASCADE)
+    ball_id: int
+    count = models.IntegerField(default=0, help_text="Number of owned instances of this ball")
+
+    def __str__(self) -> str:
+        return f"{self.player_id} ({self.ball_id})"
+
+    class Meta:
+        managed = True
+        db_table = "playerballcount"
+        unique_together = (("player", "ball"),)
@@ -0,0 +1,42 @@
+from pathlib import Path
+from typing import Any
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ballsdex.core.image_generator.card_cache import purge_disk_cache
+from ballsdex.settings import settings
+
+from .models import Ball, Economy, Regime, Special
+
+
+def _purge_cards(*, ball_id: int | None = None, special_id: int | None = None):
+    if not settings.card_cache_disk_path:
+        return
+    purge_disk_cache(Path(settings.card_cache_disk_path), ball_id=ball_id, special_id=special_id)
+
+
+# The bot's memory cache is refreshed on "reloadcache", but rendered cards persisted on disk
+# must be removed as soon as their assets are edited here.
+
+
+@receiver((post_save, post_delete), sender=Ball)
+def purge_ball_cards(sender: type[Ball], instance: Ball, **kwargs: Any):
+    _purge_cards(ball_id=instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Special)
+def purge_special_cards(sender: type[Special], instance: Special, **kwargs: Any):
+    _purge_cards(special_id=instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Regime)
+def purge_regime_cards(sender: type[Regime], instance: Regime, **kwargs: Any):
+    for ball_id in Ball.objects.filter(regime_id=instance.pk).values_list("pk", flat=True):
+        _purge_cards(ball_id=ball_id)
+
+
+@receiver((post_save, post_delete), sender=Economy)
+def purge_economy_cards(sender: type[Economy], instance: Economy, **kwargs: Any):
+    for ball_id in Ball.objects.filter(economy_id=instance.pk).values_list("pk", flat=True):
+        _purge_cards(ball_id=ball_id)
@@ -20,6 +20,15 @@ from yaml import YAMLError
 
 from ballsdex import __version__ as bot_version
 from ballsdex.core.bot import BallsDexBot
+from ballsdex.core.cluster import (
+    CLUSTER_ID_ENV,
+    SHARD_COUNT_ENV,
+    SOCKET_ENV,
+    ClusterClient,
+    ClusterLauncher,
+    cluster_shard_ids,
+)
+from ballsdex.core.metrics import instrument_database
 from ballsdex.logging import init_logger
 from ballsdex.settings import read_settings, settings, update_settings, write_default_settings
 
@@ -45,6 +54,7 @@ class CLIFlags(argparse.Namespace):
     disable_message_content: bool
     disable_time_check: bool
     skip_tree_sync: bool
+    clusters: int
     debug: bool
     dev: bool
 
@@ -79,7 +89,14 @@ def parse_cli_flags(arguments: list[str]) -> CLIFlags:
         action="store_true",
         help="Does not sync application commands to Discord. Significant startup speedup and "
         "avoids ratelimits, but risks of having desynced commands after updates. This is always "
-        "enabled with clustering.",
+        "enabled with clustering, except for the first cluster.",
+    )
+    parser.add_argument(
+        "--clusters",
+        type=int,
+        default=1,
+        help="Run the bot as this number of processes, each one connected to a range of shards. "
+        "Use this to spread a large bot over multiple CPU cores.",
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug logs")
     parser.add_argument("--dev", action="store_true", help="Enable developer mode")
@@ -243,6 +260,8 @@ async def init_tortoise(db_url: str, *, skip_migrations: bool = False):
     log.debug(f"Database URL: {db_url}")
     TORTOISE_ORM["apps"]["models"]["models"].extend(settings.tortoise_models)
     await Tortoise.init(config=TORTOISE_ORM)
+    if settings.prometheus_enabled:
+        instrument_database(type(Tortoise.get_connection("default")))
 
 
 async def init_sentry():
@@ -259,6 +278,7 @@ async def init_sentry():
 def main():
     bot = None
     server = None
+    exit_code = 1
     cli_flags = parse_cli_flags(sys.argv[1:])
     if cli_flags.version:
         print(f"BallsDex Discord bot - {bot_version}")
@@ -290,14 +310,21 @@ def main():
         time.sleep(1)
         sys.exit(0)
 
-    print_welcome()
+    # set in the worker processes started by the cluster launcher
+    cluster_id = int(os.environ[CLUSTER_ID_ENV]) if CLUSTER_ID_ENV in os.environ else None
+    if cluster_id is None:
+        print_welcome()
     queue_listener: logging.handlers.QueueListener | None = None
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
     try:
-        queue_listener = init_logger(cli_flags.disable_rich, cli_flags.debug)
+        queue_listener = init_logger(
+            cli_flags.disable_rich,
+            cli_flags.debug,
+            f"ballsdex-cluster-{cluster_id}.log" if cluster_id is not None else "ballsdex.log",
+        )
 
         token = settings.bot_token
         if not token:
@@ -306,6 +333,11 @@ def main():
             time.sleep(1)
             sys.exit(0)
 
+        if cli_flags.clusters > 1 and cluster_id is None:
+            launcher = ClusterLauncher(cli_flags.clusters, sys.argv[1:])
+            exit_code = loop.run_until_complete(launcher.run())
+            return
+
         db_url = os.environ.get("BALLSDEXBOT_DB_URL", None)
         if not db_url:
             log.error("Database URL not found!")
@@ -327,14 +359,28 @@ def main():
             return  # will exit with code 1
         log.info("Tortoise ORM and database ready.")
 
+        shard_count = settings.shard_count
+        shard_ids: list[int] | None = None
+        if cluster_id is not None:
+            shard_count = int(os.environ[SHARD_COUNT_ENV])
+            shard_ids = cluster_shard_ids(shard_count, cli_flags.clusters, cluster_id)
+
         bot = BallsDexBot(
             command_prefix=when_mentioned_or(prefix),
             dev=cli_flags.dev,  # type: ignore
-            shard_count=settings.shard_count,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
             disable_message_content=cli_flags.disable_message_content,
             disable_time_check=cli_flags.disable_time_check,
-            skip_tree_sync=cli_flags.skip_tree_sync,
+            # commands are synced once, by the first cluster
+            skip_tree_sync=cli_flags.skip_tree_sync or bool(cluster_id),
         )
+        if cluster_id is not None:
+            bot.cluster = ClusterClient(
+                bot, cluster_id, cli_flags.clusters, os.environ[SOCKET_ENV]
+            )
+            loop.run_until_complete(bot.cluster.connect())
+            log.info(f"Running as cluster {cluster_id} with shards {shard_ids}")
 
         loop.run_until_complete(init_sentry())
         exc_handler = functools.partial(global_exception_handler, bot)
@@ -370,7 +416,7 @@ def main():
         asyncio.set_event_loop(None)
         loop.stop()
         loop.close()
-        sys.exit(bot._shutdown if bot else 1)
+        sys.exit(bot._shutdown if bot else exit_code)
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ import math
 import time
 import types
 from datetime import datetime
+from pathlib import Path
 from typing import TYPE_CHECKING, Self, cast
 
 import aiohttp
@@ -27,9 +28,13 @@ from rich import box, print
 from rich.console import Console
 from rich.table import Table
 
+from ballsdex.core.cluster import ClusterClient, metrics_port
 from ballsdex.core.commands import Core
 from ballsdex.core.dev import Dev
-from ballsdex.core.metrics import PrometheusServer
+from ballsdex.core.image_generator.card_cache import CardCache
+from ballsdex.core.image_generator.image_gen import catalog_assets
+from ballsdex.core.image_generator.renderer import CardRenderer, RendererOverloaded
+from ballsdex.core.metrics import CommandMetrics, LoopMonitor, PrometheusServer
 from ballsdex.core.models import (
     Ball,
     BlacklistedGuild,
@@ -42,6 +47,13 @@ from ballsdex.core.models import (
     regimes,
     specials,
 )
+from ballsdex.core.utils.change_feed import ChangeFeed
+from ballsdex.core.utils.guild_stats import GuildStatsRecorder
+from ballsdex.core.utils.ledger import CooldownLedger, WalletLedger
+from ballsdex.core.utils.owned import owned_balls
+from ballsdex.core.utils.sampling import AliasSampler, SpecialSchedule, ball_sampler
+from ballsdex.core.utils.transformers import TTLModelTransformer
+from ballsdex.core.utils.users import UserResolver
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -120,6 +132,7 @@ class CommandTree(app_commands.CommandTree):
                     f"Skipping interaction {interaction.id}, "
                     f"running {delta.total_seconds()}s late."
                 )
+                interaction.extras["outcome"] = "rejected"
                 return False
 
         bot = interaction.client
@@ -130,8 +143,17 @@ class CommandTree(app_commands.CommandTree):
                     f"({round((len(bot.shards) / bot.shard_count) * 100)}%)",
                     ephemeral=True,
                 )
+            interaction.extras["outcome"] = "rejected"
             return False  # wait for all shards to be connected
-        return await bot.blacklist_check(interaction)
+        if not await bot.blacklist_check(interaction):
+            interaction.extras["outcome"] = "rejected"
+            return False
+        return True
+
+    async def _call(self, interaction: discord.Interaction[BallsDexBot]) -> None:
+        # the whole handling of commands and autocompletions goes through this method
+        with CommandMetrics(interaction):
+            await super()._call(interaction)
 
 
 class BallsDexBot(commands.AutoShardedBot):
@@ -174,6 +196,7 @@ class BallsDexBot(commands.AutoShardedBot):
 
         self.dev = dev
         self.prometheus_server: PrometheusServer | None = None
+        self.cluster: ClusterClient | None = None
 
         self.tree.error(self.on_application_command_error)
         self.add_check(owner_check)  # Only owners are able to use text commands
@@ -186,15 +209,48 @@ class BallsDexBot(commands.AutoShardedBot):
         self.catch_log: set[int] = set()
         self.command_log: set[int] = set()
         self.locked_balls = TTLCache(maxsize=99999, ttl=60 * 30)
+        self.card_cache = CardCache(
+            settings.card_cache_memory_size * 1024 * 1024,
+            Path(settings.card_cache_disk_path) if settings.card_cache_disk_path else None,
+        )
+        self.card_renderer = CardRenderer(
+            settings.card_renderer_workers,
+            settings.card_renderer_queue_size,
+            asset_memory=settings.card_renderer_asset_memory * 1024 * 1024,
+        )
+        self.ball_sampler: AliasSampler[Ball] = AliasSampler([], [])
+        self.special_schedule = SpecialSchedule([])
+        self.wallets = WalletLedger()
+        self.cooldowns = CooldownLedger()
+        self.guild_stats = GuildStatsRecorder()
+        self.user_resolver = UserResolver(self)
+        self.change_feed = ChangeFeed(self)
+        self.loop_monitor = LoopMonitor(
+            settings.loop_monitor_interval, settings.loop_monitor_threshold
+        )
 
         self.owner_ids: set[int]
 
     async def start_prometheus_server(self):
-        self.prometheus_server = PrometheusServer(
-            self, settings.prometheus_host, settings.prometheus_port
-        )
+        if self.cluster is not None:
+            # collected and merged by the cluster launcher
+            self.prometheus_server = PrometheusServer(
+                self, "127.0.0.1", metrics_port(self.cluster.cluster_id)
+            )
+        else:
+            self.prometheus_server = PrometheusServer(
+                self, settings.prometheus_host, settings.prometheus_port
+            )
         await self.prometheus_server.run()
 
+    def owns_guild(self, guild_id: int) -> bool:
+        """
+        Whether the guild is on one of the shards of this process.
+        """
+        if self.shard_ids is None or self.shard_count is None:
+            return True
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
     def assign_ids_to_app_groups(
         self, group: app_commands.Group, synced_commands: list[app_commands.AppCommandGroup]
     ):
@@ -251,6 +307,12 @@ class BallsDexBot(commands.AutoShardedBot):
             specials[special.pk] = special
         table.add_row("Special events", str(len(specials)))
 
+        owned_balls.clear()
+        self.refresh_catalog()
+        await self.card_renderer.reload(
+            catalog_assets(balls.values(), regimes.values(), economies.values(), specials.values())
+        )
+
         self.blacklist = set()
         for blacklisted_id in await BlacklistedID.all().only("discord_id"):
             self.blacklist.add(blacklisted_id.discord_id)
@@ -265,6 +327,15 @@ class BallsDexBot(commands.AutoShardedBot):
         console = Console()
         console.print(table)
 
+    def refresh_catalog(self):
+        """
+        Rebuild the state derived from the catalog caches after they were modified.
+        """
+        self.ball_sampler = ball_sampler(balls.values())
+        self.special_schedule = SpecialSchedule(specials.values())
+        TTLModelTransformer.expire_all()
+        self.card_cache.refresh(balls, specials)
+
     async def gateway_healthy(self) -> bool:
         """Check whether or not the gateway proxy is ready and healthy."""
         if settings.gateway_url is None:
@@ -282,8 +353,25 @@ class BallsDexBot(commands.AutoShardedBot):
         except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
             return False
 
+    async def before_identify_hook(self, shard_id: int | None, *, initial: bool = False):
+        # the gateway proxy handles the identify concurrency itself
+        if self.cluster is None or settings.gateway_url is not None:
+            return await super().before_identify_hook(shard_id, initial=initial)
+        # the shards of other processes are identifying too, the launcher spaces them out
+        await self.cluster.request("identify", shard_id or 0)
+
+    async def on_cluster_log_action(self, message: str):
+        # sent by log_action from the clusters that don't have the log channel
+        if settings.log_channel and (channel := self.get_channel(settings.log_channel)):
+            await cast(discord.TextChannel, channel).send(message)
+
     async def setup_hook(self) -> None:
         await self.tree.set_translator(Translator())
+        self.wallets.start()
+        self.cooldowns.start()
+        self.guild_stats.start()
+        if settings.loop_monitor_interval > 0:
+            self.loop_monitor.start()
         log.info("Starting up with %s shards...", self.shard_count)
         if settings.gateway_url is None:
             return
@@ -297,6 +385,20 @@ class BallsDexBot(commands.AutoShardedBot):
             log.warning("Gateway proxy is not ready yet, waiting 30 more seconds...")
             await asyncio.sleep(30)
 
+    async def close(self) -> None:
+        self.card_renderer.shutdown()
+        await self.change_feed.close()
+        self.loop_monitor.stop()
+        self.user_resolver.close()
+        if self.cluster is not None:
+            self.cluster.close()
+        for ledger in (self.wallets, self.cooldowns, self.guild_stats):
+            try:
+                await ledger.close()
+            except Exception:
+                log.exception(f"Failed to save {type(ledger).__name__} before shutdown")
+        await super().close()
+
     async def on_ready(self):
         if self.cogs != {}:
             return  # bot is reconnecting, no need to setup again
@@ -326,6 +428,7 @@ class BallsDexBot(commands.AutoShardedBot):
             )
 
         await self.load_cache()
+        self.change_feed.start()
         grammar = "" if len(self.blacklist) == 1 else "s"
         if self.blacklist:
             log.info(f"{len(self.blacklist)} blacklisted user{grammar}.")
@@ -364,7 +467,10 @@ class BallsDexBot(commands.AutoShardedBot):
             for guild_id in settings.admin_guild_ids:
                 guild = self.get_guild(guild_id)
                 if not guild:
-                    continue
+                    if self.owns_guild(guild_id):
+                        continue
+                    # the guild is handled by another cluster
+                    guild = discord.Object(guild_id)
                 synced_commands = await self.tree.sync(guild=guild)
                 grammar = "" if len(synced_commands) == 1 else "s"
                 log.info(
@@ -459,6 +565,9 @@ class BallsDexBot(commands.AutoShardedBot):
     async def on_application_command_error(
         self, interaction: discord.Interaction[Self], error: app_commands.AppCommandError
     ):
+        if isinstance(error, app_commands.CheckFailure):
+            interaction.extras["outcome"] = "check_failed"
+
         async def send(content: str):
             if interaction.response.is_done():
                 await interaction.followup.send(content, ephemeral=True)
@@ -508,6 +617,12 @@ class BallsDexBot(commands.AutoShardedBot):
                 )
                 return
 
+            if isinstance(error.original, RendererOverloaded):
+                await send(
+                    "Too many cards are being drawn right now, please try again in a few seconds."
+                )
+                return
+
             if isinstance(error.original, discord.InteractionResponded):
                 # most likely an interaction received twice (happens sometimes),
                 # or two instances are running on the same token.
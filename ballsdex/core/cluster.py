@@ -0,0 +1,388 @@
+"""
+Running the bot as several processes, each one connected to a range of shards.
+
+The launcher starts one worker process per cluster, restarts them if they crash, and relays
+the messages they publish to each other through a local socket. Workers publish with
+`ClusterClient.publish`, and the other clusters receive them as `on_cluster_<op>` events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import pickle
+import signal
+import struct
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.metrics_core import Metric
+from prometheus_client.parser import text_string_to_metric_families
+
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.core.cluster")
+
+CLUSTER_ID_ENV = "BALLSDEXBOT_CLUSTER_ID"
+SHARD_COUNT_ENV = "BALLSDEXBOT_SHARD_COUNT"
+SOCKET_ENV = "BALLSDEXBOT_CLUSTER_SOCKET"
+
+# Discord allows one identification every 5 seconds per bucket of shards
+IDENTIFY_DELAY = 5
+HEADER = struct.Struct("!I")
+
+
+def cluster_shard_ids(shard_count: int, clusters: int, cluster_id: int) -> list[int]:
+    """
+    The shards of a cluster, a contiguous range of the same size for all clusters give or take
+    one shard.
+    """
+    return list(
+        range(cluster_id * shard_count // clusters, (cluster_id + 1) * shard_count // clusters)
+    )
+
+
+def metrics_port(cluster_id: int) -> int:
+    """
+    The local port where a worker serves its metrics, collected by the launcher.
+    """
+    return settings.prometheus_port + 1 + cluster_id
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict[str, Any]:
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return pickle.loads(await reader.readexactly(size))
+
+
+def write_frame(writer: asyncio.StreamWriter, message: dict[str, Any]):
+    data = pickle.dumps(message)
+    writer.write(HEADER.pack(len(data)) + data)
+
+
+async def recommended_sharding(token: str) -> tuple[int, int]:
+    """
+    Ask Discord for the recommended number of shards and the number of shards allowed to
+    identify at the same time.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+class ClusterClient:
+    """
+    Connection of a worker process with the launcher.
+
+    Parameters
+    ----------
+    bot: BallsDexBot
+        The bot of this process, receiving the messages of other clusters as events.
+    cluster_id: int
+        The ID of this cluster, from 0.
+    clusters: int
+        The total number of clusters.
+    path: str
+        Path of the socket of the launcher.
+    """
+
+    def __init__(self, bot: "BallsDexBot", cluster_id: int, clusters: int, path: str):
+        self.bot = bot
+        self.cluster_id = cluster_id
+        self.clusters = clusters
+        self.path = path
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+        self._requests: dict[int, asyncio.Future] = {}
+        self._nonce = 0
+
+    async def connect(self):
+        reader, self._writer = await asyncio.open_unix_connection(self.path)
+        write_frame(self._writer, {"op": "hello", "data": self.cluster_id})
+        self._task = asyncio.create_task(self._read(reader))
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._writer:
+            self._writer.close()
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                message = await read_frame(reader)
+                if message["op"] == "reply":
+                    future = self._requests.pop(message["nonce"], None)
+                    if future is not None and not future.done():
+                        future.set_result(message["data"])
+                else:
+                    self.bot.dispatch(f"cluster_{message['op']}", message["data"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # the launcher is gone, nothing would restart this process if it crashes
+            log.critical("Lost the connection with the cluster launcher, shutting down")
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    def publish(self, op: str, data: Any = None):
+        """
+        Send a message to all the other clusters, dispatched there as `on_cluster_<op>`.
+
+        The data must be picklable.
+        """
+        assert self._writer
+        write_frame(self._writer, {"op": op, "data": data})
+
+    async def request(self, op: str, data: Any = None) -> Any:
+        """
+        Send a request to the launcher and wait for its reply.
+        """
+        assert self._writer
+        self._nonce += 1
+        future = asyncio.get_running_loop().create_future()
+        self._requests[self._nonce] = future
+        write_frame(self._writer, {"op": op, "data": data, "nonce": self._nonce})
+        return await future
+
+
+class ClusterLauncher:
+    """
+    Start and supervise the worker processes.
+
+    Each worker runs the bot with the same command line arguments, and finds its cluster ID,
+    the number of shards and the socket of the launcher in environment variables.
+
+    Parameters
+    ----------
+    clusters: int
+        Number of worker processes.
+    arguments: list[str]
+        Command line arguments given to the workers.
+    """
+
+    def __init__(self, clusters: int, arguments: list[str]):
+        self.clusters = clusters
+        self.arguments = arguments
+        self.shard_count = 0
+        self.max_concurrency = 1
+        self.path = ""
+        self.processes: dict[int, asyncio.subprocess.Process] = {}
+        self.connections: dict[int, asyncio.StreamWriter] = {}
+        self.stopping = asyncio.Event()
+        self.exit_code = 0
+        self._identify_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._last_identify: defaultdict[int, float] = defaultdict(float)
+
+    async def run(self) -> int:
+        try:
+            shard_count, self.max_concurrency = await recommended_sharding(settings.bot_token)
+        except Exception:
+            if settings.shard_count is None:
+                log.exception("Failed to get the recommended number of shards")
+                return 1
+            log.warning("Failed to get the identify concurrency, using 1", exc_info=True)
+        if settings.shard_count is not None:
+            if settings.shard_count < self.clusters:
+                log.error(
+                    f"Cannot split {settings.shard_count} shards in {self.clusters} clusters"
+                )
+                return 1
+            self.shard_count = settings.shard_count
+        else:
+            self.shard_count = max(shard_count, self.clusters)
+        log.info(f"Starting {self.clusters} clusters with {self.shard_count} shards")
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except NotImplementedError:
+                log.warning(f"Cannot add signal handler for {sig.name}.")
+
+        metrics_server: ClusterMetricsServer | None = None
+        with tempfile.TemporaryDirectory(prefix="ballsdex-") as directory:
+            self.path = str(Path(directory) / "cluster.sock")
+            server = await asyncio.start_unix_server(self._handle, self.path)
+            if settings.prometheus_enabled:
+                metrics_server = ClusterMetricsServer(self.clusters)
+                try:
+                    await metrics_server.run()
+                except Exception:
+                    log.exception("Failed to start Prometheus server, stats will be unavailable.")
+                    metrics_server = None
+
+            supervisors = [asyncio.create_task(self._supervise(i)) for i in range(self.clusters)]
+            await self.stopping.wait()
+            log.info("Stopping all clusters...")
+            await self._terminate()
+            for task in supervisors:
+                task.cancel()
+            if metrics_server:
+                await metrics_server.stop()
+            server.close()
+        return self.exit_code
+
+    async def _supervise(self, cluster_id: int):
+        loop = asyncio.get_running_loop()
+        delay = 5
+        while not self.stopping.is_set():
+            env = {
+                **os.environ,
+                CLUSTER_ID_ENV: str(cluster_id),
+                SHARD_COUNT_ENV: str(self.shard_count),
+                SOCKET_ENV: self.path,
+            }
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "ballsdex", *self.arguments, env=env
+            )
+            self.processes[cluster_id] = process
+            started = loop.time()
+            code = await process.wait()
+            if self.stopping.is_set():
+                return
+            if code == 0:
+                log.info(f"Cluster {cluster_id} was shut down, stopping the other clusters")
+                self.stopping.set()
+                return
+            if loop.time() - started > 600:
+                delay = 5
+            log.error(f"Cluster {cluster_id} exited with code {code}, restarting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300)
+
+    async def _terminate(self):
+        processes = [x for x in self.processes.values() if x.returncode is None]
+        for process in processes:
+            process.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.gather(*(x.wait() for x in processes)), timeout=30)
+        except asyncio.TimeoutError:
+            log.error("Clusters did not stop in time, killing them")
+            for process in processes:
+                if process.returncode is None:
+                    process.kill()
+            self.exit_code = 1
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cluster_id: int | None = None
+        try:
+            hello = await read_frame(reader)
+            cluster_id = hello["data"]
+            self.connections[cluster_id] = writer
+            while True:
+                message = await read_frame(reader)
+                if message["op"] == "identify":
+                    asyncio.create_task(self._identify(writer, message))
+                    continue
+                for other_id, other in list(self.connections.items()):
+                    if other_id == cluster_id:
+                        continue
+                    try:
+                        write_frame(other, message)
+                        await other.drain()
+                    except ConnectionError:
+                        pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if cluster_id is not None and self.connections.get(cluster_id) is writer:
+                del self.connections[cluster_id]
+            writer.close()
+
+    async def _identify(self, writer: asyncio.StreamWriter, message: dict[str, Any]):
+        """
+        Let a shard identify once no other shard of its bucket did in the last seconds.
+        """
+        loop = asyncio.get_running_loop()
+        bucket = message["data"] % self.max_concurrency
+        async with self._identify_locks[bucket]:
+            wait = self._last_identify[bucket] + IDENTIFY_DELAY - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_identify[bucket] = loop.time()
+        try:
+            write_frame(writer, {"op": "reply", "nonce": message["nonce"], "data": None})
+        except ConnectionError:
+            pass
+
+
+class _Collected:
+    def __init__(self, metrics: list[Metric]):
+        self.metrics = metrics
+
+    def collect(self) -> list[Metric]:
+        return self.metrics
+
+
+class ClusterMetricsServer:
+    """
+    Serve the metrics of all the clusters for Prometheus, each sample labelled with the ID of
+    its cluster.
+
+    Workers serve their own metrics locally, on the ports following the configured one.
+    """
+
+    def __init__(self, clusters: int):
+        self.clusters = clusters
+        self.app = web.Application(logger=log)
+        self.app.add_routes((web.get("/metrics", self.get),))
+        self.runner = web.AppRunner(self.app)
+
+    async def _fetch(self, session: aiohttp.ClientSession, cluster_id: int) -> str:
+        async with session.get(f"http://127.0.0.1:{metrics_port(cluster_id)}/metrics") as resp:
+            resp.raise_for_status()
+            return await resp.text()
+
+    async def collect(self) -> list[Metric]:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            results = await asyncio.gather(
+                *(self._fetch(session, i) for i in range(self.clusters)), return_exceptions=True
+            )
+        families: dict[str, Metric] = {}
+        for cluster_id, result in enumerate(results):
+            if isinstance(result, BaseException):
+                log.warning(f"Failed to collect the metrics of cluster {cluster_id}: {result!r}")
+                continue
+            for family in text_string_to_metric_families(result):
+                merged = families.get(family.name)
+                if merged is None:
+                    merged = families[family.name] = Metric(
+                        family.name, family.documentation, family.type, family.unit
+                    )
+                merged.samples.extend(
+                    sample._replace(labels={**sample.labels, "cluster": str(cluster_id)})
+                    for sample in family.samples
+                )
+        return list(families.values())
+
+    async def get(self, request: web.Request) -> web.Response:
+        registry = CollectorRegistry(auto_describe=False)
+        registry.register(_Collected(await self.collect()))  # type: ignore
+        response = web.Response(body=generate_latest(registry))
+        response.content_type = CONTENT_TYPE_LATEST
+        return response
+
+    async def run(self):
+        await self.runner.setup()
+        site = web.TCPSite(
+            self.runner, host=settings.prometheus_host, port=settings.prometheus_port
+        )
+        await site.start()
+        log.info(
+            f"Prometheus server started on http://{settings.prometheus_host}:"
+            f"{settings.prometheus_port}/ for {self.clusters} clusters"
+        )
+
+    async def stop(self):
+        await self.runner.cleanup()
@@ -125,6 +125,27 @@ class Core(commands.Cog):
         t2 = time.time()
         await ctx.send(f"Analyzed database in {round((t2 - t1) * 1000)}ms.")
 
+    @commands.command()
+    @commands.is_owner()
+    async def blocking(self, ctx: commands.Context, count: int = 10):
+        """
+        Show the code that blocked the event loop the most since startup, with the stack of the
+        worst offender.
+        """
+        monitor = self.bot.loop_monitor
+        if not monitor.running:
+            await ctx.send("The loop monitor is disabled.")
+            return
+        if not monitor.samples:
+            await ctx.send(f"The event loop was not blocked for more than {monitor.threshold}s.")
+            return
+        offenders = monitor.samples.most_common(count)
+        text = "\n".join(
+            f"{samples * monitor.interval:>8.1f}s  {location}" for location, samples in offenders
+        )
+        text += f"\n\nLast stack of {offenders[0][0]}:\n{monitor.stacks[offenders[0][0]]}"
+        await send_interactive(ctx, pagify(text, page_length=1900))
+
     @commands.command()
     @commands.is_owner()
     async def migrateemotes(self, ctx: commands.Context):
@@ -0,0 +1,96 @@
+import logging
+import os
+from typing import Iterable, Literal
+
+from cachetools import LFUCache
+from PIL import Image, ImageOps
+
+log = logging.getLogger("ballsdex.core.image_generator.assets")
+
+type Method = Literal["raw", "fit", "resize"]
+type AssetRequest = tuple[str, tuple[int, int] | None, Method]
+
+
+def _image_size(entry: tuple[float, Image.Image]) -> int:
+    image = entry[1]
+    return image.width * image.height * len(image.getbands())
+
+
+class AssetStore:
+    """
+    Decoded images used to draw cards, converted to RGBA and already fitted to the size they
+    are pasted at.
+
+    Images are kept within a memory budget, evicting the least used ones first. The
+    modification time of a file is checked on every access and a changed file is decoded again.
+    Returned images are shared and must not be modified, copy them first.
+
+    Parameters
+    ----------
+    budget: int
+        Maximum memory used by decoded images, in bytes.
+    """
+
+    def __init__(self, budget: int):
+        self.images: LFUCache[AssetRequest, tuple[float, Image.Image]] = LFUCache(
+            maxsize=budget, getsizeof=_image_size
+        )
+
+    @staticmethod
+    def _load(path: str, size: tuple[int, int] | None, method: Method) -> Image.Image:
+        with Image.open(path) as file:
+            image = file.convert("RGBA")
+        if size is None or method == "raw":
+            return image
+        if method == "fit":
+            fitted = ImageOps.fit(image, size)
+        else:
+            fitted = image.resize(size)
+        image.close()
+        return fitted
+
+    def get(
+        self, path: str, size: tuple[int, int] | None = None, method: Method = "raw"
+    ) -> Image.Image:
+        """
+        Get a decoded image.
+
+        Parameters
+        ----------
+        path: str
+            Path to the image file.
+        size: tuple[int, int] | None
+            Size the image must have, `None` to keep the original size.
+        method: Literal["raw", "fit", "resize"]
+            How the image is brought to `size`: cropped to keep proportions with "fit", or
+            stretched with "resize".
+
+        Returns
+        -------
+        Image.Image
+            The shared RGBA image, do not modify it.
+        """
+        key: AssetRequest = (path, size, method)
+        mtime = os.stat(path).st_mtime
+        entry = self.images.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        image = self._load(path, size, method)
+        try:
+            self.images[key] = (mtime, image)
+        except ValueError:
+            pass  # larger than the whole budget, don't keep it
+        return image
+
+    def preload(self, requests: Iterable[AssetRequest]):
+        """
+        Decode the given images ahead of time, until the budget is full.
+        """
+        for path, size, method in requests:
+            if self.images.currsize >= self.images.maxsize:
+                break
+            try:
+                self.get(path, size, method)
+            except OSError:
+                log.warning(f"Could not preload asset {path}", exc_info=True)
@@ -0,0 +1,327 @@
+import asyncio
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from cachetools import LRUCache, TTLCache
+from prometheus_client import Counter
+
+if TYPE_CHECKING:
+    from ballsdex.core.models import Ball, BallInstance, Special
+
+log = logging.getLogger("ballsdex.core.image_generator.card_cache")
+
+# bump this whenever image_gen.draw_card changes its output, invalidates the disk cache
+RENDER_VERSION = 1
+
+card_cache_lookups = Counter("card_cache_lookups", "Rendered card cache lookups", ["result"])
+
+
+def ball_signature(ball: "Ball") -> tuple:
+    """
+    Fields of a ball that change the look of its card.
+    """
+    regime = ball.cached_regime
+    economy = ball.cached_economy
+    return (
+        ball.pk,
+        ball.country,
+        ball.short_name,
+        ball.capacity_name,
+        ball.capacity_description,
+        ball.rarity,
+        ball.credits,
+        ball.collection_card,
+        regime.background,
+        economy.icon if economy else None,
+    )
+
+
+def special_signature(special: "Special | None") -> tuple | None:
+    """
+    Fields of a special event that change the look of a card.
+    """
+    if special is None:
+        return None
+    return (special.pk, special.background, special.credits)
+
+
+class _CardLRU(LRUCache):
+    """
+    LRU cache bounded in bytes, notifying the owner of evicted keys.
+    """
+
+    def __init__(self, maxsize: int, cache: "CardCache"):
+        super().__init__(maxsize=maxsize, getsizeof=len)
+        self.cache = cache
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.cache._forget(key)
+        return key, value
+
+
+class CardCache:
+    """
+    Content-addressed cache of rendered cards.
+
+    The key of a card is a hash of everything that affects its pixels (ball and special fields,
+    stats, frame overlay and modification time of the image files), so an edited asset simply
+    produces a new key. Encoded images are kept in a LRU cache bounded in bytes, and optionally
+    written to a directory to survive restarts.
+
+    Parameters
+    ----------
+    memory_size: int
+        Maximum size of the in-memory cache in bytes. 0 disables the memory tier.
+    disk_path: Path | None
+        Directory of the on-disk tier. `None` disables it.
+    media_path: str
+        Directory where uploaded assets are found.
+    """
+
+    def __init__(
+        self,
+        memory_size: int,
+        disk_path: Path | None = None,
+        media_path: str = "./admin_panel/media/",
+    ):
+        self.memory: _CardLRU | None = _CardLRU(memory_size, self) if memory_size > 0 else None
+        self.disk_path = disk_path
+        self.media_path = media_path
+        if disk_path:
+            disk_path.mkdir(parents=True, exist_ok=True)
+
+        # avoid calling os.stat on every lookup, edited files are picked up within a minute
+        self._mtimes: TTLCache[str, float] = TTLCache(maxsize=4096, ttl=60)
+
+        # keys stored in memory for each ball and special, used for invalidation
+        self._owners: dict[str, tuple[int, int | None]] = {}
+        self._ball_keys: dict[int, set[str]] = {}
+        self._special_keys: dict[int, set[str]] = {}
+
+        # last known signatures, to detect which entries are outdated after a cache reload
+        self._ball_signatures: dict[int, tuple] = {}
+        self._special_signatures: dict[int, tuple | None] = {}
+
+    def _mtime(self, path: str | Path) -> float:
+        path = str(path)
+        try:
+            return self._mtimes[path]
+        except KeyError:
+            pass
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = 0
+        self._mtimes[path] = mtime
+        return mtime
+
+    def key(self, ball_instance: "BallInstance", overlay: Path | None = None) -> str:
+        """
+        Compute the cache key of a card.
+
+        Parameters
+        ----------
+        ball_instance: BallInstance
+            The instance being rendered.
+        overlay: Path | None
+            Path to the frame overlay applied on top of the card, if any.
+
+        Returns
+        -------
+        str
+            An hexadecimal hash identifying the card's pixels.
+        """
+        ball = ball_instance.countryball
+        special = ball_instance.specialcard
+        background = ball_instance.special_card or ball.cached_regime.background
+        economy = ball.cached_economy
+        files = [background, ball.collection_card]
+        if economy:
+            files.append(economy.icon)
+        mtimes = tuple(self._mtime(self.media_path + x) for x in files)
+        signature = (
+            RENDER_VERSION,
+            ball_signature(ball),
+            special_signature(special),
+            ball_instance.attack,
+            ball_instance.health,
+            (overlay.name, self._mtime(overlay)) if overlay else None,
+            mtimes,
+        )
+        return hashlib.blake2b(repr(signature).encode(), digest_size=20).hexdigest()
+
+    def _disk_file(self, key: str, ball_id: int, special_id: int | None) -> Path:
+        assert self.disk_path
+        # ball and special IDs are part of the name for invalidation from the admin panel
+        return self.disk_path / f"{ball_id}-{special_id or 0}-{key}.webp"
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Lookup a card in memory only.
+        """
+        if self.memory is None:
+            return None
+        data = self.memory.get(key)
+        if data is not None:
+            card_cache_lookups.labels(result="memory").inc()
+        return data
+
+    def _read_disk(self, key: str, ball_id: int, special_id: int | None) -> bytes | None:
+        try:
+            return self._disk_file(key, ball_id, special_id).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            log.warning(f"Failed to read cached card {key}", exc_info=True)
+            return None
+
+    def _write_disk(self, key: str, ball_id: int, special_id: int | None, data: bytes):
+        file = self._disk_file(key, ball_id, special_id)
+        tmp = file.with_suffix(".tmp")
+        try:
+            tmp.write_bytes(data)
+            tmp.replace(file)  # atomic, other processes never read a partial file
+        except OSError:
+            log.warning(f"Failed to write cached card {key}", exc_info=True)
+
+    async def get_or_render(
+        self,
+        key: str,
+        ball_id: int,
+        special_id: int | None,
+        render: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        """
+        Lookup a card in memory, then on disk, and render it if both missed.
+
+        Parameters
+        ----------
+        key: str
+            The key of the card, obtained with `key`.
+        ball_id: int
+            ID of the rendered ball.
+        special_id: int | None
+            ID of the special event of the card, if any.
+        render: Callable[[], Awaitable[bytes]]
+            Coroutine function drawing and encoding the card.
+
+        Returns
+        -------
+        bytes
+            The encoded image.
+        """
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        if self.disk_path is not None:
+            data = await asyncio.to_thread(self._read_disk, key, ball_id, special_id)
+            if data is not None:
+                card_cache_lookups.labels(result="disk").inc()
+                self.store(key, ball_id, special_id, data)
+                return data
+
+        card_cache_lookups.labels(result="miss").inc()
+        data = await render()
+        self.store(key, ball_id, special_id, data)
+        if self.disk_path is not None:
+            await asyncio.to_thread(self._write_disk, key, ball_id, special_id, data)
+        return data
+
+    def store(self, key: str, ball_id: int, special_id: int | None, data: bytes):
+        """
+        Keep a card in the memory tier.
+        """
+        if self.memory is None or len(data) > self.memory.maxsize:
+            return
+        self.memory[key] = data
+        self._owners[key] = (ball_id, special_id)
+        self._ball_keys.setdefault(ball_id, set()).add(key)
+        if special_id:
+            self._special_keys.setdefault(special_id, set()).add(key)
+
+    def _forget(self, key: str):
+        owner = self._owners.pop(key, None)
+        if owner is None:
+            return
+        ball_id, special_id = owner
+        self._ball_keys.get(ball_id, set()).discard(key)
+        if special_id:
+            self._special_keys.get(special_id, set()).discard(key)
+
+    def _drop_keys(self, keys: set[str]):
+        for key in keys:
+            self._forget(key)
+            if self.memory is not None:
+                self.memory.pop(key, None)
+
+    def invalidate(self, *, ball_id: int | None = None, special_id: int | None = None):
+        """
+        Remove all cached cards of a ball or a special, in memory and on disk.
+        """
+        if ball_id is not None:
+            self._drop_keys(self._ball_keys.pop(ball_id, set()))
+        if special_id is not None:
+            self._drop_keys(self._special_keys.pop(special_id, set()))
+        if self.disk_path:
+            purge_disk_cache(self.disk_path, ball_id=ball_id, special_id=special_id)
+
+    def clear(self):
+        """
+        Drop the whole memory tier.
+        """
+        if self.memory is not None:
+            self.memory.clear()
+        self._owners.clear()
+        self._ball_keys.clear()
+        self._special_keys.clear()
+        self._mtimes.clear()
+
+    def refresh(self, balls: dict[int, "Ball"], specials: dict[int, "Special"]):
+        """
+        Compare the catalog against the last known state and invalidate the cards of the
+        balls and specials that were edited. Called after the cache is (re)loaded.
+        """
+        # file modification times may have changed too
+        self._mtimes.clear()
+
+        for ball_id in self._ball_signatures.keys() - balls.keys():
+            self.invalidate(ball_id=ball_id)
+            del self._ball_signatures[ball_id]
+        for ball_id, ball in balls.items():
+            signature = ball_signature(ball)
+            old = self._ball_signatures.get(ball_id)
+            if old is not None and old != signature:
+                self.invalidate(ball_id=ball_id)
+            self._ball_signatures[ball_id] = signature
+
+        for special_id in self._special_signatures.keys() - specials.keys():
+            self.invalidate(special_id=special_id)
+            del self._special_signatures[special_id]
+        for special_id, special in specials.items():
+            signature = special_signature(special)
+            old = self._special_signatures.get(special_id)
+            if old is not None and old != signature:
+                self.invalidate(special_id=special_id)
+            self._special_signatures[special_id] = signature
+
+
+def purge_disk_cache(
+    disk_path: Path, *, ball_id: int | None = None, special_id: int | None = None
+):
+    """
+    Delete the cards of a ball or a special from the disk tier. This does not need the bot and
+    is also used by the admin panel when assets are edited.
+    """
+    patterns: list[str] = []
+    if ball_id is not None:
+        patterns.append(f"{ball_id}-*.webp")
+    if special_id is not None:
+        patterns.append(f"*-{special_id}-*.webp")
+    for pattern in patterns:
+        for file in disk_path.glob(pattern):
+            file.unlink(missing_ok=True)
@@ -1,12 +1,16 @@
 import os
 import textwrap
+from dataclasses import dataclass
+from io import BytesIO
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Iterable
 
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from PIL import Image, ImageDraw, ImageFont
+
+from ballsdex.core.image_generator.assets import AssetRequest, AssetStore, Method
 
 if TYPE_CHECKING:
-    from ballsdex.core.models import BallInstance
+    from ballsdex.core.models import Ball, BallInstance, Economy, Regime, Special
 
 
 SOURCES_PATH = Path(os.path.dirname(os.path.abspath(__file__)), "./src")
@@ -18,6 +22,8 @@ RECTANGLE_HEIGHT = (HEIGHT // 5) * 2
 
 CORNERS = ((0, 181), (1428, 948))
 artwork_size = [b - a for a, b in zip(*CORNERS)]
+ARTWORK_SIZE = (artwork_size[0], artwork_size[1])
+ICON_SIZE = (170, 170)
 
 # ===== TIP =====
 #
@@ -39,43 +45,142 @@ credits_font = ImageFont.truetype(str(SOURCES_PATH / "demarunregular-ovpgo.ttf")
 
 credits_color_cache = {}
 
+# only set in the rendering processes, see init_assets
+asset_store: AssetStore | None = None
+
 
 def get_credit_color(image: Image.Image, region: tuple) -> tuple:
     image = image.crop(region)
     brightness = sum(image.convert("L").getdata()) / image.width / image.height  # type: ignore
     return (0, 0, 0, 255) if brightness > 100 else (255, 255, 255, 255)
 
-    
-def draw_card(ball_instance: "BallInstance", media_path: str = "./admin_panel/media/", frame_overlay: Image.Image = None):
-    ball = ball_instance.countryball
+
+@dataclass(frozen=True, slots=True)
+class CardSpec:
+    """
+    Everything needed to draw a card, detached from the models and the caches so it can be
+    sent to a rendering process.
+    """
+
+    title: str
+    capacity_name: str
+    capacity_description: str
+    rarity: float
+    health: int
+    attack: int
+    background: str
+    artwork: str
+    icon: str | None = None
+    overlay: str | None = None
+
+    @classmethod
+    def from_instance(
+        cls,
+        ball_instance: "BallInstance",
+        media_path: str = "./admin_panel/media/",
+        overlay: Path | None = None,
+    ) -> "CardSpec":
+        ball = ball_instance.countryball
+        economy = ball.cached_economy
+        return cls(
+            title=ball.short_name or ball.country,
+            capacity_name=ball.capacity_name,
+            capacity_description=ball.capacity_description,
+            rarity=ball.rarity,
+            health=ball_instance.health,
+            attack=ball_instance.attack,
+            background=media_path
+            + (ball_instance.special_card or ball.cached_regime.background),
+            artwork=media_path + ball.collection_card,
+            icon=media_path + economy.icon if economy else None,
+            overlay=str(overlay) if overlay else None,
+        )
+
+
+def draw_card(
+    ball_instance: "BallInstance",
+    media_path: str = "./admin_panel/media/",
+    frame_overlay: Image.Image | None = None,
+):
+    return draw_card_from_spec(CardSpec.from_instance(ball_instance, media_path), frame_overlay)
+
+
+def init_assets(budget: int, preload: Iterable[AssetRequest] = ()):
+    """
+    Keep decoded assets in memory for the next renders of this process, and decode the given
+    ones ahead of time. This is the initializer of the rendering processes.
+    """
+    global asset_store
+    asset_store = AssetStore(budget)
+    asset_store.preload(preload)
+
+
+def catalog_assets(
+    balls: Iterable["Ball"],
+    regimes: Iterable["Regime"],
+    economies: Iterable["Economy"],
+    specials: Iterable["Special"],
+    media_path: str = "./admin_panel/media/",
+) -> list[AssetRequest]:
+    """
+    List the assets of the catalog worth preloading, the most shared ones first.
+    """
+    requests: list[AssetRequest] = []
+    requests.extend((media_path + x.background, None, "raw") for x in regimes)
+    requests.extend((media_path + x.background, None, "raw") for x in specials if x.background)
+    requests.extend((media_path + x.icon, ICON_SIZE, "fit") for x in economies)
+    # most common balls are the most likely to be drawn
+    requests.extend(
+        (media_path + x.collection_card, ARTWORK_SIZE, "fit")
+        for x in sorted(balls, key=lambda x: x.rarity, reverse=True)
+        if x.enabled
+    )
+    return requests
+
+
+def load_asset(
+    path: str, size: tuple[int, int] | None = None, method: Method = "raw"
+) -> Image.Image:
+    """
+    Get a decoded RGBA image, from the asset store if this process has one.
+    The returned image may be shared and must not be modified.
+    """
+    if asset_store is None:
+        return AssetStore._load(path, size, method)
+    return asset_store.get(path, size, method)
+
+
+def render_card(spec: CardSpec) -> bytes:
+    """
+    Draw and encode a card. This is the entrypoint of the rendering processes.
+    """
+    image, kwargs = draw_card_from_spec(spec)
+    buffer = BytesIO()
+    image.save(buffer, **kwargs)
+    image.close()
+    return buffer.getvalue()
+
+
+def draw_card_from_spec(spec: CardSpec, frame_overlay: Image.Image | None = None):
     ball_health = (237, 115, 101, 255)
-    ball_credits = ball.credits
-    
-    if special_image := ball_instance.special_card:
-        image = Image.open(media_path + special_image)
-        if ball_instance.specialcard and ball_instance.specialcard.credits:
-            ball_credits += f" • {ball_instance.specialcard.credits}"
-    else:
-        image = Image.open(media_path + ball.cached_regime.background)
-    image = image.convert("RGBA")
+
+    image = load_asset(spec.background).copy()
     if frame_overlay:
         frame_overlay = frame_overlay.resize(image.size)
         image = Image.alpha_composite(image, frame_overlay)
-    icon = (
-        Image.open(media_path + ball.cached_economy.icon).convert("RGBA")
-        if ball.cached_economy
-        else None
-    )
+    elif spec.overlay:
+        image = Image.alpha_composite(image, load_asset(spec.overlay, image.size, "resize"))
+    icon = load_asset(spec.icon, ICON_SIZE, "fit") if spec.icon else None
 
     draw = ImageDraw.Draw(image)
     draw.text(
         (30, 30),
-        ball.short_name or ball.country,
+        spec.title,
         font=title_font,
         stroke_width=3,
         stroke_fill=(0, 0, 0, 255),
     )
-    for i, line in enumerate(textwrap.wrap(f"CODE: {ball.capacity_name}", width=30)):
+    for i, line in enumerate(textwrap.wrap(f"CODE: {spec.capacity_name}", width=30)):
         draw.text(
             (100, 1050 + 100 * i),
             line,
@@ -84,7 +189,7 @@ def draw_card(ball_instance: "BallInstance", media_path: str = "./admin_panel/me
             stroke_width=2,
             stroke_fill=(0, 0, 0, 255),
         )
-    for i, line in enumerate(textwrap.wrap(ball.capacity_description, width=44)):
+    for i, line in enumerate(textwrap.wrap(spec.capacity_description, width=44)):
         draw.text(
             (80, 1160 + 60 * i),
             line,
@@ -92,7 +197,7 @@ def draw_card(ball_instance: "BallInstance", media_path: str = "./admin_panel/me
             stroke_width=1,
             stroke_fill=(0, 0, 0, 255),
         )
-    rarity = ball_instance.countryball.rarity
+    rarity = spec.rarity
     draw.text(
     (1280, 10),
     str(rarity),
@@ -104,7 +209,7 @@ def draw_card(ball_instance: "BallInstance", media_path: str = "./admin_panel/me
     )
     draw.text(
         (301, 1615),
-        str(ball_instance.health),
+        str(spec.health),
         font=stats_font,
         fill=ball_health,
         stroke_width=1,
@@ -112,7 +217,7 @@ def draw_card(ball_instance: "BallInstance", media_path: str = "./admin_panel/me
     )
     draw.text(
         (1142, 1615),
-        str(ball_instance.attack),
+        str(spec.attack),
         font=stats_font,
         fill=(252, 194, 76, 255),
         stroke_width=1,
@@ -130,13 +235,10 @@ def draw_card(ball_instance: "BallInstance", media_path: str = "./admin_panel/me
         stroke_fill=(255, 255, 255, 255),
     )
 
-    artwork = Image.open(media_path + ball.collection_card).convert("RGBA")
-    image.paste(ImageOps.fit(artwork, artwork_size), CORNERS[0])  # type: ignore
+    artwork = load_asset(spec.artwork, ARTWORK_SIZE, "fit")
+    image.paste(artwork, CORNERS[0])
 
     if icon:
-        icon = ImageOps.fit(icon, (170, 170))
         image.paste(icon, (1142, 1030), mask=icon)
-        icon.close()
-    artwork.close()
 
     return image, {"format": "WEBP"}
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from ballsdex.core.image_generator.assets import AssetRequest
+from ballsdex.core.image_generator.image_gen import CardSpec, init_assets, render_card
+
+log = logging.getLogger("ballsdex.core.image_generator.renderer")
+
+render_duration = Histogram(
+    "card_render_seconds",
+    "Time spent rendering a card",
+    ["stage"],
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0, float("inf")),
+)
+render_queue = Gauge("card_render_queue", "Cards waiting for a free rendering worker")
+render_rejected = Counter("card_render_rejected", "Renders rejected because of a full queue")
+
+
+class RendererOverloaded(Exception):
+    """
+    Raised when too many cards are queued and no slot freed up in time.
+    """
+
+
+def _warm_up():
+    # assets are decoded by the initializer, this only ensures the process is ready
+    return None
+
+
+class CardRenderer:
+    """
+    Long-lived pool of processes drawing cards, keeping PIL work away from the event loop.
+
+    At most two renders per worker are handed to the pool at once, the others wait in a
+    bounded queue. When the queue is full, or a render waits for too long, the render is
+    rejected with `RendererOverloaded` instead of piling up more work.
+
+    Parameters
+    ----------
+    workers: int
+        Number of rendering processes. With 0, cards are drawn in a single background thread
+        instead, which still holds the GIL but avoids extra processes on small hosts.
+    queue_size: int
+        Maximum number of renders waiting for a free worker.
+    timeout: float
+        How long a render may wait for a free worker before being rejected.
+    asset_memory: int
+        Memory budget of the decoded assets kept by each worker, in bytes.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 32,
+        timeout: float = 10,
+        asset_memory: int = 256 * 1024 * 1024,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.asset_memory = asset_memory
+        self.executor: Executor | None = None
+        self._slots = asyncio.Semaphore(max(workers, 1) * 2)
+        self._waiting = 0
+
+    def _make_executor(self, preload: list[AssetRequest]) -> Executor:
+        initargs = (self.asset_memory, preload)
+        if self.workers <= 0:
+            return ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="card-renderer",
+                initializer=init_assets,
+                initargs=initargs,
+            )
+        # fork is unsafe with the threads started by the bot and its libraries
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_assets,
+            initargs=initargs,
+        )
+
+    async def _warm_executor(self, executor: Executor):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, _warm_up) for _ in range(max(self.workers, 1)))
+        )
+
+    async def start(self, preload: list[AssetRequest] | None = None):
+        """
+        Start the pool and wait for every worker to be ready.
+
+        Parameters
+        ----------
+        preload: list[AssetRequest] | None
+            Assets decoded by each worker when it starts.
+        """
+        if self.executor is not None:
+            return
+        self.executor = executor = self._make_executor(preload or [])
+        await self._warm_executor(executor)
+        log.info(f"Card renderer ready with {self.workers} worker processes.")
+
+    async def reload(self, preload: list[AssetRequest]):
+        """
+        Replace the workers with new ones holding the given assets. The current workers keep
+        serving until the new ones are ready, then finish their ongoing renders and exit.
+        """
+        if self.executor is None:
+            await self.start(preload)
+            return
+        executor = self._make_executor(preload)
+        await self._warm_executor(executor)
+        old, self.executor = self.executor, executor
+        old.shutdown(wait=False)
+        log.info(f"Card renderer reloaded with {len(preload)} assets to preload.")
+
+    def shutdown(self):
+        if self.executor is None:
+            return
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+
+    async def _run(self, spec: CardSpec) -> bytes:
+        if self.executor is None:
+            await self.start()
+        executor = self.executor
+        assert executor
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, render_card, spec)
+        except BrokenProcessPool:
+            # a worker died (OOM killer?), replace the pool once and try again
+            log.error("Card rendering pool broke, restarting it", exc_info=True)
+            if self.executor is executor:
+                self.shutdown()
+            await self.start()
+            assert self.executor
+            return await loop.run_in_executor(self.executor, render_card, spec)
+
+    async def render(self, spec: CardSpec) -> bytes:
+        """
+        Draw and encode a card in the pool.
+
+        Parameters
+        ----------
+        spec: CardSpec
+            Description of the card to draw.
+
+        Returns
+        -------
+        bytes
+            The encoded image.
+
+        Raises
+        ------
+        RendererOverloaded
+            The queue is full, or the render waited for too long.
+        """
+        if self._slots.locked() and self._waiting >= self.queue_size:
+            render_rejected.inc()
+            raise RendererOverloaded("Too many cards are being rendered, try again later.")
+
+        t1 = time.perf_counter()
+        self._waiting += 1
+        render_queue.inc()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            render_rejected.inc()
+            raise RendererOverloaded("Too many cards are being rendered, try again later.")
+        finally:
+            self._waiting -= 1
+            render_queue.dec()
+
+        t2 = time.perf_counter()
+        render_duration.labels(stage="queue").observe(t2 - t1)
+        try:
+            data = await self._run(spec)
+        finally:
+            self._slots.release()
+        render_duration.labels(stage="render").observe(time.perf_counter() - t2)
+        return data
@@ -1,10 +1,17 @@
 import asyncio
+import collections
 import logging
 import math
+import sys
+import threading
+import time
+import traceback
 from collections import defaultdict
-from datetime import datetime
+from contextvars import ContextVar
+from pathlib import Path
 from typing import TYPE_CHECKING
 
+import discord
 from aiohttp import web
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 
@@ -16,6 +23,243 @@ log = logging.getLogger("ballsdex.core.metrics")
 caught_balls = Counter(
     "caught_cb", "Caught countryballs", ["country", "special", "guild_size", "spawn_algo"]
 )
+trade_settlement = Histogram(
+    "trade_settlement_seconds",
+    "Time taken to transfer the proposals of a concluded trade",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf")),
+)
+
+app_command_duration = Histogram(
+    "app_command_seconds",
+    "Time taken to handle application commands and autocompletions, error handling included",
+    ["command", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf")),
+)
+interaction_delay = Histogram(
+    "interaction_delay_seconds",
+    "Time between the creation of an interaction by Discord and the start of its handling",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0, float("inf")),
+)
+db_query_duration = Histogram(
+    "db_query_seconds",
+    "Duration of the database queries, by application command running them",
+    ["command", "type"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float("inf")),
+)
+app_command_queries = Histogram(
+    "app_command_db_queries",
+    "Number of database queries made while handling an application command",
+    ["command", "type"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000, float("inf")),
+)
+
+asyncio_delay = Histogram(
+    "asyncio_delay",
+    "How much time asyncio takes to give back control",
+    buckets=(
+        0.001,
+        0.0025,
+        0.005,
+        0.0075,
+        0.01,
+        0.025,
+        0.05,
+        0.075,
+        0.1,
+        0.25,
+        0.5,
+        0.75,
+        1.0,
+        2.5,
+        5.0,
+        7.5,
+        10.0,
+        float("inf"),
+    ),
+)
+loop_blocked_samples = Counter(
+    "event_loop_blocked_samples",
+    "Samples of the code running while the event loop was blocked, by location",
+    ["location"],
+)
+
+_current_command: ContextVar["CommandMetrics | None"] = ContextVar("command", default=None)
+
+
+class CommandMetrics:
+    """
+    Observe the handling of an interaction and the database queries made meanwhile.
+
+    The command is tracked in a context variable, so the queries of the tasks it starts are
+    attributed to it too.
+
+    Parameters
+    ----------
+    interaction: discord.Interaction
+        The application command or autocompletion interaction being handled.
+    """
+
+    __slots__ = ("interaction", "name", "type", "queries", "_start", "_token")
+
+    def __init__(self, interaction: discord.Interaction):
+        self.interaction = interaction
+        command = interaction.command
+        self.name = command.qualified_name if command else "unknown"
+        if interaction.type == discord.InteractionType.autocomplete:
+            self.type = "autocomplete"
+        else:
+            self.type = "command"
+        self.queries = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        interaction_delay.observe(
+            (discord.utils.utcnow() - self.interaction.created_at).total_seconds()
+        )
+        self._token = _current_command.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current_command.reset(self._token)
+        if self.type == "autocomplete":
+            outcome = "autocomplete"
+        elif exc is not None:
+            outcome = "error"
+        elif self.interaction.command_failed:
+            # set by the error handler of the bot
+            outcome = self.interaction.extras.get("outcome", "error")
+        else:
+            outcome = "success"
+        app_command_duration.labels(self.name, outcome).observe(time.perf_counter() - self._start)
+        app_command_queries.labels(self.name, self.type).observe(self.queries)
+
+
+def instrument_database(client_class: type):
+    """
+    Observe the duration of the queries made by a Tortoise client class and its transactions.
+
+    All the queries of the asyncpg client go through its `_translate_exceptions` method, which
+    is wrapped here.
+    """
+    original = client_class._translate_exceptions
+
+    async def _translate_exceptions(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await original(self, func, *args, **kwargs)
+        finally:
+            command = _current_command.get()
+            if command is None:
+                db_query_duration.labels("none", "background").observe(time.perf_counter() - start)
+            else:
+                command.queries += 1
+                db_query_duration.labels(command.name, command.type).observe(
+                    time.perf_counter() - start
+                )
+
+    client_class._translate_exceptions = _translate_exceptions
+
+
+PACKAGE_PATH = Path(__file__).parents[1]
+
+
+def _location(stack: traceback.StackSummary) -> str:
+    """
+    The innermost frame of the bot's code in a stack, or the innermost frame if there is none.
+    """
+    for frame in reversed(stack):
+        path = Path(frame.filename)
+        if path.is_relative_to(PACKAGE_PATH):
+            return f"{path.relative_to(PACKAGE_PATH.parent)}:{frame.lineno} in {frame.name}"
+    frame = stack[-1]
+    return f"{Path(frame.filename).name}:{frame.lineno} in {frame.name}"
+
+
+class LoopMonitor:
+    """
+    Measure the delay of the event loop continuously, and find the code blocking it.
+
+    A task sleeps for `interval` seconds in a loop and observes how late it wakes up. A
+    watchdog thread checks that this task keeps running. When it was late by more than
+    `threshold` seconds, the loop is blocked by synchronous code, whose stack is sampled from
+    the thread every `interval` until the loop runs again. The number of samples of each
+    location is therefore proportional to the time it blocked the loop.
+
+    Parameters
+    ----------
+    interval: float
+        Delay between two measures of the loop delay, in seconds.
+    threshold: float
+        Delay above which the loop is considered blocked, in seconds.
+    log_cooldown: float
+        Minimum delay between two logs of the same location, in seconds.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.5, log_cooldown: float = 300):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_cooldown = log_cooldown
+        self.samples: collections.Counter[str] = collections.Counter()
+        # the last stack sampled for each location
+        self.stacks: dict[str, str] = {}
+        self._logged: dict[str, float] = {}
+        self._heartbeat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._measure())
+        self._stop.clear()
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            asyncio_delay.observe(max(loop.time() - start - self.interval, 0))
+            self._heartbeat = time.monotonic()
+
+    def _watch(self):
+        blocked_since: float | None = None
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            if now - self._heartbeat < self.interval + self.threshold:
+                blocked_since = None
+                continue
+            frame = sys._current_frames().get(self._loop_thread)  # type: ignore
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            location = _location(stack)
+            self.samples[location] += 1
+            self.stacks[location] = "".join(stack.format())
+            loop_blocked_samples.labels(location).inc()
+            if blocked_since is not None:
+                continue
+            blocked_since = now
+            if now - self._logged.get(location, -self.log_cooldown) >= self.log_cooldown:
+                self._logged[location] = now
+                log.warning(
+                    f"Event loop blocked for more than {self.threshold}s "
+                    f"in {location}:\n{self.stacks[location]}"
+                )
 
 
 class PrometheusServer:
@@ -39,30 +283,6 @@ class PrometheusServer:
         self.shards_latecy = Histogram(
             "gateway_latency", "Shard latency with the Discord gateway", ["shard_id"]
         )
-        self.asyncio_delay = Histogram(
-            "asyncio_delay",
-            "How much time asyncio takes to give back control",
-            buckets=(
-                0.001,
-                0.0025,
-                0.005,
-                0.0075,
-                0.01,
-                0.025,
-                0.05,
-                0.075,
-                0.1,
-                0.25,
-                0.5,
-                0.75,
-                1.0,
-                2.5,
-                5.0,
-                7.5,
-                10.0,
-                float("inf"),
-            ),
-        )
 
     async def collect_metrics(self):
         guilds: dict[int, int] = defaultdict(int)
@@ -75,11 +295,7 @@ class PrometheusServer:
 
         for shard_id, latency in self.bot.latencies:
             self.shards_latecy.labels(shard_id=shard_id).observe(latency)
-
-        t1 = datetime.now()
-        await asyncio.sleep(1)
-        t2 = datetime.now()
-        self.asyncio_delay.observe((t2 - t1).total_seconds() - 1)
+        # the delay of the event loop is measured continuously by LoopMonitor
 
     async def get(self, request: web.Request) -> web.Response:
         log.debug("Request received")
@@ -1,18 +1,20 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from enum import IntEnum
 from io import BytesIO
+from pathlib import Path
 from typing import TYPE_CHECKING, Iterable, Tuple, Type
 
 import discord
 from discord.utils import format_dt
+from PIL import Image
 from tortoise import exceptions, fields, manager, models, signals, timezone, validators
+from tortoise.contrib.postgres.fields import ArrayField
 from tortoise.contrib.postgres.indexes import PostgreSQLIndex
 from tortoise.expressions import Q
 
-from ballsdex.core.image_generator.image_gen import draw_card
+from ballsdex.core.image_generator.image_gen import CardSpec, draw_card
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -209,6 +211,7 @@ class BallInstanceManager(manager.Manager):
 
 class BallInstance(models.Model):
     ball_id: int
+    player_id: int
     special_id: int
     trade_player_id: int
 
@@ -341,38 +344,54 @@ class BallInstance(models.Model):
                     text = f"{emoji} {text}"
         return text
 
-    def draw_card(self) -> BytesIO:
-        image, kwargs = draw_card(self)
+    def draw_card(self, overlay: Path | None = None) -> BytesIO:
+        frame_overlay = Image.open(overlay).convert("RGBA") if overlay else None
+        image, kwargs = draw_card(self, frame_overlay=frame_overlay)
         buffer = BytesIO()
         image.save(buffer, **kwargs)
         buffer.seek(0)
         image.close()
+        if frame_overlay:
+            frame_overlay.close()
         return buffer
 
+    async def render(self, bot: "BallsDexBot", overlay: Path | None = None) -> BytesIO:
+        """
+        Get the card of this instance as a WEBP image, from the bot's card cache if possible.
+
+        Parameters
+        ----------
+        bot: BallsDexBot
+            The bot holding the card cache and renderer.
+        overlay: Path | None
+            Path to a frame overlay drawn on top of the card.
+
+        Returns
+        -------
+        BytesIO
+            The encoded image.
+        """
+        cache = bot.card_cache
+        spec = CardSpec.from_instance(self, overlay=overlay)
+        data = await cache.get_or_render(
+            cache.key(self, overlay),
+            self.ball_id,
+            self.special_id,
+            lambda: bot.card_renderer.render(spec),
+        )
+        return BytesIO(data)
+
     async def prepare_for_message(
-        self, interaction: discord.Interaction["BallsDexBot"]
+        self, interaction: discord.Interaction["BallsDexBot"], overlay: Path | None = None
     ) -> Tuple[str, discord.File, discord.ui.View]:
         # message content
         trade_content = ""
         await self.fetch_related("trade_player", "special")
         if self.trade_player:
-            original_player = None
-            # we want to avoid calling fetch_user if possible (heavily rate-limited call)
-            if interaction.guild:
-                try:
-                    original_player = await interaction.guild.fetch_member(
-                        int(self.trade_player.discord_id)
-                    )
-                except discord.NotFound:
-                    pass
-            elif original_player is None:  # try again if not found in guild
-                try:
-                    original_player = await interaction.client.fetch_user(
-                        int(self.trade_player.discord_id)
-                    )
-                except discord.NotFound:
-                    pass
-
+            # names are cached, and requested through the gateway if the user is a member
+            original_player = await interaction.client.user_resolver.resolve(
+                self.trade_player.discord_id, interaction.guild
+            )
             original_player_name = (
                 original_player.name
                 if original_player
@@ -388,8 +407,7 @@ class BallInstance(models.Model):
         )
 
         # draw image
-        with ThreadPoolExecutor() as pool:
-            buffer = await interaction.client.loop.run_in_executor(pool, self.draw_card)
+        buffer = await self.render(interaction.client, overlay)
 
         view = discord.ui.View()
         return content, discord.File(buffer, "card.webp"), view
@@ -407,6 +425,46 @@ class BallInstance(models.Model):
         self.locked
         return self.locked is not None and (self.locked + timedelta(minutes=30)) > timezone.now()
 
+    @classmethod
+    async def lock_many_for_trade(cls, instances: Iterable[BallInstance]) -> list[BallInstance]:
+        """
+        Lock several instances for a trade with a single query, skipping the ones that are
+        already locked.
+
+        Returns
+        -------
+        list[BallInstance]
+            The instances that were locked by this call.
+        """
+        by_id = {x.pk: x for x in instances}
+        if not by_id:
+            return []
+        now = timezone.now()
+        _, rows = await cls._meta.db.execute_query(
+            "UPDATE ballinstance SET locked = $1 "
+            "WHERE id = ANY($2::bigint[]) AND NOT deleted AND (locked IS NULL OR locked <= $3) "
+            "RETURNING id",
+            [now, list(by_id), now - timedelta(minutes=30)],
+        )
+        locked: list[BallInstance] = []
+        for row in rows:
+            instance = by_id[row["id"]]
+            instance.locked = now
+            locked.append(instance)
+        return locked
+
+    @classmethod
+    async def unlock_many(cls, instances: Iterable[BallInstance]):
+        """
+        Unlock several instances with a single query.
+        """
+        instances = list(instances)
+        if not instances:
+            return
+        await cls.filter(id__in=[x.pk for x in instances]).update(locked=None)
+        for instance in instances:
+            instance.locked = None  # type: ignore
+
 
 class DonationPolicy(IntEnum):
     ALWAYS_ACCEPT = 1
@@ -599,3 +657,157 @@ class Block(models.Model):
 
     def __str__(self) -> str:
         return str(self.pk)
+
+
+class Wallet(models.Model):
+    id: int
+    discord_id = fields.BigIntField(description="Discord user ID")
+    currency = fields.CharField(max_length=32, description="Name of the wallet")
+    balance = fields.IntField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.currency})"
+
+    class Meta:
+        unique_together = ("discord_id", "currency")
+
+
+class CommandCooldown(models.Model):
+    id: int
+    discord_id = fields.BigIntField(description="Discord user ID")
+    name = fields.CharField(max_length=64, description="Name of the limited command")
+    uses = fields.IntField(default=0, description="Uses since the start of the period")
+    started_at = fields.DatetimeField(null=True, default=None)
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.name})"
+
+    class Meta:
+        unique_together = ("discord_id", "name")
+
+
+class BroadcastJob(models.Model):
+    id: int
+    author_id = fields.BigIntField(description="Discord ID of the user who sent the broadcast")
+    message = fields.TextField(null=True, default=None)
+    attachment = fields.BinaryField(null=True, default=None)
+    filename = fields.CharField(max_length=256, null=True, default=None)
+    spoiler = fields.BooleanField(default=False)
+    report_channel_id = fields.BigIntField(
+        null=True, default=None, description="Channel of the message reporting the progress"
+    )
+    report_message_id = fields.BigIntField(null=True, default=None)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    progress: fields.ReverseRelation[BroadcastProgress]
+
+    def __str__(self) -> str:
+        return str(self.pk)
+
+
+class BroadcastProgress(models.Model):
+    id: int
+    job_id: int
+    job: fields.ForeignKeyRelation[BroadcastJob] = fields.ForeignKeyField(
+        "models.BroadcastJob", related_name="progress"
+    )
+    cluster = fields.IntField(default=0, description="Process sending to its spawn channels")
+    checkpoint = fields.BigIntField(
+        default=0, description="Every channel up to this ID was handled"
+    )
+    total = fields.IntField(default=0)
+    sent = fields.IntField(default=0)
+    failed = fields.IntField(default=0)
+    finished = fields.BooleanField(default=False)
+
+    def __str__(self) -> str:
+        return f"{self.job_id} ({self.cluster})"
+
+    class Meta:
+        unique_together = ("job", "cluster")
+
+
+class GuildStats(models.Model):
+    id: int
+    guild_id = fields.BigIntField(unique=True, description="Discord guild ID")
+    catches = fields.BigIntField(default=0, description="Total number of catches")
+    last_catch = fields.DatetimeField(null=True, default=None)
+    last_catcher = fields.BigIntField(
+        null=True, default=None, description="Discord ID of the user who caught last"
+    )
+    streak = fields.IntField(
+        default=0, description="Number of consecutive catches made by the last catcher"
+    )
+
+    def __str__(self) -> str:
+        return str(self.guild_id)
+
+
+class GuildCatchDay(models.Model):
+    id: int
+    guild_id = fields.BigIntField(description="Discord guild ID")
+    day = fields.DateField(description="UTC day of the catches")
+    catches = fields.IntField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.guild_id} ({self.day})"
+
+    class Meta:
+        unique_together = ("guild_id", "day")
+
+
+class GuildCatcher(models.Model):
+    id: int
+    guild_id = fields.BigIntField(description="Discord guild ID")
+    day = fields.DateField(description="UTC day of the catches")
+    discord_id = fields.BigIntField(description="Discord ID of a user who caught that day")
+
+    def __str__(self) -> str:
+        return f"{self.discord_id} ({self.guild_id}, {self.day})"
+
+    class Meta:
+        unique_together = ("guild_id", "day", "discord_id")
+
+
+class PlayerStats(models.Model):
+    """
+    Statistics of a player, maintained by database triggers on the ball instances and trades.
+    """
+
+    id: int
+    player_id: int
+    player: fields.OneToOneRelation[Player] = fields.OneToOneField(
+        "models.Player", related_name="stats"
+    )
+    balls = fields.IntField(default=0, description="Number of owned instances")
+    caught = fields.IntField(default=0, description="Owned instances caught by the player")
+    specials = fields.IntField(default=0, description="Owned instances with a special")
+    distinct_balls = fields.IntField(default=0, description="Number of different balls owned")
+    trades = fields.IntField(default=0, description="Number of trades made")
+    recent_day = fields.DateField(
+        null=True, default=None, description="UTC day of the latest catch"
+    )
+    recent_catches: list[int] = ArrayField(
+        "int", default=list, description="Catches of each day, from recent_day backwards"
+    )
+
+    def __str__(self) -> str:
+        return str(self.player_id)
+
+
+class PlayerBallCount(models.Model):
+    id: int
+    player_id: int
+    player: fields.ForeignKeyRelation[Player] = fields.ForeignKeyField(
+        "models.Player", related_name="ball_counts"
+    )
+    ball_id: int
+    ball: fields.ForeignKeyRelation[Ball] = fields.ForeignKeyField(
+        "models.Ball", related_name="player_counts"
+    )
+    count = fields.IntField(default=0, description="Number of owned instances of this ball")
+
+    def __str__(self) -> str:
+        return f"{self.player_id} ({self.ball_id})"
+
+    class Meta:
+        unique_together = ("player", "ball")
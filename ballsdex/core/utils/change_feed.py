@@ -0,0 +1,163 @@
+"""
+Live updates of the bot's caches from the changes made to the database by other processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+import asyncpg
+from tortoise import Tortoise
+
+from ballsdex.core.models import (
+    Ball,
+    BlacklistedGuild,
+    BlacklistedID,
+    Economy,
+    Regime,
+    Special,
+    balls,
+    economies,
+    regimes,
+    specials,
+)
+
+if TYPE_CHECKING:
+    from tortoise.backends.base_postgres.client import BasePostgresClient
+
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.core.utils.change_feed")
+
+CHANNEL = "ballsdex_cache"
+CATALOGS = {"ball": (Ball, balls), "regime": (Regime, regimes), "economy": (Economy, economies)}
+CATALOGS["special"] = (Special, specials)
+
+
+class ChangeFeed:
+    """
+    Listen to the notifications sent by the database triggers when the catalog or blacklist
+    tables are modified, and patch the caches of the bot accordingly.
+
+    Each notification carries the table and the key of the changed row. Notifications
+    received within `delay` seconds are applied together, with one query per table. If the
+    connection is lost, changes may have been missed and the whole cache is reloaded once
+    reconnected.
+
+    Parameters
+    ----------
+    bot: BallsDexBot
+        The bot whose caches are updated.
+    delay: float
+        Seconds to wait for more notifications before applying them.
+    """
+
+    def __init__(self, bot: "BallsDexBot", delay: float = 0.5):
+        self.bot = bot
+        self.delay = delay
+        self.pending: dict[str, set[int]] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+        self._apply_task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        for task in (self._task, self._apply_task):
+            if task is not None:
+                task.cancel()
+        self._task = self._apply_task = None
+
+    async def _connect(self) -> asyncpg.Connection:
+        client: "BasePostgresClient" = Tortoise.get_connection("default")  # type: ignore
+        return await asyncpg.connect(
+            user=client.user,
+            password=client.password,
+            database=client.database,
+            host=client.host,
+            port=client.port,
+        )
+
+    async def _run(self):
+        first = True
+        while True:
+            try:
+                connection = await self._connect()
+            except Exception:
+                log.exception("Failed to connect to the change feed, retrying in 30 seconds")
+                await asyncio.sleep(30)
+                continue
+            lost = asyncio.get_running_loop().create_future()
+            connection.add_termination_listener(lambda _: lost.done() or lost.set_result(None))
+            try:
+                await connection.add_listener(CHANNEL, self._on_notification)
+                if not first:
+                    log.warning("Change feed reconnected, reloading the whole cache")
+                    await self.bot.load_cache()
+                first = False
+                await lost
+                log.warning("Change feed connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Change feed failed, reconnecting in 30 seconds")
+                await asyncio.sleep(30)
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            data = json.loads(payload)
+            self.pending[data["table"]].add(int(data["key"]))
+        except (ValueError, KeyError, TypeError):
+            log.warning(f"Invalid change notification: {payload!r}")
+            return
+        if self._apply_task is None or self._apply_task.done():
+            self._apply_task = asyncio.create_task(self._apply_later())
+
+    async def _apply_later(self):
+        # notifications received while applying are not scheduled again, loop until none is left
+        while self.pending:
+            await asyncio.sleep(self.delay)
+            pending, self.pending = self.pending, defaultdict(set)
+            try:
+                await self.apply(pending)
+            except Exception:
+                log.exception(f"Failed to apply cache changes {dict(pending)}")
+
+    async def apply(self, changes: dict[str, set[int]]):
+        """
+        Reload the given rows of each table into the caches.
+        """
+        for table, (model, cache) in CATALOGS.items():
+            if ids := changes.get(table):
+                found = {x.pk: x for x in await model.filter(id__in=ids)}
+                for pk in ids:
+                    if pk in found:
+                        cache[pk] = found[pk]
+                    else:
+                        cache.pop(pk, None)
+
+        for table, model, blacklist in (
+            ("blacklistedid", BlacklistedID, self.bot.blacklist),
+            ("blacklistedguild", BlacklistedGuild, self.bot.blacklist_guild),
+        ):
+            if ids := changes.get(table):
+                found = set(
+                    await model.filter(discord_id__in=ids).values_list("discord_id", flat=True)
+                )
+                blacklist.difference_update(ids - found)
+                blacklist.update(found)
+
+        if changes.keys() & CATALOGS.keys():
+            self.bot.refresh_catalog()
+        log.info(
+            "Applied database changes: "
+            + ", ".join(f"{len(ids)} {table}" for table, ids in changes.items())
+        )
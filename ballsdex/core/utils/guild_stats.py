@@ -0,0 +1,196 @@
+"""
+Catch statistics of each guild, maintained as the balls are caught instead of counting the
+ball instances.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from ballsdex.core.models import GuildCatchDay, GuildCatcher, GuildStats
+from ballsdex.core.utils.ledger import _WriteBehind
+
+# daily rows older than this are deleted, the totals are kept forever
+RETENTION_DAYS = 90
+COMPACT_INTERVAL = 3600
+
+STATS_UPSERT = """
+INSERT INTO guildstats AS s (guild_id, catches, last_catch, last_catcher, streak)
+SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::timestamptz[], $4::bigint[], $5::int[])
+ON CONFLICT (guild_id) DO UPDATE SET
+    catches = s.catches + EXCLUDED.catches,
+    last_catch = EXCLUDED.last_catch,
+    -- the streak continues if the whole batch was caught by the previous last catcher
+    streak = CASE
+        WHEN s.last_catcher = EXCLUDED.last_catcher AND EXCLUDED.streak = EXCLUDED.catches
+        THEN s.streak + EXCLUDED.streak
+        ELSE EXCLUDED.streak
+    END,
+    last_catcher = EXCLUDED.last_catcher
+"""
+DAYS_UPSERT = """
+INSERT INTO guildcatchday AS d (guild_id, day, catches)
+SELECT * FROM unnest($1::bigint[], $2::date[], $3::int[])
+ON CONFLICT (guild_id, day) DO UPDATE SET catches = d.catches + EXCLUDED.catches
+"""
+CATCHERS_INSERT = """
+INSERT INTO guildcatcher (guild_id, day, discord_id)
+SELECT * FROM unnest($1::bigint[], $2::date[], $3::bigint[])
+ON CONFLICT DO NOTHING
+"""
+ACTIVITY_QUERY = """
+SELECT
+    (SELECT coalesce(sum(catches), 0) FROM guildcatchday WHERE guild_id = $1 AND day >= $2)
+        AS catches,
+    (SELECT count(DISTINCT discord_id) FROM guildcatcher WHERE guild_id = $1 AND day >= $2)
+        AS catchers
+"""
+
+
+@dataclass(slots=True)
+class GuildActivity:
+    """
+    Catches of a guild not written to the database yet.
+    """
+
+    catches: int = 0
+    last_catch: datetime | None = None
+    last_catcher: int | None = None
+    # consecutive catches of last_catcher at the end of this batch
+    streak: int = 0
+    days: Counter[date] = field(default_factory=Counter)
+    catchers: set[tuple[date, int]] = field(default_factory=set)
+    accessed: float = 0
+
+    def add(self, discord_id: int, when: datetime):
+        self.catches += 1
+        self.streak = self.streak + 1 if self.last_catcher == discord_id else 1
+        self.last_catcher = discord_id
+        self.last_catch = when
+        day = when.astimezone(timezone.utc).date()
+        self.days[day] += 1
+        self.catchers.add((day, discord_id))
+
+    def merge(self, newer: GuildActivity):
+        """
+        Append the catches of a batch that happened after this one.
+        """
+        if not newer.catches:
+            return
+        if newer.streak == newer.catches and newer.last_catcher == self.last_catcher:
+            self.streak += newer.streak
+        else:
+            self.streak = newer.streak
+        self.catches += newer.catches
+        self.last_catch = newer.last_catch
+        self.last_catcher = newer.last_catcher
+        self.days.update(newer.days)
+        self.catchers.update(newer.catchers)
+        self.accessed = max(self.accessed, newer.accessed)
+
+
+class GuildStatsRecorder(_WriteBehind[int, GuildActivity]):
+    """
+    Rollup of the catches of each guild, kept in three tables:
+
+    - ``guildstats``: total catches, and how many consecutive catches the last catcher made;
+    - ``guildcatchday``: catches of each UTC day;
+    - ``guildcatcher``: the set of users who caught in each day, to count distinct catchers.
+
+    Catches are counted in memory and written in batches as increments, which several bot
+    processes can do concurrently. Daily rows older than `RETENTION_DAYS` are deleted every
+    hour.
+    """
+
+    def __init__(self, flush_interval: float = 5, idle_timeout: float = 600):
+        super().__init__(flush_interval, idle_timeout)
+        self._compacted = 0.0
+
+    def _is_dirty(self, entry: GuildActivity) -> bool:
+        return entry.catches > 0
+
+    def record(self, guild_id: int, discord_id: int, when: datetime | None = None):
+        """
+        Count a catch, written with the next batch.
+        """
+        entry = self.entries.get(guild_id)
+        if entry is None:
+            entry = self.entries[guild_id] = GuildActivity()
+        entry.add(discord_id, when or datetime.now(timezone.utc))
+        entry.accessed = time.monotonic()
+
+    async def _flush(self):
+        batch = {key: entry for key, entry in self.entries.items() if entry.catches}
+        for key, entry in batch.items():
+            self.entries[key] = GuildActivity(accessed=entry.accessed)
+        try:
+            if batch:
+                await self._write(batch)
+        except Exception:
+            for key, entry in batch.items():
+                entry.merge(self.entries[key])
+                self.entries[key] = entry
+            raise
+        if time.monotonic() - self._compacted > COMPACT_INTERVAL:
+            await self.compact()
+
+    async def _write(self, batch: dict[int, GuildActivity]):
+        days = [(key, day, n) for key, entry in batch.items() for day, n in entry.days.items()]
+        catchers = [(key, *x) for key, entry in batch.items() for x in entry.catchers]
+        async with in_transaction() as connection:
+            await connection.execute_query(
+                STATS_UPSERT,
+                [
+                    list(batch.keys()),
+                    [x.catches for x in batch.values()],
+                    [x.last_catch for x in batch.values()],
+                    [x.last_catcher for x in batch.values()],
+                    [x.streak for x in batch.values()],
+                ],
+            )
+            await connection.execute_query(DAYS_UPSERT, [list(x) for x in zip(*days)])
+            await connection.execute_query(CATCHERS_INSERT, [list(x) for x in zip(*catchers)])
+
+    async def compact(self):
+        """
+        Delete the daily rows past the retention period.
+        """
+        self._compacted = time.monotonic()
+        limit = datetime.now(timezone.utc).date() - timedelta(days=RETENTION_DAYS)
+        await GuildCatchDay.filter(day__lt=limit).delete()
+        await GuildCatcher.filter(day__lt=limit).delete()
+
+    async def activity(self, guild_id: int, days: int) -> tuple[int, int]:
+        """
+        Count the catches and distinct catchers of a guild over the last UTC days, today
+        included. Catches of the current batch are not included.
+
+        Parameters
+        ----------
+        guild_id: int
+            ID of the guild.
+        days: int
+            Number of days, at most `RETENTION_DAYS`.
+
+        Returns
+        -------
+        tuple[int, int]
+            The number of catches and of users who caught.
+        """
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        _, rows = await Tortoise.get_connection("default").execute_query(
+            ACTIVITY_QUERY, [guild_id, since]
+        )
+        return rows[0]["catches"], rows[0]["catchers"]
+
+    async def totals(self, guild_ids: list[int]) -> dict[int, GuildStats]:
+        """
+        Get the total statistics of several guilds at once.
+        """
+        return {x.guild_id: x for x in await GuildStats.filter(guild_id__in=guild_ids)}
@@ -0,0 +1,235 @@
+"""
+In-memory index of the inventories used by the autocompletion of owned balls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+from array import array
+from typing import Iterable, Iterator
+
+from cachetools import TTLCache
+
+from ballsdex.core.models import BallInstance, Player, balls
+from ballsdex.core.utils.owned import owned_balls
+
+log = logging.getLogger("ballsdex.core.utils.inventory")
+
+
+def matching_balls(query: str, exact: bool = False) -> set[int]:
+    """
+    IDs of the balls whose name, catch names or translations contain the query, or whose
+    name is exactly the query if `exact` is set.
+    """
+    query = query.lower()
+    if exact:
+        return {x.pk for x in balls.values() if x.country.lower() == query}
+    return {
+        x.pk
+        for x in balls.values()
+        if query in x.country.lower()
+        or query in (x.catch_names or "")
+        or query in (x.translations or "")
+    }
+
+
+class PlayerInventory:
+    """
+    The balls of a player, as arrays sorted by instance ID.
+
+    Only the fields that rarely change are kept. Whether a ball is locked or favorited must be
+    fetched when displaying results.
+    """
+
+    __slots__ = (
+        "player_id",
+        "ids",
+        "ball_ids",
+        "special_ids",
+        "attack_bonuses",
+        "health_bonuses",
+        "by_ball",
+        "_last_search",
+        "_last_matches",
+    )
+
+    def __init__(self, player_id: int, rows: Iterable[tuple[int, int, int | None, int, int]]):
+        self.player_id = player_id
+        self.ids = array("q")
+        self.ball_ids = array("l")
+        self.special_ids = array("l")  # 0 for no special
+        self.attack_bonuses = array("l")
+        self.health_bonuses = array("l")
+        self.by_ball: dict[int, array[int]] = {}
+        for i, (pk, ball_id, special_id, attack_bonus, health_bonus) in enumerate(rows):
+            self.ids.append(pk)
+            self.ball_ids.append(ball_id)
+            self.special_ids.append(special_id or 0)
+            self.attack_bonuses.append(attack_bonus)
+            self.health_bonuses.append(health_bonus)
+            self.by_ball.setdefault(ball_id, array("l")).append(i)
+        # the matches of the previous search, narrowed down when the user keeps typing
+        self._last_search: tuple[str, int | None] | None = None
+        self._last_matches: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _hex_matches(self, query: str) -> Iterator[int]:
+        """
+        Rows whose hexadecimal ID starts with the query. IDs are sorted, so each possible
+        length of the ID is a contiguous range found by bisection.
+        """
+        try:
+            prefix = int(query, 16)
+        except ValueError:
+            return
+        if query[0] == "0" or not self.ids:
+            return
+        highest = self.ids[-1]
+        shift = 0
+        while prefix << shift <= highest:
+            start = bisect.bisect_left(self.ids, prefix << shift)
+            end = bisect.bisect_left(self.ids, (prefix + 1) << shift)
+            yield from range(start, end)
+            shift += 4
+
+    def _match(self, query: str, exact: bool) -> list[int]:
+        names = matching_balls(query, exact)
+        rows: set[int] = set()
+        for ball_id in names:
+            rows.update(self.by_ball.get(ball_id, ()))
+        if not exact:
+            rows.update(self._hex_matches(query))
+        return sorted(rows)
+
+    def _narrow(self, rows: list[int], query: str) -> list[int]:
+        names = matching_balls(query)
+        upper = query.upper()
+        return [
+            i for i in rows if self.ball_ids[i] in names or f"{self.ids[i]:X}".startswith(upper)
+        ]
+
+    def search(self, query: str, special_id: int | None = None) -> list[int]:
+        """
+        Rows matching the query, in ascending ID order.
+
+        The query is matched against the start of the hexadecimal ID and anywhere in the names
+        of the ball. A query starting with `=` must be the exact name of the ball.
+        """
+        if not query:
+            rows = range(len(self))
+            if special_id is not None:
+                return [i for i in rows if self.special_ids[i] == special_id]
+            return list(rows)
+
+        exact = query.startswith("=")
+        if exact:
+            query = query[1:]
+        else:
+            query = query.replace(".", "")
+        search = (query, special_id) if not exact else ("=" + query, special_id)
+
+        last = self._last_search
+        if (
+            not exact
+            and last is not None
+            and last[1] == special_id
+            and not last[0].startswith("=")
+            and query.lower().startswith(last[0].lower())
+        ):
+            # a longer query can only match a subset of the previous results
+            rows = self._narrow(self._last_matches, query)
+        else:
+            rows = self._match(query, exact)
+            if special_id is not None:
+                rows = [i for i in rows if self.special_ids[i] == special_id]
+        self._last_search = search
+        self._last_matches = rows
+        return rows
+
+    def instance(self, i: int, favorite: bool = False) -> BallInstance:
+        """
+        Build an unsaved instance from a row, for display.
+        """
+        return BallInstance(
+            id=self.ids[i],
+            ball_id=self.ball_ids[i],
+            special_id=self.special_ids[i] or None,
+            attack_bonus=self.attack_bonuses[i],
+            health_bonus=self.health_bonuses[i],
+            favorite=favorite,
+        )
+
+
+class InventoryIndex:
+    """
+    Inventories of the players currently using autocompletion, loaded with a single query and
+    kept for a few minutes to answer the following keystrokes from memory.
+
+    Entries are dropped when `owned_balls` reports a change for that player.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of inventories kept, least recently used first out.
+    ttl: float
+        Lifetime of an inventory in seconds.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600):
+        self.inventories: TTLCache[int, PlayerInventory] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.player_ids: TTLCache[int, int] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._loading: dict[int, asyncio.Future[PlayerInventory | None]] = {}
+        # players changed during each ongoing load, None meaning all of them
+        self._changes: list[set[int | None]] = []
+        owned_balls.listeners.append(self.invalidate)
+
+    async def _load(self, discord_id: int) -> PlayerInventory | None:
+        player = await Player.get_or_none(discord_id=discord_id).only("id")
+        if player is None:
+            return None
+        rows = (
+            await BallInstance.filter(player_id=player.pk)
+            .order_by("id")
+            .values_list("id", "ball_id", "special_id", "attack_bonus", "health_bonus")
+        )
+        return PlayerInventory(player.pk, rows)
+
+    async def get(self, discord_id: int) -> PlayerInventory | None:
+        """
+        Get the inventory of a user, or `None` if they are not a player.
+        """
+        inventory = self.inventories.get(discord_id)
+        if inventory is not None:
+            return inventory
+        future = self._loading.get(discord_id)
+        if future is None:
+            future = asyncio.ensure_future(self._load(discord_id))
+            self._loading[discord_id] = future
+            future.add_done_callback(lambda _: self._loading.pop(discord_id, None))
+            changes: set[int | None] = set()
+            self._changes.append(changes)
+            try:
+                inventory = await future
+            finally:
+                self._changes.remove(changes)
+            if inventory is not None and not changes & {inventory.player_id, None}:
+                self.inventories[discord_id] = inventory
+                self.player_ids[inventory.player_id] = discord_id
+            return inventory
+        return await future
+
+    def invalidate(self, player_id: int | None):
+        for changes in self._changes:
+            changes.add(player_id)
+        if player_id is None:
+            self.inventories.clear()
+            self.player_ids.clear()
+        elif (discord_id := self.player_ids.pop(player_id, None)) is not None:
+            self.inventories.pop(discord_id, None)
+
+
+inventory_index = InventoryIndex()
@@ -0,0 +1,298 @@
+"""
+Persistent wallets and command cooldowns, cached in memory with batched writes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from tortoise import Tortoise
+
+from ballsdex.core.models import CommandCooldown, Wallet
+
+log = logging.getLogger("ballsdex.core.utils.ledger")
+
+K = TypeVar("K")
+E = TypeVar("E")
+
+WALLET_UPSERT = """
+INSERT INTO wallet (discord_id, currency, balance)
+SELECT * FROM unnest($1::bigint[], $2::varchar[], $3::int[])
+ON CONFLICT (discord_id, currency) DO UPDATE SET balance = wallet.balance + EXCLUDED.balance
+"""
+WALLET_DEBIT = """
+INSERT INTO wallet (discord_id, currency, balance) VALUES ($1, $2, $3)
+ON CONFLICT (discord_id, currency) DO UPDATE SET balance = wallet.balance + EXCLUDED.balance
+WHERE wallet.balance + EXCLUDED.balance >= 0
+RETURNING balance
+"""
+COOLDOWN_UPSERT = """
+INSERT INTO commandcooldown (discord_id, name, uses, started_at)
+SELECT * FROM unnest($1::bigint[], $2::varchar[], $3::int[], $4::timestamptz[])
+ON CONFLICT (discord_id, name) DO UPDATE
+SET uses = EXCLUDED.uses, started_at = EXCLUDED.started_at
+"""
+
+
+@dataclass(slots=True)
+class WalletEntry:
+    balance: int
+    # credits not written to the database yet, already included in balance
+    pending: int = 0
+    accessed: float = 0
+
+
+@dataclass(slots=True)
+class CooldownEntry:
+    uses: int
+    started_at: datetime | None
+    dirty: bool = False
+    accessed: float = 0
+
+
+class _WriteBehind(Generic[K, E]):
+    """
+    Entries loaded once from the database and kept in memory, with changes written in batches
+    by a background task. Clean entries that were not used for a while are dropped.
+    """
+
+    def __init__(self, flush_interval: float = 5, idle_timeout: float = 600):
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.entries: dict[K, E] = {}
+        self._loading: dict[K, asyncio.Future[E]] = {}
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    async def _load(self, key: K) -> E:
+        raise NotImplementedError
+
+    def _is_dirty(self, entry: E) -> bool:
+        raise NotImplementedError
+
+    async def _flush(self):
+        raise NotImplementedError
+
+    async def _entry(self, key: K) -> E:
+        entry = self.entries.get(key)
+        if entry is None:
+            # concurrent misses for the same key share a single query
+            future = self._loading.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._load(key))
+                self._loading[key] = future
+                future.add_done_callback(lambda _: self._loading.pop(key, None))
+            entry = await future
+            entry = self.entries.setdefault(key, entry)
+        entry.accessed = time.monotonic()  # type: ignore
+        return entry
+
+    def _evict_idle(self):
+        limit = time.monotonic() - self.idle_timeout
+        for key, entry in list(self.entries.items()):
+            if entry.accessed < limit and not self._is_dirty(entry):  # type: ignore
+                del self.entries[key]
+
+    async def _run(self):
+        while True:
+            # a flush is never cancelled midway, closing waits for it to finish instead
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping.is_set():
+                return
+            try:
+                await self._flush()
+            except Exception:
+                log.exception(f"Failed to flush {type(self).__name__}, retrying later")
+            self._evict_idle()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """
+        Stop the background task and write the remaining changes.
+        """
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self._flush()
+
+
+class WalletLedger(_WriteBehind[tuple[int, str], WalletEntry]):
+    """
+    Balances of the users, one per currency, kept in the `wallet` table.
+
+    Balances are read from the database once, then served from memory. Credits are applied
+    to the cache immediately and written in batches as relative increments, so several bot
+    processes can credit the same wallet without overwriting each other.
+
+    Debits are the only operation that must be checked against the database, to prevent
+    spending the same balance from two processes. They are a single conditional statement
+    that also applies the pending credits of that wallet, and never need a prior read.
+    """
+
+    async def _load(self, key: tuple[int, str]) -> WalletEntry:
+        wallet = await Wallet.get_or_none(discord_id=key[0], currency=key[1])
+        return WalletEntry(wallet.balance if wallet else 0)
+
+    def _is_dirty(self, entry: WalletEntry) -> bool:
+        return entry.pending != 0
+
+    async def _flush(self):
+        batch = [(key, entry) for key, entry in self.entries.items() if entry.pending]
+        if not batch:
+            return
+        deltas = [entry.pending for _, entry in batch]
+        for _, entry in batch:
+            entry.pending = 0
+        try:
+            await Tortoise.get_connection("default").execute_query(
+                WALLET_UPSERT,
+                [[key[0] for key, _ in batch], [key[1] for key, _ in batch], deltas],
+            )
+        except Exception:
+            for (_, entry), delta in zip(batch, deltas):
+                entry.pending += delta
+            raise
+
+    async def balance(self, discord_id: int, currency: str, *, initial: int | None = None) -> int:
+        """
+        Get the balance of a user.
+
+        Parameters
+        ----------
+        discord_id: int
+            ID of the user.
+        currency: str
+            Name of the wallet.
+        initial: int | None
+            Balance given to a user seen for the first time. If `None`, no wallet is created
+            and the balance is 0.
+        """
+        key = (discord_id, currency)
+        entry = self.entries.get(key)
+        if entry is None and initial is not None:
+            wallet, _ = await Wallet.get_or_create(
+                discord_id=discord_id, currency=currency, defaults={"balance": initial}
+            )
+            self.entries.setdefault(key, WalletEntry(wallet.balance))
+        entry = await self._entry(key)
+        return entry.balance
+
+    async def credit(self, discord_id: int, currency: str, amount: int) -> int:
+        """
+        Add to the balance of a user. The change is written later with the next batch.
+
+        Returns
+        -------
+        int
+            The new balance.
+        """
+        entry = await self._entry((discord_id, currency))
+        entry.balance += amount
+        entry.pending += amount
+        return entry.balance
+
+    async def debit(self, discord_id: int, currency: str, amount: int) -> int | None:
+        """
+        Take from the balance of a user, if it is high enough.
+
+        Returns
+        -------
+        int | None
+            The new balance, or `None` if the balance is too low and nothing was taken.
+        """
+        key = (discord_id, currency)
+        entry = await self._entry(key)
+        if entry.balance < amount:
+            # another process may have credited this wallet since it was loaded
+            fresh = await self._load(key)
+            entry.balance = fresh.balance + entry.pending
+            if entry.balance < amount:
+                return None
+
+        delta = entry.pending - amount
+        entry.pending = 0
+        entry.balance -= amount
+        try:
+            _, rows = await Tortoise.get_connection("default").execute_query(
+                WALLET_DEBIT, [discord_id, currency, delta]
+            )
+        except BaseException:
+            entry.pending += delta + amount
+            entry.balance += amount
+            raise
+        if not rows:
+            # spent by another process, the pending credits were not applied
+            fresh = await self._load(key)
+            entry.pending += delta + amount
+            entry.balance = fresh.balance + entry.pending
+            return None
+        entry.balance = rows[0]["balance"] + entry.pending
+        return entry.balance
+
+
+class CooldownLedger(_WriteBehind[tuple[int, str], CooldownEntry]):
+    """
+    Command usage of the users, kept in the `commandcooldown` table.
+
+    Each entry counts the uses of a command since the start of the current period. Changes
+    are written in batches and are last-write-wins.
+    """
+
+    async def _load(self, key: tuple[int, str]) -> CooldownEntry:
+        cooldown = await CommandCooldown.get_or_none(discord_id=key[0], name=key[1])
+        if cooldown is None:
+            return CooldownEntry(0, None)
+        return CooldownEntry(cooldown.uses, cooldown.started_at)
+
+    def _is_dirty(self, entry: CooldownEntry) -> bool:
+        return entry.dirty
+
+    async def _flush(self):
+        batch = [(key, entry) for key, entry in self.entries.items() if entry.dirty]
+        if not batch:
+            return
+        for _, entry in batch:
+            entry.dirty = False
+        try:
+            await Tortoise.get_connection("default").execute_query(
+                COOLDOWN_UPSERT,
+                [
+                    [key[0] for key, _ in batch],
+                    [key[1] for key, _ in batch],
+                    [entry.uses for _, entry in batch],
+                    [entry.started_at for _, entry in batch],
+                ],
+            )
+        except BaseException:
+            for _, entry in batch:
+                entry.dirty = True
+            raise
+
+    async def get(self, discord_id: int, name: str) -> tuple[int, datetime | None]:
+        """
+        Get the number of uses of a command and when the current period started.
+        """
+        entry = await self._entry((discord_id, name))
+        return entry.uses, entry.started_at
+
+    async def set(self, discord_id: int, name: str, uses: int, started_at: datetime):
+        """
+        Record the uses of a command for the current period.
+        """
+        entry = await self._entry((discord_id, name))
+        entry.uses = uses
+        entry.started_at = started_at
+        entry.dirty = True
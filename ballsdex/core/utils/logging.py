@@ -11,12 +11,16 @@ log = logging.getLogger("ballsdex.packages.admin.cog")
 async def log_action(message: str, bot: BallsDexBot, console_log: bool = False):
     if settings.log_channel:
         channel = bot.get_channel(settings.log_channel)
-        if not channel:
+        if not channel and bot.cluster is not None:
+            # the channel is on a shard of another process
+            bot.cluster.publish("log_action", message)
+        elif not channel:
             log.warning(f"Channel {settings.log_channel} not found")
             return
-        if not isinstance(channel, discord.TextChannel):
+        elif not isinstance(channel, discord.TextChannel):
             log.warning(f"Channel {channel.name} is not a text channel")  # type: ignore
             return
-        await channel.send(message)
+        else:
+            await channel.send(message)
     if console_log:
         log.info(message)
@@ -0,0 +1,233 @@
+"""
+Cache of the balls owned by each player, as bitsets indexed by ball ID.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from cachetools import TTLCache
+from tortoise import signals
+from tortoise.functions import Count
+
+from ballsdex.core.models import BallInstance
+
+if TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+log = logging.getLogger("ballsdex.core.utils.owned")
+
+
+def ball_mask(ball_ids: Iterable[int]) -> int:
+    """
+    Build a bitset from ball IDs.
+    """
+    mask = 0
+    for ball_id in ball_ids:
+        mask |= 1 << ball_id
+    return mask
+
+
+def mask_ids(mask: int) -> list[int]:
+    """
+    List the ball IDs of a bitset, in ascending order.
+    """
+    ids: list[int] = []
+    while mask:
+        lowest = mask & -mask
+        ids.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return ids
+
+
+class OwnedBalls:
+    """
+    The balls owned by a player.
+
+    Bitsets give the owned balls, overall and for each special, and the number of instances
+    of each (ball, special) pair is kept so removals can be applied without a query.
+    `ball_id in owned` is supported.
+    """
+
+    __slots__ = ("counts", "ball_counts", "mask", "special_masks")
+
+    def __init__(self):
+        self.counts: dict[tuple[int, int | None], int] = {}
+        self.ball_counts: dict[int, int] = {}
+        self.mask = 0
+        self.special_masks: dict[int, int] = {}
+
+    def __contains__(self, ball_id: int) -> bool:
+        return bool(self.mask >> ball_id & 1)
+
+    def add(self, ball_id: int, special_id: int | None, count: int = 1):
+        key = (ball_id, special_id)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.ball_counts[ball_id] = self.ball_counts.get(ball_id, 0) + count
+        self.mask |= 1 << ball_id
+        if special_id is not None:
+            self.special_masks[special_id] = self.special_masks.get(special_id, 0) | 1 << ball_id
+
+    def remove(self, ball_id: int, special_id: int | None, count: int = 1):
+        key = (ball_id, special_id)
+        remaining = self.counts.get(key, 0) - count
+        if remaining > 0:
+            self.counts[key] = remaining
+        else:
+            self.counts.pop(key, None)
+            if special_id is not None and special_id in self.special_masks:
+                self.special_masks[special_id] &= ~(1 << ball_id)
+        remaining = self.ball_counts.get(ball_id, 0) - count
+        if remaining > 0:
+            self.ball_counts[ball_id] = remaining
+        else:
+            self.ball_counts.pop(ball_id, None)
+            self.mask &= ~(1 << ball_id)
+
+    def owned(self, special_id: int | None = None) -> int:
+        """
+        Bitset of the owned balls, only counting the given special if any.
+        """
+        if special_id is None:
+            return self.mask
+        return self.special_masks.get(special_id, 0)
+
+
+class OwnedBallsCache:
+    """
+    Owned balls of the most recently seen players.
+
+    A player's collection is loaded with a single grouped query, then kept up to date with
+    the catches, trades, donations and deletions of this process. Entries expire after `ttl`
+    seconds to catch up with changes made elsewhere, such as the admin panel.
+
+    Instances created or deleted one by one are tracked automatically through model signals.
+    Other changes (owner updates, bulk creations, queryset deletions) must be reported with
+    `add`, `transfer` or `invalidate`. Other caches derived from the inventories can register
+    in `listeners` to be told about these changes.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of players kept, least recently used first out.
+    ttl: float
+        Lifetime of an entry in seconds.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600):
+        self.players: TTLCache[int, OwnedBalls] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._loading: dict[int, asyncio.Future[OwnedBalls]] = {}
+        # players changed while being loaded, the result may miss that change
+        self._stale: set[int] = set()
+        # called with the ID of every changed player, or None when everything is cleared
+        self.listeners: list[Callable[[int | None], None]] = []
+
+    async def _load(self, player_id: int) -> OwnedBalls:
+        owned = OwnedBalls()
+        rows = (
+            await BallInstance.filter(player_id=player_id)
+            .annotate(count=Count("id"))
+            .group_by("ball_id", "special_id")
+            .values_list("ball_id", "special_id", "count")
+        )
+        for ball_id, special_id, count in rows:
+            owned.add(ball_id, special_id, count)
+        return owned
+
+    async def get(self, player_id: int) -> OwnedBalls:
+        """
+        Get the balls owned by a player. The returned object must not be modified.
+
+        Parameters
+        ----------
+        player_id: int
+            Primary key of the player (not the Discord ID).
+        """
+        owned = self.players.get(player_id)
+        if owned is not None:
+            return owned
+        future = self._loading.get(player_id)
+        if future is not None:
+            return await future
+
+        future = asyncio.ensure_future(self._load(player_id))
+        self._loading[player_id] = future
+        self._stale.discard(player_id)
+        try:
+            owned = await future
+        finally:
+            del self._loading[player_id]
+        if player_id in self._stale:
+            self._stale.discard(player_id)
+        else:
+            self.players[player_id] = owned
+        return owned
+
+    def _changed(self, player_id: int) -> OwnedBalls | None:
+        if player_id in self._loading:
+            self._stale.add(player_id)
+        for listener in self.listeners:
+            listener(player_id)
+        return self.players.get(player_id)
+
+    def add(self, player_id: int, ball_id: int, special_id: int | None = None):
+        """
+        Report a new ball instance.
+        """
+        if owned := self._changed(player_id):
+            owned.add(ball_id, special_id)
+
+    def remove(self, player_id: int, ball_id: int, special_id: int | None = None):
+        """
+        Report a deleted ball instance.
+        """
+        if owned := self._changed(player_id):
+            owned.remove(ball_id, special_id)
+
+    def transfer(self, instance: BallInstance, old_player_id: int):
+        """
+        Report that a ball instance changed owner. Call this after setting the new player.
+        """
+        if old_player_id == instance.player_id:
+            return
+        self.remove(old_player_id, instance.ball_id, instance.special_id)
+        self.add(instance.player_id, instance.ball_id, instance.special_id)
+
+    def invalidate(self, player_id: int):
+        """
+        Forget a player, for changes that can't be described incrementally.
+        """
+        self._changed(player_id)
+        self.players.pop(player_id, None)
+
+    def clear(self):
+        self._stale.update(self._loading)
+        self.players.clear()
+        for listener in self.listeners:
+            listener(None)
+
+
+owned_balls = OwnedBallsCache()
+
+
+async def _on_instance_saved(
+    sender: type[BallInstance],
+    instance: BallInstance,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None",
+    update_fields: list[str],
+):
+    if created:
+        owned_balls.add(instance.player_id, instance.ball_id, instance.special_id)
+
+
+async def _on_instance_deleted(
+    sender: type[BallInstance], instance: BallInstance, using_db: "BaseDBAsyncClient | None"
+):
+    owned_balls.remove(instance.player_id, instance.ball_id, instance.special_id)
+
+
+BallInstance.register_listener(signals.Signals.post_save, _on_instance_saved)
+BallInstance.register_listener(signals.Signals.post_delete, _on_instance_deleted)
@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections import OrderedDict
 from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import discord
 from discord.ext.commands import Paginator as CommandPaginator
+from tortoise.expressions import F, Q
 
 from ballsdex.core.utils import menus
 
 if TYPE_CHECKING:
+    from tortoise.expressions import Expression
+    from tortoise.queryset import QuerySet
+
     from ballsdex.core.bot import BallsDexBot
 
 log = logging.getLogger("ballsdex.core.utils.paginator")
@@ -328,6 +334,131 @@ class TextPageSource(menus.ListPageSource):
         return content
 
 
+class QuerysetPageSource(menus.PageSource):
+    """
+    A page source fetching the rows of a queryset from the database when their page is shown,
+    instead of loading all of them first.
+
+    Pages are read with keyset pagination: the page following a known one is made of the rows
+    sorted after its last row, found by the database from the sort keys rather than by
+    skipping the previous rows. Pages reached without reading their neighbour first, like the
+    last page or a typed page number, fall back to an offset. The neighbours of the page shown
+    are fetched in the background, and the last few pages are kept in memory.
+
+    `prepare` must be awaited before creating the menu, since the number of pages is needed to
+    build its buttons.
+
+    Parameters
+    ----------
+    queryset: QuerySet
+        The filtered rows to show, without ordering.
+    keys: list[tuple[Expression | str, bool]]
+        The expressions or field names sorting the rows, each with whether the order is
+        descending. The primary key is added as the last key so that the order is total.
+    per_page: int
+        Number of rows in a page.
+    reverse: bool
+        Reverse the whole order.
+    total: int | None
+        The number of rows if already known, counted by `prepare` otherwise.
+    cache_size: int
+        Number of pages kept in memory.
+    """
+
+    def __init__(
+        self,
+        queryset: "QuerySet",
+        keys: list[tuple["Expression | str", bool]],
+        *,
+        per_page: int = 25,
+        reverse: bool = False,
+        total: int | None = None,
+        cache_size: int = 8,
+    ):
+        self.per_page = per_page
+        self.total = total
+        self.cache_size = cache_size
+        self.queryset = queryset
+
+        annotations: dict[str, Any] = {}
+        self.keys: list[tuple[str, bool]] = []
+        for i, (expression, descending) in enumerate(keys):
+            name = f"sort_key_{i}"
+            annotations[name] = F(expression) if isinstance(expression, str) else expression
+            self.keys.append((name, descending != reverse))
+        self.keys.append(("id", reverse))
+        self.sorted = queryset.annotate(**annotations) if annotations else queryset
+        self.ordering = [f"-{name}" if descending else name for name, descending in self.keys]
+
+        self.pages: OrderedDict[int, list[Any]] = OrderedDict()
+        # sort keys of the last row of each page read
+        self.last_keys: dict[int, tuple[Any, ...]] = {}
+        self.prefetching: dict[int, asyncio.Task[list[Any]]] = {}
+
+    async def prepare(self):
+        if self.total is None:
+            self.total = await self.queryset.count()
+
+    def is_paginating(self) -> bool:
+        return (self.total or 0) > self.per_page
+
+    def get_max_pages(self) -> int:
+        pages, left_over = divmod(self.total or 0, self.per_page)
+        return pages + 1 if left_over else pages
+
+    def _after(self, last: tuple[Any, ...]) -> Q:
+        conditions: list[Q] = []
+        for i, (name, descending) in enumerate(self.keys):
+            equal = {key: value for (key, _), value in zip(self.keys[:i], last)}
+            bound = {f"{name}__{'lt' if descending else 'gt'}": last[i]}
+            conditions.append(Q(**equal, **bound))
+        return Q(*conditions, join_type="OR")
+
+    async def _fetch(self, page_number: int) -> list[Any]:
+        queryset = self.sorted.order_by(*self.ordering).limit(self.per_page)
+        if page_number - 1 in self.last_keys:
+            queryset = queryset.filter(self._after(self.last_keys[page_number - 1]))
+        elif page_number > 0:
+            queryset = queryset.offset(page_number * self.per_page)
+        rows = await queryset
+        if rows:
+            self.last_keys[page_number] = tuple(getattr(rows[-1], name) for name, _ in self.keys)
+        return rows
+
+    def _prefetch(self, page_number: int):
+        if (
+            page_number < 0
+            or page_number >= self.get_max_pages()
+            or page_number in self.pages
+            or page_number in self.prefetching
+        ):
+            return
+        task = asyncio.create_task(self._fetch(page_number))
+        # failures are retried when the page is shown
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self.prefetching[page_number] = task
+
+    async def get_page(self, page_number: int) -> list[Any]:
+        if page_number in self.pages:
+            self.pages.move_to_end(page_number)
+        else:
+            rows = None
+            if task := self.prefetching.pop(page_number, None):
+                try:
+                    rows = await task
+                except Exception:
+                    log.warning(f"Failed to prefetch page {page_number}", exc_info=True)
+            if rows is None:
+                rows = await self._fetch(page_number)
+            self.pages[page_number] = rows
+            while len(self.pages) > self.cache_size:
+                self.pages.popitem(last=False)
+
+        self._prefetch(page_number + 1)
+        self._prefetch(page_number - 1)
+        return self.pages[page_number]
+
+
 class SimplePageSource(menus.ListPageSource):
     async def format_page(self, menu: SimplePages, entries):
         pages = []
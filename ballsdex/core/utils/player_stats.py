@@ -0,0 +1,171 @@
+"""
+Statistics of each player, maintained by database triggers.
+
+The triggers created by the migration ``0015_playerstats_playerballcount`` update the
+``playerstats`` row of a player in the same transaction as every change to its ball instances
+and trades, whichever process makes it. `rebuild_player_stats` recomputes the rows from the
+source tables if they ever drift.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING
+
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from ballsdex.core.models import Player, PlayerStats
+
+if TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+log = logging.getLogger("ballsdex.core.utils.player_stats")
+
+# number of days of catches kept in playerstats.recent_catches
+RECENT_DAYS = 7
+
+INSERT_MISSING = """
+INSERT INTO playerstats (
+    player_id, balls, caught, specials, distinct_balls, trades, recent_day, recent_catches
+)
+SELECT unnest($1::int[]), 0, 0, 0, 0, 0, NULL::date, '{}'::integer[]
+ON CONFLICT (player_id) DO NOTHING
+"""
+# the triggers of concurrent transactions wait for this lock, so their changes are either
+# already visible to the following statements or applied after the rebuild
+LOCK_ROWS = """
+SELECT player_id FROM playerstats WHERE player_id = ANY($1::int[])
+ORDER BY player_id FOR UPDATE
+"""
+DELETE_COUNTS = "DELETE FROM playerballcount WHERE player_id = ANY($1::int[])"
+INSERT_COUNTS = """
+INSERT INTO playerballcount (player_id, ball_id, count)
+SELECT player_id, ball_id, count(*)
+FROM ballinstance
+WHERE player_id = ANY($1::int[]) AND NOT deleted
+GROUP BY 1, 2
+"""
+UPDATE_STATS = f"""
+UPDATE playerstats AS s SET
+    (balls, caught, specials, distinct_balls) = (
+        SELECT
+            count(*),
+            count(*) FILTER (WHERE trade_player_id IS NULL),
+            count(*) FILTER (WHERE special_id IS NOT NULL),
+            count(DISTINCT ball_id)
+        FROM ballinstance
+        WHERE player_id = s.player_id AND NOT deleted
+    ),
+    trades = (
+        SELECT count(*) FROM trade WHERE s.player_id IN (trade.player1_id, trade.player2_id)
+    ),
+    recent_day = $2,
+    recent_catches = ARRAY(
+        SELECT count(recent.id)::integer
+        FROM generate_series(0, {RECENT_DAYS - 1}) AS n
+        LEFT JOIN ballinstance AS recent
+        ON recent.player_id = s.player_id
+            AND recent.trade_player_id IS NULL
+            AND (recent.catch_date AT TIME ZONE 'UTC')::date = $2::date - n
+        GROUP BY n
+        ORDER BY n
+    )
+WHERE s.player_id = ANY($1::int[])
+"""
+TRADE_PARTNERS = """
+SELECT count(DISTINCT CASE WHEN player1_id = $1 THEN player2_id ELSE player1_id END) AS partners
+FROM trade
+WHERE (player1_id = $1 OR player2_id = $1) AND player1_id <> player2_id
+"""
+
+
+async def player_stats(player: Player) -> PlayerStats:
+    """
+    Get the statistics of a player, with a single indexed read.
+
+    Players without a row yet (nothing owned or traded) get an unsaved row of zeros.
+    """
+    stats = await PlayerStats.get_or_none(player_id=player.pk)
+    return stats or PlayerStats(player_id=player.pk)
+
+
+def recent_catches(stats: PlayerStats, days: int = RECENT_DAYS) -> int:
+    """
+    Count the catches of a player over the last UTC days, today included.
+
+    Parameters
+    ----------
+    stats: PlayerStats
+        Statistics of the player.
+    days: int
+        Number of days, at most `RECENT_DAYS`.
+    """
+    if stats.recent_day is None:
+        return 0
+    today = datetime.now(timezone.utc).date()
+    # recent_catches[i] are the catches of recent_day - i
+    offset = (today - stats.recent_day).days
+    return sum(x or 0 for x in stats.recent_catches[: max(days - offset, 0)])
+
+
+async def trade_partners(player: Player) -> int:
+    """
+    Count the distinct players that traded with a player.
+    """
+    _, rows = await Tortoise.get_connection("default").execute_query(TRADE_PARTNERS, [player.pk])
+    return rows[0]["partners"]
+
+
+async def _rebuild(connection: "BaseDBAsyncClient", player_ids: list[int], today: date):
+    await connection.execute_query(INSERT_MISSING, [player_ids])
+    await connection.execute_query(LOCK_ROWS, [player_ids])
+    await connection.execute_query(DELETE_COUNTS, [player_ids])
+    await connection.execute_query(INSERT_COUNTS, [player_ids])
+    await connection.execute_query(UPDATE_STATS, [player_ids, today])
+
+
+async def rebuild_player_stats(player_ids: list[int] | None = None, batch_size: int = 500) -> int:
+    """
+    Recompute the statistics of players from their ball instances and trades.
+
+    Each batch of players is rebuilt in its own transaction, locking only their rows. The daily
+    catches can only be rebuilt from the instances the players still own.
+
+    Parameters
+    ----------
+    player_ids: list[int] | None
+        Primary keys of the players to rebuild, or `None` for every player.
+    batch_size: int
+        Number of players rebuilt per transaction.
+
+    Returns
+    -------
+    int
+        The number of players rebuilt.
+    """
+    today = datetime.now(timezone.utc).date()
+    if player_ids is not None:
+        for i in range(0, len(player_ids), batch_size):
+            async with in_transaction() as connection:
+                await _rebuild(connection, player_ids[i : i + batch_size], today)
+        return len(player_ids)
+
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            await Player.filter(id__gt=last_id)
+            .order_by("id")
+            .limit(batch_size)
+            .values_list("id", flat=True)
+        )
+        if not batch:
+            break
+        async with in_transaction() as connection:
+            await _rebuild(connection, batch, today)
+        total += len(batch)
+        last_id = batch[-1]
+        log.debug(f"Rebuilt the statistics of {total} players")
+    return total
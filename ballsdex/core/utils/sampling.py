@@ -0,0 +1,236 @@
+"""
+Precomputed weighted random sampling for spawns and specials.
+
+A benchmark comparing these samplers with a per-call `random.choices` is available with
+`python3 -m ballsdex.core.utils.sampling`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import random
+import time
+from typing import TYPE_CHECKING, Generic, Iterable, Sequence, TypeVar
+
+if TYPE_CHECKING:
+    from ballsdex.core.models import Ball, Special
+
+T = TypeVar("T")
+
+
+class AliasSampler(Generic[T]):
+    """
+    Weighted random choice in constant time using Vose's alias method.
+
+    Building the tables is O(n), then each sample costs two random numbers and no allocation.
+    Items with a weight of 0 or less can never be picked.
+
+    Parameters
+    ----------
+    items: Sequence[T]
+        The population.
+    weights: Sequence[float]
+        Relative weight of each item, same length as `items`.
+    """
+
+    __slots__ = ("items", "_prob", "_alias", "_n")
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError("The number of weights does not match the population")
+        pairs = [(item, weight) for item, weight in zip(items, weights) if weight > 0]
+        self.items: list[T] = [x[0] for x in pairs]
+        self._n = n = len(pairs)
+        self._prob: list[float] = [1.0] * n
+        self._alias: list[int] = list(range(n))
+        if not n:
+            return
+
+        total = sum(x[1] for x in pairs)
+        scaled = [x[1] * n / total for x in pairs]
+        small = [i for i, x in enumerate(scaled) if x < 1]
+        large = [i for i, x in enumerate(scaled) if x >= 1]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = g
+            scaled[g] = (scaled[g] + scaled[s]) - 1
+            (small if scaled[g] < 1 else large).append(g)
+        # leftovers are 1 within floating point error
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __bool__(self) -> bool:
+        return self._n > 0
+
+    def sample(self, rng: random.Random | None = None) -> T:
+        """
+        Pick a random item according to the weights.
+
+        Raises
+        ------
+        IndexError
+            The sampler is empty.
+        """
+        if not self._n:
+            raise IndexError("Cannot sample from an empty population")
+        rand = (rng or random).random
+        i = int(rand() * self._n)
+        if rand() < self._prob[i]:
+            return self.items[i]
+        return self.items[self._alias[i]]
+
+
+def ball_sampler(balls: Iterable[Ball]) -> AliasSampler[Ball]:
+    """
+    Sampler of the spawnable balls, weighted by rarity.
+    """
+    enabled = [x for x in balls if x.enabled]
+    return AliasSampler(enabled, [x.rarity for x in enabled])
+
+
+class SpecialSchedule:
+    """
+    Random special events for newly caught balls, taking their start and end dates into
+    account.
+
+    The timeline is cut at every start and end date. For each resulting window, the active
+    specials are known ahead of time and get their own sampler, with `None` standing for the
+    remaining chance of having no special. Sampling only needs to check that the current window
+    is still valid.
+
+    Parameters
+    ----------
+    specials: Iterable[Special]
+        All special events.
+    """
+
+    def __init__(self, specials: Iterable[Special]):
+        specials = list(specials)
+        bounds: set[float] = set()
+        for special in specials:
+            if special.start_date:
+                bounds.add(special.start_date.timestamp())
+            if special.end_date:
+                bounds.add(special.end_date.timestamp())
+
+        # window i goes from self.bounds[i - 1] (included) to self.bounds[i] (excluded)
+        self.bounds: list[float] = sorted(bounds)
+        self.windows: list[AliasSampler[Special | None]] = []
+        edges = [float("-inf"), *self.bounds, float("inf")]
+        for start, end in zip(edges, edges[1:]):
+            active = [
+                x
+                for x in specials
+                if (x.start_date is None or x.start_date.timestamp() <= start)
+                and (x.end_date is None or end <= x.end_date.timestamp())
+            ]
+            common_weight = max(1 - sum(x.rarity for x in active), 0)
+            self.windows.append(
+                AliasSampler([*active, None], [*(x.rarity for x in active), common_weight])
+            )
+
+        self._current: AliasSampler[Special | None] = self.windows[0]
+        self._valid_from = float("inf")
+        self._valid_until = float("-inf")
+
+    def _window(self, now: float) -> AliasSampler[Special | None]:
+        if self._valid_from <= now < self._valid_until:
+            return self._current
+        i = bisect.bisect_right(self.bounds, now)
+        self._current = self.windows[i]
+        self._valid_from = self.bounds[i - 1] if i > 0 else float("-inf")
+        self._valid_until = self.bounds[i] if i < len(self.bounds) else float("inf")
+        return self._current
+
+    def active(self, now: float | None = None) -> list[Special]:
+        """
+        List the specials that can be obtained at the given timestamp (now by default).
+        """
+        window = self._window(time.time() if now is None else now)
+        return [x for x in window.items if x is not None]
+
+    def sample(self, now: float | None = None, rng: random.Random | None = None) -> Special | None:
+        """
+        Pick a random special event, or `None` for a common ball.
+
+        Parameters
+        ----------
+        now: float | None
+            Timestamp at which the special is obtained, now by default.
+        rng: random.Random | None
+            Random generator to use instead of the global one.
+        """
+        window = self._window(time.time() if now is None else now)
+        if not window:
+            return None
+        return window.sample(rng)
+
+
+def benchmark(catalog_size: int = 10_000, special_count: int = 50, samples: int = 100_000):
+    """
+    Compare the samplers with the previous implementation, rebuilding the population with
+    `random.choices` on every call.
+    """
+    from datetime import datetime, timedelta, timezone
+    from types import SimpleNamespace
+
+    rng = random.Random(0)
+    now = datetime.now(tz=timezone.utc)
+    catalog = [
+        SimpleNamespace(enabled=rng.random() > 0.05, rarity=rng.uniform(0, 5))
+        for _ in range(catalog_size)
+    ]
+    events = [
+        SimpleNamespace(
+            rarity=rng.uniform(0, 0.01),
+            start_date=now - timedelta(days=rng.randint(0, 30)) if rng.random() > 0.3 else None,
+            end_date=now + timedelta(days=rng.randint(-10, 30)) if rng.random() > 0.3 else None,
+        )
+        for _ in range(special_count)
+    ]
+    lowest = datetime.min.replace(tzinfo=timezone.utc)
+    highest = datetime.max.replace(tzinfo=timezone.utc)
+
+    def old_ball():
+        countryballs = list(filter(lambda m: m.enabled, catalog))
+        rarities = [x.rarity for x in countryballs]
+        return random.choices(population=countryballs, weights=rarities, k=1)[0]
+
+    def old_special():
+        current = datetime.now(tz=timezone.utc)
+        population = [
+            x for x in events if (x.start_date or lowest) <= current <= (x.end_date or highest)
+        ]
+        if not population:
+            return None
+        common_weight = max(1 - sum(x.rarity for x in population), 0)
+        weights = [x.rarity for x in population] + [common_weight]
+        return random.choices(population=population + [None], weights=weights, k=1)[0]
+
+    def run(name: str, func, count: int):
+        t1 = time.perf_counter()
+        for _ in range(count):
+            func()
+        elapsed = time.perf_counter() - t1
+        print(f"{name:<28} {elapsed / count * 1e6:>12.2f} µs/sample")
+
+    t1 = time.perf_counter()
+    sampler = ball_sampler(catalog)  # type: ignore
+    schedule = SpecialSchedule(events)  # type: ignore
+    build = time.perf_counter() - t1
+    print(f"{catalog_size} balls, {special_count} specials, built in {build * 1e3:.2f} ms")
+
+    # the old sampler is very slow, fewer iterations are enough
+    run("balls: random.choices", old_ball, max(samples // 100, 1))
+    run("balls: alias sampler", sampler.sample, samples)
+    run("specials: random.choices", old_special, samples)
+    run("specials: schedule", schedule.sample, samples)
+
+
+if __name__ == "__main__":
+    benchmark()
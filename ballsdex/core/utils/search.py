@@ -0,0 +1,158 @@
+"""
+In-memory search index for the autocompletion of catalog items.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+from dataclasses import dataclass
+from typing import Generic, Hashable, Iterable, TypeVar
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+# substrings up to this length are indexed directly, longer queries intersect them
+GRAM_SIZE = 3
+
+
+def grams(text: str) -> set[str]:
+    """
+    All the substrings of `text` of length 1 to `GRAM_SIZE`.
+    """
+    return {
+        text[i : i + size] for size in range(1, GRAM_SIZE + 1) for i in range(len(text) - size + 1)
+    }
+
+
+@dataclass(slots=True)
+class _Entry(Generic[T]):
+    item: T
+    names: tuple[str, ...]
+    weight: float
+    # sort key of the display name, for stable ordering between equal matches
+    order: str
+
+
+class SearchIndex(Generic[K, T]):
+    """
+    Index of items searchable by name and aliases, updated one item at a time.
+
+    Every substring of up to three characters of the names is mapped to the items containing
+    it. Short queries are a single lookup, longer ones intersect the sets of their trigrams,
+    then the remaining candidates are checked.
+
+    Results are ranked by how the query matches one of the names: exactly, at the start, then
+    anywhere. Ties are broken by decreasing weight, then by display name.
+    """
+
+    def __init__(self):
+        self.entries: dict[K, _Entry[T]] = {}
+        self.grams: dict[str, set[K]] = {}
+        # (display name, key), sorted, used when there is no query
+        self.sorted: list[tuple[str, K]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def set(self, key: K, name: str, aliases: Iterable[str] = (), weight: float = 0, item=None):
+        """
+        Add an item, or update it if the key already exists.
+
+        Parameters
+        ----------
+        key: K
+            Unique identifier of the item.
+        name: str
+            The displayed name.
+        aliases: Iterable[str]
+            Other names matching the item.
+        weight: float
+            Items with a higher weight come first among equal matches.
+        item: T
+            The object returned by searches, the key itself by default.
+        """
+        names = tuple(dict.fromkeys(x.strip().lower() for x in (name, *aliases) if x.strip()))
+        entry = self.entries.get(key)
+        if (
+            entry is not None
+            and entry.names == names
+            and entry.weight == weight
+            and entry.order == name.lower()
+        ):
+            entry.item = key if item is None else item
+            return
+        if entry is not None:
+            self.remove(key)
+
+        self.entries[key] = _Entry(key if item is None else item, names, weight, name.lower())
+        for gram in set().union(*(grams(x) for x in names)):
+            self.grams.setdefault(gram, set()).add(key)
+        bisect.insort(self.sorted, (name.lower(), key))
+
+    def remove(self, key: K):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in set().union(*(grams(x) for x in entry.names)):
+            keys = self.grams[gram]
+            keys.discard(key)
+            if not keys:
+                del self.grams[gram]
+        i = bisect.bisect_left(self.sorted, (entry.order, key))
+        del self.sorted[i]
+
+    def update(self, items: dict[K, tuple[str, Iterable[str], float, T]]):
+        """
+        Make the index contain exactly the given items, only touching the ones that changed.
+
+        Parameters
+        ----------
+        items: dict[K, tuple[str, Iterable[str], float, T]]
+            Name, aliases, weight and object of each item.
+        """
+        for key in [x for x in self.entries if x not in items]:
+            self.remove(key)
+        for key, (name, aliases, weight, item) in items.items():
+            self.set(key, name, aliases, weight, item)
+
+    def _candidates(self, query: str) -> set[K]:
+        if len(query) <= GRAM_SIZE:
+            return self.grams.get(query, set())
+        sets = sorted(
+            (
+                self.grams.get(query[i : i + GRAM_SIZE], set())
+                for i in range(len(query) - GRAM_SIZE + 1)
+            ),
+            key=len,
+        )
+        candidates = set(sets[0])
+        for keys in sets[1:]:
+            candidates &= keys
+            if not candidates:
+                break
+        return {x for x in candidates if any(query in name for name in self.entries[x].names)}
+
+    def search(self, query: str, limit: int = 25) -> list[T]:
+        """
+        Find the best matching items.
+        """
+        query = query.strip().lower()
+        if not query:
+            return [self.entries[key].item for _, key in self.sorted[:limit]]
+
+        def rank(key: K) -> tuple[int, float, str]:
+            entry = self.entries[key]
+            if query in entry.names:
+                tier = 0
+            elif any(x.startswith(query) for x in entry.names):
+                tier = 1
+            else:
+                tier = 2
+            return (tier, -entry.weight, entry.order)
+
+        best = heapq.nsmallest(limit, self._candidates(query), key=rank)
+        return [self.entries[key].item for key in best]
@@ -2,8 +2,10 @@ import enum
 from typing import TYPE_CHECKING
 
 from tortoise.expressions import F, RawSQL
+from tortoise.functions import Coalesce, Count
 
 if TYPE_CHECKING:
+    from tortoise.expressions import Expression
     from tortoise.queryset import QuerySet
 
     from ballsdex.core.models import BallInstance
@@ -79,6 +81,49 @@ def sort_balls(
         return queryset.order_by(sort.value)
 
 
+async def sort_keys(
+    sort: SortingChoices | None, queryset: "QuerySet[BallInstance]"
+) -> list[tuple["Expression | str", bool]]:
+    """
+    Obtain the keys ordering ball instances like `sort_balls`, in the format expected by
+    `QuerysetPageSource`. Without a sorting method, favorites come first.
+
+    Parameters
+    ----------
+    sort: SortingChoices | None
+        One of the supported sorting methods
+    queryset: QuerySet[BallInstance]
+        The filtered queryset that will be paginated. Only used for the ``duplicates`` sorting,
+        which needs to count the instances of each ball first.
+
+    Returns
+    -------
+    list[tuple[Expression | str, bool]]
+        The sorting expressions or field names, each with whether the order is descending.
+    """
+    if sort is None:
+        return [("favorite", True)]
+    elif sort == SortingChoices.duplicates:
+        counts = await (
+            queryset.annotate(count=Count("id"))
+            .group_by("ball_id")
+            .values_list("ball_id", "count")
+        )
+        ranking = ",".join(str(x) for x, _ in sorted(counts, key=lambda x: (-x[1], x[0])))
+        return [(RawSQL(f"array_position(ARRAY[{ranking}]::int[], ball_id)"), False)]
+    elif sort == SortingChoices.stats_bonus:
+        return [(F("health_bonus") + F("attack_bonus"), True)]
+    elif sort == SortingChoices.health or sort == SortingChoices.attack:
+        return [(F(f"{sort.value}_bonus") + F(f"ball__{sort.value}"), True)]
+    elif sort == SortingChoices.special:
+        # instances without special come last, like NULL values in ascending order
+        return [(Coalesce("special_id", 2**31 - 1), False)]
+    elif sort == SortingChoices.rarity:
+        return [(sort.value, False), ("ball__country", False)]
+    else:
+        return [(sort.value.lstrip("-"), sort.value.startswith("-"))]
+
+
 def filter_balls(
     filter: FilteringChoices, queryset: "QuerySet[BallInstance]", guild_id: int | None = None
 ) -> "QuerySet[BallInstance]":
@@ -3,12 +3,12 @@ import time
 from datetime import timedelta
 from enum import Enum
 from typing import TYPE_CHECKING, Generic, Iterable, Optional, TypeVar
+from weakref import WeakSet
 
 import discord
 from discord import app_commands
 from discord.interactions import Interaction
 from tortoise.exceptions import DoesNotExist
-from tortoise.expressions import Q, RawSQL
 from tortoise.models import Model
 from tortoise.timezone import now as tortoise_now
 
@@ -22,6 +22,8 @@ from ballsdex.core.models import (
     economies,
     regimes,
 )
+from ballsdex.core.utils.inventory import inventory_index
+from ballsdex.core.utils.search import SearchIndex
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -165,45 +167,51 @@ class BallInstanceTransformer(ModelTransformer[BallInstance]):
     async def get_options(
         self, interaction: Interaction["BallsDexBot"], value: str
     ) -> list[app_commands.Choice[int]]:
-        balls_queryset = BallInstance.filter(player__discord_id=interaction.user.id)
+        inventory = await inventory_index.get(interaction.user.id)
+        if not inventory:
+            return []
 
+        special_id: int | None = None
         if (special := getattr(interaction.namespace, "special", None)) and special.isdigit():
-            balls_queryset = balls_queryset.filter(special_id=int(special))
-
-        if interaction.command and (trade_type := interaction.command.extras.get("trade", None)):
-            if trade_type == TradeCommandType.PICK:
-                balls_queryset = balls_queryset.filter(
-                    Q(
-                        Q(locked__isnull=True)
-                        | Q(locked__lt=tortoise_now() - timedelta(minutes=30))
-                    )
-                )
-            else:
-                balls_queryset = balls_queryset.filter(
-                    locked__isnull=False, locked__gt=tortoise_now() - timedelta(minutes=30)
-                )
+            special_id = int(special)
+        rows = inventory.search(value, special_id)
+
+        locked_since = tortoise_now() - timedelta(minutes=30)
+        trade_type = interaction.command and interaction.command.extras.get("trade", None)
+        if trade_type is not None and trade_type != TradeCommandType.PICK:
+            # few balls are locked, this uses the partial index on locked balls
+            locked = set(
+                await BallInstance.filter(
+                    player_id=inventory.player_id, locked__gt=locked_since
+                ).values_list("id", flat=True)
+            )
+            rows = [i for i in rows if inventory.ids[i] in locked]
 
-        if value.startswith("="):
-            ball_name = value[1:]
-            balls_queryset = balls_queryset.filter(ball__country__iexact=ball_name)
-        else:
-            balls_queryset = (
-                balls_queryset.select_related("ball")
-                .annotate(
-                    searchable=RawSQL(
-                        "to_hex(ballinstance.id) || ' ' || ballinstance__ball.country || ' ' || "
-                        "COALESCE(ballinstance__ball.catch_names, '') || ' ' || "
-                        "COALESCE(ballinstance__ball.translations, '')"
+        # the index doesn't track locks and favorites, they're fetched for the candidates,
+        # which also drops the balls that were given away or deleted in the meantime
+        choices: list[app_commands.Choice] = []
+        for start in range(0, len(rows), 50):
+            candidates = {inventory.ids[i]: i for i in rows[start : start + 50]}
+            current = {
+                pk: (favorite, locked)
+                for pk, favorite, locked in await BallInstance.filter(
+                    id__in=list(candidates), player_id=inventory.player_id
+                ).values_list("id", "favorite", "locked")
+            }
+            for pk, i in candidates.items():
+                if pk not in current:
+                    continue
+                favorite, locked = current[pk]
+                if trade_type == TradeCommandType.PICK and locked and locked > locked_since:
+                    continue
+                instance = inventory.instance(i, favorite)
+                choices.append(
+                    app_commands.Choice(
+                        name=instance.description(bot=interaction.client), value=f"{pk:X}"
                     )
                 )
-                .filter(searchable__icontains=value.replace(".", ""))
-            )
-        balls_queryset = balls_queryset.limit(25)
-
-        choices: list[app_commands.Choice] = [
-            app_commands.Choice(name=x.description(bot=interaction.client), value=f"{x.pk:X}")
-            for x in await balls_queryset
-        ]
+                if len(choices) == 25:
+                    return choices
         return choices
 
 
@@ -214,6 +222,9 @@ class TTLModelTransformer(ModelTransformer[T]):
     This is used in most cases except for BallInstance which requires special handling depending
     on the interaction passed.
 
+    Items are searched with a `SearchIndex` of their key and `aliases`, ranked by match quality
+    then `weight`. When refreshed, only the items that changed are updated in the index.
+
     Attributes
     ----------
     ttl: float
@@ -221,13 +232,35 @@ class TTLModelTransformer(ModelTransformer[T]):
     """
 
     ttl: float = 300
+    instances: "WeakSet[TTLModelTransformer]" = WeakSet()
 
     def __init__(self):
         self.items: dict[int, T] = {}
-        self.search_map: dict[T, str] = {}
+        self.index: SearchIndex[int, T] = SearchIndex()
         self.last_refresh: float = 0
+        self.instances.add(self)
         log.debug(f"Inited transformer for {self.name}")
 
+    @classmethod
+    def expire_all(cls):
+        """
+        Refresh all transformers on their next use, after the catalog cache was reloaded.
+        """
+        for transformer in cls.instances:
+            transformer.last_refresh = 0
+
+    def aliases(self, model: T) -> Iterable[str]:
+        """
+        Other names matching the item when searching.
+        """
+        return ()
+
+    def weight(self, model: T) -> float:
+        """
+        Items with a higher weight are suggested first among equal matches.
+        """
+        return 0
+
     async def load_items(self) -> Iterable[T]:
         """
         Query values to fill `items` with.
@@ -239,22 +272,21 @@ class TTLModelTransformer(ModelTransformer[T]):
         if t - self.last_refresh > self.ttl:
             self.items = {x.pk: x for x in await self.load_items()}
             self.last_refresh = t
-            self.search_map = {x: self.key(x).lower() for x in self.items.values()}
+            self.index.update(
+                {
+                    pk: (self.key(x), self.aliases(x), self.weight(x), x)
+                    for pk, x in self.items.items()
+                }
+            )
 
     async def get_options(
         self, interaction: Interaction["BallsDexBot"], value: str
     ) -> list[app_commands.Choice[str]]:
         await self.maybe_refresh()
-
-        i = 0
-        choices: list[app_commands.Choice] = []
-        for item in self.items.values():
-            if value.lower() in self.search_map[item]:
-                choices.append(app_commands.Choice(name=self.key(item), value=str(item.pk)))
-                i += 1
-                if i == 25:
-                    break
-        return choices
+        return [
+            app_commands.Choice(name=self.key(item), value=str(item.pk))
+            for item in self.index.search(value, 25)
+        ]
 
 
 class BallTransformer(TTLModelTransformer[Ball]):
@@ -264,6 +296,12 @@ class BallTransformer(TTLModelTransformer[Ball]):
     def key(self, model: Ball) -> str:
         return model.country
 
+    def aliases(self, model: Ball) -> Iterable[str]:
+        return f"{model.catch_names or ''};{model.translations or ''}".split(";")
+
+    def weight(self, model: Ball) -> float:
+        return model.rarity
+
     async def load_items(self) -> Iterable[Ball]:
         return balls.values()
 
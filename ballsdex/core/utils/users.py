@@ -0,0 +1,195 @@
+"""
+Resolution of Discord users from their IDs, cached and batched to avoid the REST rate limits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Coroutine, Iterable
+
+import discord
+from cachetools import TTLCache
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.core.utils.users")
+
+# how long callers wait for a lookup before displaying the ID instead
+TIMEOUT = 2
+# delay to gather the members of the same guild into a single gateway request
+BATCH_DELAY = 0.05
+# maximum number of user IDs in a gateway member request
+CHUNK_SIZE = 100
+
+User = discord.User | discord.Member
+
+
+class UserResolver:
+    """
+    Discord users looked up by ID, for displaying their names and avatars.
+
+    Users are taken from the client's cache, then from the previous lookups, kept in a LRU cache
+    for `ttl` seconds. A missing user is requested once however many callers wait for it:
+    members of a guild are batched into gateway member requests, which are not rate limited
+    like the REST API, and the others are fetched with the REST API.
+
+    Callers only wait up to a timeout, the lookups continue in the background and fill the cache
+    for the next calls.
+
+    Parameters
+    ----------
+    bot: BallsDexBot
+        The bot making the requests.
+    maxsize: int
+        Maximum number of users kept, least recently used first out.
+    ttl: float
+        Lifetime of an entry in seconds, after which names and avatars are requested again.
+    """
+
+    def __init__(self, bot: "BallsDexBot", maxsize: int = 10000, ttl: float = 3600):
+        self.bot = bot
+        self.users: TTLCache[int, User] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._pending: dict[int, asyncio.Future[User | None]] = {}
+        # user IDs waiting for the next member request of each guild
+        self._batches: dict[int, list[int]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def get(self, user_id: int) -> User | None:
+        """
+        Get a user if already known, without any request.
+        """
+        return self.bot.get_user(user_id) or self.users.get(user_id)
+
+    def placeholder(self, user_id: int) -> discord.User:
+        """
+        Build a user named after its ID, for users that could not be resolved.
+        """
+        data = {"id": user_id, "username": str(user_id), "discriminator": "0", "avatar": None}
+        return discord.User(state=self.bot._connection, data=data)  # type: ignore
+
+    def _spawn(self, coro: Coroutine):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _set(self, user_id: int, user: User | None):
+        future = self._pending.pop(user_id, None)
+        if user is not None:
+            self.users[user_id] = user
+        if future is not None and not future.done():
+            future.set_result(user)
+
+    def _lookup(self, user_id: int, guild: discord.Guild | None) -> asyncio.Future[User | None]:
+        future = self._pending.get(user_id)
+        if future is not None:
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._pending[user_id] = future
+        if guild is None:
+            self._spawn(self._fetch_users([user_id]))
+            return future
+        batch = self._batches.get(guild.id)
+        if batch is None:
+            batch = self._batches[guild.id] = []
+            self._spawn(self._query_members(guild))
+        batch.append(user_id)
+        return future
+
+    async def _query_members(self, guild: discord.Guild):
+        await asyncio.sleep(BATCH_DELAY)
+        user_ids = self._batches.pop(guild.id)
+        missing: list[int] = []
+        for i in range(0, len(user_ids), CHUNK_SIZE):
+            chunk = user_ids[i : i + CHUNK_SIZE]
+            try:
+                members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)
+            except Exception as e:
+                # the REST API is still there to fall back to
+                log.debug(f"Failed to request members of guild {guild.id}: {e!r}")
+                members = []
+            found = {member.id: member for member in members}
+            for user_id in chunk:
+                if member := found.get(user_id):
+                    self._set(user_id, member)
+                else:
+                    missing.append(user_id)
+        # users that are not members of this guild
+        if missing:
+            await self._fetch_users(missing)
+
+    async def _fetch_user(self, user_id: int):
+        user: User | None = None
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            log.debug(f"Failed to fetch user {user_id}: {e!r}")
+        finally:
+            self._set(user_id, user)
+
+    async def _fetch_users(self, user_ids: list[int]):
+        await asyncio.gather(*(self._fetch_user(x) for x in user_ids))
+
+    def prefetch(self, user_ids: Iterable[int], guild: discord.Guild | None = None):
+        """
+        Start resolving users that will be displayed soon, without waiting for them.
+        """
+        for user_id in user_ids:
+            if self.get(user_id) is None:
+                self._lookup(user_id, guild)
+
+    async def resolve_many(
+        self,
+        user_ids: Iterable[int],
+        guild: discord.Guild | None = None,
+        *,
+        timeout: float = TIMEOUT,
+    ) -> dict[int, User | None]:
+        """
+        Resolve several users at once.
+
+        Parameters
+        ----------
+        user_ids: Iterable[int]
+            IDs of the users.
+        guild: discord.Guild | None
+            The guild where the users are displayed, looked up as members of this guild first.
+        timeout: float
+            Maximum number of seconds to wait for the lookups.
+
+        Returns
+        -------
+        dict[int, discord.User | discord.Member | None]
+            The users for each ID, `None` if not found or not resolved before the timeout.
+        """
+        users: dict[int, User | None] = {}
+        waiting: dict[int, asyncio.Future[User | None]] = {}
+        for user_id in user_ids:
+            users[user_id] = self.get(user_id)
+            if users[user_id] is None:
+                waiting[user_id] = self._lookup(user_id, guild)
+        if waiting:
+            await asyncio.wait(waiting.values(), timeout=timeout)
+        for user_id, future in waiting.items():
+            users[user_id] = future.result() if future.done() else None
+        return users
+
+    async def resolve(
+        self, user_id: int, guild: discord.Guild | None = None, *, timeout: float = TIMEOUT
+    ) -> User | None:
+        """
+        Resolve a single user. See `resolve_many` for the parameters.
+        """
+        users = await self.resolve_many([user_id], guild, timeout=timeout)
+        return users[user_id]
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
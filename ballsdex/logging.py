@@ -7,7 +7,9 @@ from discord.utils import _ColourFormatter
 log = logging.getLogger("ballsdex")
 
 
-def init_logger(disable_rich: bool = False, debug: bool = False) -> logging.handlers.QueueListener:
+def init_logger(
+    disable_rich: bool = False, debug: bool = False, filename: str = "ballsdex.log"
+) -> logging.handlers.QueueListener:
     formatter = logging.Formatter(
         "[{asctime}] {levelname} {name}: {message}", datefmt="%Y-%m-%d %H:%M:%S", style="{"
     )
@@ -19,9 +21,7 @@ def init_logger(disable_rich: bool = False, debug: bool = False) -> logging.hand
     stream_handler.setFormatter(formatter if disable_rich else rich_formatter)
 
     # file handler
-    file_handler = logging.handlers.RotatingFileHandler(
-        "ballsdex.log", maxBytes=8**7, backupCount=8
-    )
+    file_handler = logging.handlers.RotatingFileHandler(filename, maxBytes=8**7, backupCount=8)
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
 
@@ -16,6 +16,7 @@ from ballsdex.core.bot import BallsDexBot
 from ballsdex.core.models import Ball, BallInstance, Player, Special, Trade, TradeObject
 from ballsdex.core.utils.buttons import ConfirmChoiceView
 from ballsdex.core.utils.logging import log_action
+from ballsdex.core.utils.owned import owned_balls
 from ballsdex.core.utils.transformers import (
     BallTransform,
     EconomyTransform,
@@ -61,8 +62,10 @@ class GDropView(ui.View):
 
 
         player, _ = await Player.get_or_create(discord_id=interaction.user.id)
+        old_player_id = self.ball_instance.player_id
         self.ball_instance.player = player
         await self.ball_instance.save()
+        owned_balls.transfer(self.ball_instance, old_player_id)
 
         self.claimed = True
 
@@ -755,6 +758,7 @@ class Balls(app_commands.Group):
         player, _ = await Player.get_or_create(discord_id=user.id)
         ball.player = player
         await ball.save()
+        owned_balls.transfer(ball, original_player.pk)
 
         trade = await Trade.create(player1=original_player, player2=player)
         await TradeObject.create(trade=trade, ballinstance=ball, player=original_player)
@@ -851,6 +855,7 @@ class Balls(app_commands.Group):
             count = len(to_delete)
         else:
             count = await BallInstance.filter(player=player).delete()
+            owned_balls.invalidate(player.pk)
         await interaction.followup.send(
             f"{count} {settings.plural_collectible_name} from {user} have been deleted.",
             ephemeral=True,
@@ -6,8 +6,10 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ui import Button
 
-from ballsdex.core.models import Ball, GuildConfig
+from ballsdex.core.models import Ball, GuildConfig, Player
+from ballsdex.core.utils.logging import log_action
 from ballsdex.core.utils.paginator import FieldPageSource, Pages, TextPageSource
+from ballsdex.core.utils.player_stats import rebuild_player_stats
 from ballsdex.settings import settings
 
 from .balls import Balls as BallsGroup
@@ -258,3 +260,35 @@ class Admin(commands.GroupCog):
             )
         )
         await pages.start(ephemeral=True)
+
+    @app_commands.command()
+    @app_commands.checks.has_any_role(*settings.root_role_ids)
+    async def rebuildstats(
+        self, interaction: discord.Interaction["BallsDexBot"], user: discord.User | None = None
+    ):
+        """
+        Recompute the player statistics from their inventories and trades.
+
+        Parameters
+        ----------
+        user: discord.User | None
+            The player to repair. If not given, every player is rebuilt.
+        """
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        if user:
+            player = await Player.get_or_none(discord_id=user.id)
+            if not player:
+                await interaction.followup.send(
+                    "The given user doesn't have any data.", ephemeral=True
+                )
+                return
+            count = await rebuild_player_stats([player.pk])
+        else:
+            count = await rebuild_player_stats()
+        await interaction.followup.send(
+            f"Rebuilt the statistics of {count:,} players.", ephemeral=True
+        )
+        await log_action(
+            f"{interaction.user} rebuilt the statistics of {user or 'every player'}.",
+            self.bot,
+        )
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 
 import discord
@@ -219,11 +220,9 @@ class History(app_commands.Group):
             timestamp=trade.date,
         )
         embed.set_footer(text="Trade date: ")
-        fill_trade_embed_fields(
-            embed,
-            interaction.client,
-            await TradingUser.from_trade_model(trade, trade.player1, interaction.client, True),
-            await TradingUser.from_trade_model(trade, trade.player2, interaction.client, True),
-            is_admin=True,
+        trader1, trader2 = await asyncio.gather(
+            TradingUser.from_trade_model(trade, trade.player1, interaction.client, True),
+            TradingUser.from_trade_model(trade, trade.player2, interaction.client, True),
         )
+        fill_trade_embed_fields(embed, interaction.client, trader1, trader2, is_admin=True)
         await interaction.response.send_message(embed=embed, ephemeral=True)
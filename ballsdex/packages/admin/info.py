@@ -13,6 +13,7 @@ from ballsdex.core.utils.enums import (
     PRIVATE_POLICY_MAP,
 )
 from ballsdex.core.utils.enums import TRADE_COOLDOWN_POLICY_MAP as TRADE_POLICY_MAP
+from ballsdex.core.utils.guild_stats import RETENTION_DAYS
 from ballsdex.settings import settings
 
 
@@ -65,10 +66,15 @@ class Info(app_commands.Group):
         else:
             spawn_enabled = False
 
-        total_server_balls = await BallInstance.filter(
-            catch_date__gte=datetime.datetime.now() - datetime.timedelta(days=days),
-            server_id=guild.id,
-        ).prefetch_related("player")
+        if days <= RETENTION_DAYS:
+            caught, catchers = await interaction.client.guild_stats.activity(guild.id, days)
+        else:
+            total_server_balls = await BallInstance.filter(
+                catch_date__gte=datetime.datetime.now() - datetime.timedelta(days=days),
+                server_id=guild.id,
+            ).prefetch_related("player")
+            caught = len(total_server_balls)
+            catchers = len(set([x.player.discord_id for x in total_server_balls]))
         if guild.owner_id:
             owner = await interaction.client.fetch_user(guild.owner_id)
             embed = discord.Embed(
@@ -88,11 +94,11 @@ class Info(app_commands.Group):
         embed.add_field(name="Created at:", value=format_dt(guild.created_at, style="F"))
         embed.add_field(
             name=f"{settings.plural_collectible_name.title()} caught ({days} days):",
-            value=len(total_server_balls),
+            value=caught,
         )
         embed.add_field(
             name=f"Amount of users who caught\n{settings.plural_collectible_name} ({days} days):",
-            value=len(set([x.player.discord_id for x in total_server_balls])),
+            value=catchers,
         )
 
         if guild.icon:
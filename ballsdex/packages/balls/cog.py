@@ -1,6 +1,6 @@
 import enum
 import logging
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING
 
 
 import discord
@@ -16,7 +16,6 @@ import random
 from discord import Embed, Color
 from pathlib import Path
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
 from ballsdex.core.models import (
     BallInstance,
     DonationPolicy,
@@ -27,8 +26,9 @@ from ballsdex.core.models import (
     balls,
 )
 from ballsdex.core.utils.buttons import ConfirmChoiceView
+from ballsdex.core.utils.owned import ball_mask, mask_ids, owned_balls
 from ballsdex.core.utils.paginator import FieldPageSource, Pages
-from ballsdex.core.utils.sorting import SortingChoices, sort_balls
+from ballsdex.core.utils.sorting import SortingChoices
 from ballsdex.core.utils.transformers import (
     BallEnabledTransform,
     BallInstanceTransform,
@@ -37,9 +37,11 @@ from ballsdex.core.utils.transformers import (
     TradeCommandType,
     RegimeTransform,
 )
-from ballsdex.core.image_generator. image_gen import draw_card
 from ballsdex.core.utils.utils import inventory_privacy, is_staff
-from ballsdex.packages.balls.countryballs_paginator import CountryballsViewer
+from ballsdex.packages.balls.countryballs_paginator import (
+    CountryballsQuerySource,
+    CountryballsViewer,
+)
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -92,6 +94,7 @@ class DonationRequest(View):
         self.countryball.trade_player = self.countryball.player
         self.countryball.player = self.new_player
         await self.countryball.save()
+        owned_balls.transfer(self.countryball, self.countryball.trade_player_id)
         trade = await Trade.create(player1=self.countryball.trade_player, player2=self.new_player)
         await TradeObject.create(
             trade=trade, ballinstance=self.countryball, player=self.countryball.trade_player
@@ -135,18 +138,9 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
         self.frame_memory = {}
 
 
-    async def apply_overlay(self, ball_instance: BallInstance, image_fp: BytesIO, overlay_filename: str) -> BytesIO:
-        overlay_path = self.OVERLAY_DIR / overlay_filename
-        overlay_img = Image.open(overlay_path).convert("RGBA")
-
-        # Regenerate the card using the draw_card function with the overlay
-        image, _ = draw_card(ball_instance, frame_overlay=overlay_img)
-
-        # Save to buffer
-        buffer = BytesIO()
-        image.save(buffer, format="PNG")
-        buffer.seek(0)
-        return buffer
+    async def apply_overlay(self, ball_instance: BallInstance, overlay_filename: str) -> BytesIO:
+        # Regenerate the card with the overlay, or reuse the cached one
+        return await ball_instance.render(self.bot, self.OVERLAY_DIR / overlay_filename)
 
 
     @app_commands.command(name="frame")
@@ -178,24 +172,15 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
 
         self.frame_memory[countryball.id] = frame.value
 
-        # Load the overlay
-        overlay_path = self.OVERLAY_DIR / frame.value
-        overlay_img = Image.open(overlay_path).convert("RGBA")
-
         # Generate the image with overlay
-        image, _ = draw_card(countryball, frame_overlay=overlay_img)
-
-        # Save to buffer
-        buffer = BytesIO()
-        image.save(buffer, format="PNG")
-        buffer.seek(0)
+        buffer = await self.apply_overlay(countryball, frame.value)
 
         # Prepare Discord file and embed
-        file = File(fp=buffer, filename="framed_footballer.png")
+        file = File(fp=buffer, filename="framed_footballer.webp")
         embed = Embed(
             title=f"{interaction.user.display_name}'s Footballer with {frame.name} Frame (Only visible in /players info)"
         )
-        embed.set_image(url="attachment://framed_footballer.png")
+        embed.set_image(url="attachment://framed_footballer.webp")
 
         await interaction.followup.send(embed=embed, file=file)
 
@@ -259,21 +244,17 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
             )
             return
 
-        await player.fetch_related("balls")
-        query = player.balls.all()
+        query = BallInstance.filter(player=player)
         if countryball:
             query = query.filter(ball__id=countryball.pk)
         if special:
             query = query.filter(special=special)
         if regime:
             query = query.filter(ball__regime=regime)
-        if sort:
-            countryballs = await sort_balls(sort, query)
-        else:
-            countryballs = await query.order_by("-favorite")
+        source = await CountryballsQuerySource.create(query, sort, reverse)
 
         regime_txt = str(regime) if regime else ""
-        if len(countryballs) < 1:
+        if not source.total:
             ball_txt = countryball.country if countryball else ""
             special_txt = special if special else ""
 
@@ -296,10 +277,8 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
                     f"{settings.plural_collectible_name} yet."
                 )
             return
-        if reverse:
-            countryballs.reverse()
 
-        paginator = CountryballsViewer(interaction, countryballs)
+        paginator = CountryballsViewer(interaction, source)
         if user_obj == interaction.user:
             await paginator.start()
         else:
@@ -354,10 +333,7 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
         # Only ID and emoji is interesting for us
         bot_countryballs = {x: y.emoji_id for x, y in balls.items() if y.enabled}
 
-        # Set of ball IDs owned by the player
-        filters = {"player__discord_id": user_obj.id, "ball__enabled": True}
         if special:
-            filters["special"] = special
             bot_countryballs = {
                 x: y.emoji_id
                 for x, y in balls.items()
@@ -371,12 +347,15 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
             )
             return
 
-        owned_countryballs = set(
-            x[0]
-            for x in await BallInstance.filter(**filters)
-            .distinct()  # Do not query everything
-            .values_list("ball_id")
-        )
+        # Bitsets of the ball IDs listed and owned by the player
+        catalog_mask = ball_mask(bot_countryballs)
+        owned_mask = 0
+        if user is None:
+            player = await Player.get_or_none(discord_id=user_obj.id)
+        if player:
+            owned = await owned_balls.get(player.pk)
+            owned_mask = owned.owned(special.pk if special else None) & catalog_mask
+        owned_countryballs = mask_ids(owned_mask)
 
         entries: list[tuple[str, str]] = []
 
@@ -416,7 +395,7 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
         else:
             entries.append((f"__**Owned {settings.plural_collectible_name}**__", "Nothing yet."))
 
-        if missing := set(y for x, y in bot_countryballs.items() if x not in owned_countryballs):
+        if missing := set(bot_countryballs[x] for x in mask_ids(catalog_mask & ~owned_mask)):
             fill_fields(f"Missing {settings.plural_collectible_name}", missing)
         else:
             entries.append(
@@ -743,25 +722,15 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
             return
         await interaction.response.defer(thinking=True)
 
-        # Get embed content, image file, and view
-        content, original_file, view = await countryball.prepare_for_message(interaction)
-
-        # Read image bytes into buffer
-        original_file.fp.seek(0)
-        file_bytes = BytesIO(original_file.fp.read())
-        original_file.close()
-
+        # Get embed content, image file (with the frame overlay if any), and view
         frame_name = self.frame_memory.get(countryball.id)
+        overlay = self.OVERLAY_DIR / frame_name if frame_name else None
+        content, file, view = await countryball.prepare_for_message(interaction, overlay)
         if frame_name:
-            # Apply the frame overlay
-            framed_buffer = await self.apply_overlay(countryball, file_bytes, frame_name)
-            file = discord.File(fp=framed_buffer, filename="framed_footballer.png")
-            image_filename = "framed_footballer.png"
+            image_filename = "framed_footballer.webp"
         else:
-            # Use original image
-            file_bytes.seek(0)
-            file = discord.File(fp=file_bytes, filename="footballer.png")
-            image_filename = "footballer.png"
+            image_filename = "footballer.webp"
+        file.filename = image_filename
 
         # Create embed
         embed = Embed(
@@ -1015,6 +984,7 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
         countryball.trade_player = old_player
         countryball.favorite = False
         await countryball.save()
+        owned_balls.transfer(countryball, old_player.pk)
 
         trade = await Trade.create(player1=old_player, player2=new_player)
         await TradeObject.create(trade=trade, ballinstance=countryball, player=old_player)
@@ -1112,7 +1082,6 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
         await interaction.response.defer(thinking=True, ephemeral=True)
 
         player, _ = await Player.get_or_create(discord_id=interaction.user.id)
-        await player.fetch_related("balls")
         is_special = type.value == "specials"
         queryset = BallInstance.filter(player=player)
 
@@ -1222,21 +1191,14 @@ class Balls(commands.GroupCog, group_name=settings.players_group_cog_name):
                 "You cannot compare with a user that has you blocked.", ephemeral=True
             )
             return
-        queryset = BallInstance.filter(ball__enabled=True).distinct()
-        if special:
-            queryset = queryset.filter(special=special)
-        user1_balls = cast(
-            list[int],
-            await queryset.filter(player=player1).values_list("ball_id", flat=True),
-        )
-        user2_balls = cast(
-            list[int],
-            await queryset.filter(player=player2).values_list("ball_id", flat=True),
-        )
-        both = set(user1_balls) & set(user2_balls)
-        user1_only = set(user1_balls) - set(user2_balls)
-        user2_only = set(user2_balls) - set(user1_balls)
-        neither = set(bot_countryballs.keys()) - both - user1_only - user2_only
+        catalog_mask = ball_mask(bot_countryballs)
+        special_id = special.pk if special else None
+        user1_balls = (await owned_balls.get(player1.pk)).owned(special_id) & catalog_mask
+        user2_balls = (await owned_balls.get(player2.pk)).owned(special_id) & catalog_mask
+        both = set(mask_ids(user1_balls & user2_balls))
+        user1_only = set(mask_ids(user1_balls & ~user2_balls))
+        user2_only = set(mask_ids(user2_balls & ~user1_balls))
+        neither = set(mask_ids(catalog_mask & ~(user1_balls | user2_balls)))
 
         entries = []
 
@@ -6,10 +6,13 @@ import discord
 
 from ballsdex.core.models import BallInstance
 from ballsdex.core.utils import menus
-from ballsdex.core.utils.paginator import Pages
+from ballsdex.core.utils.paginator import Pages, QuerysetPageSource
+from ballsdex.core.utils.sorting import SortingChoices, sort_keys
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
+    from tortoise.queryset import QuerySet
+
     from ballsdex.core.bot import BallsDexBot
 
 
@@ -22,10 +25,38 @@ class CountryballsSource(menus.ListPageSource):
         return True  # signal to edit the page
 
 
+class CountryballsQuerySource(QuerysetPageSource):
+    """
+    Ball instances of a queryset, fetched one page at a time.
+    """
+
+    @classmethod
+    async def create(
+        cls,
+        queryset: "QuerySet[BallInstance]",
+        sort: SortingChoices | None = None,
+        reverse: bool = False,
+    ) -> "CountryballsQuerySource":
+        """
+        Build the source sorted like `sort_balls`, and count the instances.
+        """
+        source = cls(queryset, await sort_keys(sort, queryset), reverse=reverse)
+        await source.prepare()
+        return source
+
+    async def format_page(self, menu: CountryballsSelector, balls: List[BallInstance]):
+        menu.set_options(balls)
+        return True  # signal to edit the page
+
+
 class CountryballsSelector(Pages):
-    def __init__(self, interaction: discord.Interaction["BallsDexBot"], balls: List[BallInstance]):
+    def __init__(
+        self,
+        interaction: discord.Interaction["BallsDexBot"],
+        balls: List[BallInstance] | menus.PageSource,
+    ):
         self.bot = interaction.client
-        source = CountryballsSource(balls)
+        source = balls if isinstance(balls, menus.PageSource) else CountryballsSource(balls)
         super().__init__(source, interaction=interaction)
         self.add_item(self.select_ball_menu)
 
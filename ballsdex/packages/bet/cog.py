@@ -19,6 +19,7 @@ from ballsdex.core.utils.transformers import (
     SpecialEnabledTransform,
     TradeCommandType,
 )
+from ballsdex.packages.balls.countryballs_paginator import CountryballsQuerySource
 from ballsdex.packages.bet.bet_user import BettingUser
 
 from ballsdex.settings import settings
@@ -275,15 +276,15 @@ class Bet(commands.GroupCog):
             query = query.filter(ball=countryball)
         if special:
             query = query.filter(special=special)
-        if sort:
-            query = sort_balls(sort, query)
-        balls = await query
-        if not balls:
+        query = query.filter(tradeable=True, ball__tradeable=True).filter(
+            Q(special=None) | Q(special__tradeable=True)
+        )
+        balls = await CountryballsQuerySource.create(query, sort)
+        if not balls.total:
             await interaction.followup.send(
                 f"No {settings.plural_collectible_name} found.", ephemeral=True
             )
             return
-        balls = [x for x in balls if x.is_tradeable]
 
         from ballsdex.packages.bet.menu import BulkAddView
         view = BulkAddView(interaction, balls, self)  # type: ignore
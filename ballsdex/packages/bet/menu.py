@@ -4,7 +4,7 @@ import asyncio
 import logging
 import random
 from datetime import datetime, timedelta, timezone
-from typing import TYPE_CHECKING, List, Set, cast
+from typing import TYPE_CHECKING, Iterable, List, Set, cast
 
 import discord
 from discord.ui import Button, View, button
@@ -13,10 +13,12 @@ from discord.utils import format_dt, utcnow
 from ballsdex.core.models import BallInstance, Player, TradeCooldownPolicy
 from ballsdex.core.utils import menus
 from ballsdex.core.utils.buttons import ConfirmChoiceView
+from ballsdex.core.utils.owned import owned_balls
 from ballsdex.core.utils.paginator import Pages
 from ballsdex.packages.balls.countryballs_paginator import CountryballsViewer
 from ballsdex.packages.bet.bet_user import BettingUser
 from ballsdex.packages.bet.display import fill_bet_embed_fields
+from ballsdex.packages.boxes.cog import PACKS_CURRENCY
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -363,51 +365,25 @@ class BetMenu:
                 # Transfer all balls to winner
                 all_balls = self.bettor1.proposal + self.bettor2.proposal
                 for ball in all_balls:
+                    old_player_id = ball.player_id
                     ball.player = winner.player
                     await ball.save()
+                    owned_balls.transfer(ball, old_player_id)
                     await ball.unlock()
 
-                # Transfer packs to winner
+                # Transfer the packs bet by the loser to the winner
                 total_packs = self.bettor1.pack_amount + self.bettor2.pack_amount
-                if total_packs > 0:
-                    # Update wallet balance using the packs module
+                if loser.pack_amount > 0:
                     try:
-                        # Import from the packs module where wallet_balance is defined
-                        from ballsdex.packages.packs.cog import wallet_balance
-                        
-                        winner_id = winner.user.id
-                        loser_id = loser.user.id
-                        
-                        # Winner gets all packs
-                        wallet_balance[winner_id] += total_packs
-                        # Loser loses their bet packs
-                        wallet_balance[loser_id] -= loser.pack_amount
-                        
                         # Ensure loser doesn't go negative
-                        if wallet_balance[loser_id] < 0:
-                            wallet_balance[loser_id] = 0
-                            
-                    except (ImportError, ModuleNotFoundError):
-                        # Fallback: search through loaded modules
-                        import sys
-                        wallet_balance = None
-                        for module_name, module in sys.modules.items():
-                            if 'packs' in module_name and hasattr(module, 'wallet_balance'):
-                                wallet_balance = getattr(module, 'wallet_balance')
-                                break
-                        
-                        if wallet_balance is not None:
-                            winner_id = winner.user.id
-                            loser_id = loser.user.id
-                            wallet_balance[winner_id] += total_packs
-                            wallet_balance[loser_id] -= loser.pack_amount
-                            if wallet_balance[loser_id] < 0:
-                                wallet_balance[loser_id] = 0
-                        else:
-                            log.warning("Could not find wallet_balance system for pack transfer")
+                        balance = await self.bot.wallets.balance(loser.user.id, PACKS_CURRENCY)
+                        taken = min(loser.pack_amount, balance)
+                        if taken > 0 and await self.bot.wallets.debit(
+                            loser.user.id, PACKS_CURRENCY, taken
+                        ) is not None:
+                            await self.bot.wallets.credit(winner.user.id, PACKS_CURRENCY, taken)
                     except Exception as e:
                         log.warning(f"Failed to transfer packs in bet: {e}")
-                        pass
 
                 # Clear proposals
                 self.bettor1.clear_proposal()
@@ -492,12 +468,12 @@ class CountryballsSelector(Pages):
     def __init__(
         self,
         interaction: discord.Interaction["ballsdexBot"],
-        balls: List[BallInstance],
+        balls: List[BallInstance] | menus.PageSource,
         cog,
     ):
         self.bot = interaction.client
         self.interaction = interaction
-        source = CountryballsSource(balls)
+        source = balls if isinstance(balls, menus.PageSource) else CountryballsSource(balls)
         super().__init__(source, interaction=interaction)
         self.add_item(self.select_ball_menu)
         self.add_item(self.confirm_button)
@@ -527,15 +503,19 @@ class CountryballsSelector(Pages):
         self.select_ball_menu.options = options
         self.select_ball_menu.max_values = len(options)
 
+    async def fetch_balls(self, values: Iterable[str]) -> List[BallInstance]:
+        """
+        Load the selected balls with a single query.
+        """
+        return await BallInstance.filter(id__in=[int(x) for x in values]).select_related(
+            "ball", "player"
+        )
+
     @discord.ui.select(min_values=1, max_values=25)
     async def select_ball_menu(
         self, interaction: discord.Interaction["ballsdexBot"], item: discord.ui.Select
     ):
-        for value in item.values:
-            ball_instance = await BallInstance.get(id=int(value)).prefetch_related(
-                "ball", "player"
-            )
-            self.balls_selected.add(ball_instance)
+        self.balls_selected.update(await self.fetch_balls(item.values))
         await interaction.response.defer()
 
     @discord.ui.button(label="Select Page", style=discord.ButtonStyle.secondary)
@@ -543,12 +523,9 @@ class CountryballsSelector(Pages):
         self, interaction: discord.Interaction["ballsdexBot"], button: Button
     ):
         await interaction.response.defer(thinking=True, ephemeral=True)
-        for ball in self.select_ball_menu.options:
-            ball_instance = await BallInstance.get(id=int(ball.value)).prefetch_related(
-                "ball", "player"
-            )
-            if ball_instance not in self.balls_selected:
-                self.balls_selected.add(ball_instance)
+        self.balls_selected.update(
+            await self.fetch_balls(x.value for x in self.select_ball_menu.options)
+        )
         await interaction.followup.send(
             (
                 f"All {settings.plural_collectible_name} on this page have been selected.\n"
@@ -593,25 +570,28 @@ class CountryballsSelector(Pages):
                     f"{settings.collectible_name.title()} #{ball.pk:0X} is not tradeable.",
                     ephemeral=True,
                 )
-            if await ball.is_locked():
-                return await interaction.followup.send(
-                    f"{settings.collectible_name.title()} #{ball.pk:0X} is locked "
-                    "for bet and won't be added to the proposal.",
-                    ephemeral=True,
-                )
+        if any(ball.favorite for ball in self.balls_selected):
             view = ConfirmChoiceView(interaction)
-            if ball.favorite:
-                await interaction.followup.send(
-                    f"One or more of the {settings.plural_collectible_name} is favorited, "
-                    "are you sure you want to add it to the bet?",
-                    view=view,
-                    ephemeral=True,
-                )
-                await view.wait()
-                if not view.value:
-                    return
-            bettor.proposal.append(ball)
-            await ball.lock_for_trade()
+            await interaction.followup.send(
+                f"One or more of the {settings.plural_collectible_name} is favorited, "
+                "are you sure you want to add it to the bet?",
+                view=view,
+                ephemeral=True,
+            )
+            await view.wait()
+            if not view.value:
+                return
+
+        locked = await BallInstance.lock_many_for_trade(self.balls_selected)
+        if len(locked) != len(self.balls_selected):
+            await BallInstance.unlock_many(locked)
+            ball = min(self.balls_selected - set(locked), key=lambda x: x.pk)
+            return await interaction.followup.send(
+                f"{settings.collectible_name.title()} #{ball.pk:0X} is locked "
+                "for bet and won't be added to the proposal.",
+                ephemeral=True,
+            )
+        bettor.proposal.extend(locked)
         grammar = (
             f"{settings.collectible_name}"
             if len(self.balls_selected) == 1
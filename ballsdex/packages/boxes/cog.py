@@ -12,6 +12,7 @@ from PIL import Image, ImageFilter, ImageEnhance, ImageDraw, ImageFont
 from discord.ui import View
 import asyncio
 from tortoise.exceptions import DoesNotExist
+from tortoise.transactions import in_transaction
 import logging
 logger = logging.getLogger(__name__)
 from ballsdex.core.utils.transformers import (
@@ -32,9 +33,10 @@ from ballsdex.core.models import (
 )
 from ballsdex.settings import settings
 from ballsdex.core.bot import BallsDexBot
+from ballsdex.core.utils.owned import owned_balls
+from ballsdex.core.utils.sampling import AliasSampler
 import ballsdex.packages.config.components as Components
 from collections import defaultdict
-from ballsdex.core.image_generator. image_gen import draw_card
 from io import BytesIO
 from ballsdex.core.utils.transformers import (
     BallEnabledTransform,
@@ -51,13 +53,11 @@ from ballsdex.core.utils.transformers import (
 # -------
 
 # Track last claim times
-last_daily_times = {}
 last_weekly_times = {}
-wallet_balance = defaultdict(int)
-packly_pool = defaultdict(int)
 
-# Custom daily usage tracking - stores {user_id: {'count': int, 'first_use': datetime}}
-daily_usage_tracking = {}
+# Pack balances are kept in bot.wallets under this currency, daily usage in bot.cooldowns
+PACKS_CURRENCY = "packs"
+DAILY_USAGE = "packs.daily"
 
 # Owners who can give packs
 ownersid = {
@@ -74,8 +74,25 @@ DAILY_COOLDOWN = timedelta(hours=24)
 WEEKLY_COOLDOWN = timedelta(days=7)
 gamble_cooldowns = {} 
 
-#Dictionaries
-packly_pool = defaultdict(int)
+# Multipackly openings
+PACK_WORKERS = 4  # packs opened concurrently
+PACK_QUEUE_SIZE = 50  # openings waiting for a worker
+REVEAL_STEPS = 4  # message edits to reveal all the footballers
+
+
+def pack_weight(rarity: float) -> int:
+    """Weight of a ball in packs, according to the rarity tiers"""
+    if rarity >= 5.0:
+        return 1600  # common
+    if rarity >= 2.5:
+        return 600  # decent
+    if rarity >= 1.5:
+        return 300  # rare
+    if rarity >= 0.5:
+        return 100  # very rare
+    if rarity > 0.1:
+        return 30  # very very rare
+    return 20  # ultra rare
 
 
 class SkipView(View):
@@ -109,9 +126,11 @@ class Claim(commands.GroupCog, name="packs"):
         self.bot = bot
         self.bot_tutorial_seen = set()
         self.bot_walletturorial_seen = set()
-        self.pack_queue = asyncio.Queue()
+        self.pack_queue = asyncio.Queue(maxsize=PACK_QUEUE_SIZE)
+        self.pack_workers: list[asyncio.Task] = []
         self.active_users = set()
-        self.bot.loop.create_task(self._start_worker_manager())
+        self._pack_sampler: AliasSampler[Ball] = AliasSampler([], [])
+        self._pack_sampler_source = None
         super().__init__()
 
     async def get_random_special(self) -> Special | None:
@@ -119,117 +138,181 @@ class Claim(commands.GroupCog, name="packs"):
         Get a random special based on rarity probability and date restrictions.
         Returns None if no special is selected or available.
         """
-        now = datetime.now(timezone.utc)
-        
-        # Get all active specials that respect date restrictions
-        try:
-            from tortoise.expressions import Q
-            active_specials = await Special.filter(
-                # Check start_date and end_date constraints
-                Q(start_date__isnull=True) | Q(start_date__lte=now),
-                Q(end_date__isnull=True) | Q(end_date__gte=now),
-                # Only include specials that are not hidden
-                hidden=False
-            ).all()
-        except:
-            # Fallback if Q import fails
-            active_specials = await Special.all()
-        
-        if not active_specials:
-            return None
-        
-        # Apply rarity probability for each special
-        for special in active_specials:
-            if random.random() < special.rarity:
-                return special
-        
-        return None
+        return self.draw_special()
+
+    async def cog_load(self):
+        self.pack_workers = [
+            asyncio.create_task(self._pack_worker()) for _ in range(PACK_WORKERS)
+        ]
+
+    async def cog_unload(self):
+        for task in self.pack_workers:
+            task.cancel()
+        # Let the cancelled openings refund their packs
+        await asyncio.gather(*self.pack_workers, return_exceptions=True)
+        # Give back the packs of the openings that never started
+        while not self.pack_queue.empty():
+            user_id, packs, _, _ = self.pack_queue.get_nowait()
+            await self.bot.wallets.credit(user_id, PACKS_CURRENCY, packs)
+            self.active_users.discard(user_id)
 
-    async def _start_worker_manager(self):
+    async def _pack_worker(self):
         """
-        Manages the queue and passes tasks to concurrent workers.
+        Opens the queued multipacklys one at a time. Several workers run concurrently.
         """
         while True:
-            # Get the task from the async queue
-            user_id, packs, interaction = await self.pack_queue.get()
-            
-            # Create a new task to process this request concurrently.
-            asyncio.create_task(
-                self._process_multipackly_and_clean_up(user_id, packs, interaction)
-            )
-            
-            # Mark the queue task as done, allowing it to move to the next item
-            self.pack_queue.task_done()
+            user_id, packs, interaction, sent = await self.pack_queue.get()
+            try:
+                await self._process_multipackly_and_clean_up(user_id, packs, interaction, sent)
+            finally:
+                self.pack_queue.task_done()
 
-        # Compatibility shim — place this inside the Claim cog class,
-    # at the same indentation level as multipackly and other methods.
-    async def _process_multipackly(self, user_id, packs, interaction):
-        """
-        Compatibility shim: forwards calls to the real worker method.
-        This fixes the 'no attribute _process_multipackly' error without changing
-        your existing worker implementation name.
-        """
-        return await self._process_multipackly_and_clean_up(user_id, packs, interaction)
-    
-    async def _process_multipackly_and_clean_up(self, user_id, packs, interaction):
+    async def _process_multipackly_and_clean_up(self, user_id, packs, interaction, sent):
         """
         This is a wrapper function that runs the main process and ensures cleanup.
         """
         try:
+            # Wait for the command to send the opening message
+            await sent.wait()
+        except asyncio.CancelledError:
+            # The cog is unloading, nothing was opened yet
+            await self.bot.wallets.credit(user_id, PACKS_CURRENCY, packs)
+            self.active_users.discard(user_id)
+            raise
+        try:
+            if not interaction.response.is_done():
+                # The opening message failed, give the packs back
+                await self.bot.wallets.credit(user_id, PACKS_CURRENCY, packs)
+                return
             await self._process_multipackly(user_id, packs, interaction)
-        except Exception as e:
-            logger.error(f"Error processing multipackly for user {user_id}: {e}")
+        except Exception:
+            logger.exception(f"Error processing multipackly for user {user_id}")
             try:
                 # On error, send an ephemeral message
                 await interaction.followup.send(
                     f"❌ An unexpected error occurred while opening your packs.",
                     ephemeral=True
                 )
-            except discord.NotFound:
+            except discord.HTTPException:
                 logger.warning(f"Could not send error message for user {user_id} - interaction not found.")
         finally:
             # This is the crucial cleanup step for both success and failure
             self.active_users.discard(user_id)
 
-    async def get_random_ball(self, player: Player) -> Ball | None:
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
+    async def _process_multipackly(self, user_id: int, packs: int, interaction: discord.Interaction):
+        """
+        Draw all the packs at once, save them in a single query, then reveal them in a few
+        message edits.
+        """
+        sampler = self.pack_sampler()
+        if not sampler:
+            await self.bot.wallets.credit(user_id, PACKS_CURRENCY, packs)
+            await interaction.followup.send("No footballers are available.", ephemeral=True)
+            return
+
+        try:
+            player, _ = await Player.get_or_create(discord_id=user_id)
+            instances = [
+                BallInstance(
+                    ball=sampler.sample(),
+                    player=player,
+                    attack_bonus=random.randint(-20, 20),
+                    health_bonus=random.randint(-20, 20),
+                    special=self.draw_special(),
+                )
+                for _ in range(packs)
+            ]
+            async with in_transaction():
+                await BallInstance.bulk_create(instances)
+            # bulk creations don't trigger the model signals
+            for instance in instances:
+                owned_balls.add(player.pk, instance.ball_id, instance.special_id)
+        except BaseException:
+            # Nothing was given, refund the packs, also when cancelled by the cog unloading
+            await self.bot.wallets.credit(user_id, PACKS_CURRENCY, packs)
+            raise
+
+        message = await interaction.original_response()
+        pulled_balls = [instance.countryball for instance in instances]
+        special_counts = Counter(
+            instance.specialcard.name for instance in instances if instance.specialcard
         )
-        all_balls = await Ball.filter(rarity__gte=0.03, rarity__lte=30.0, enabled=True).all()
 
-        if not all_balls:
-            return None
+        # Small pause to simulate animation
+        await asyncio.sleep(2)
 
-        weighted_choices = []
-        for ball in all_balls:
-            # base weight based on ownership
-            base_weight = 1 if ball.id in owned_ids else 1
-
-            # rarity weight according to your tiers
-            if 5.0 <= ball.rarity <= 30.0:
-                rarity_weight = 1600  # common
-            elif 2.5 <= ball.rarity < 5.0:
-                rarity_weight = 600   # decent
-            elif 1.5 <= ball.rarity < 2.5:
-                rarity_weight = 300  # rare
-            elif 0.5 < ball.rarity < 1.5:
-                rarity_weight = 100  # very rare
-            elif 0.1 < ball.rarity < 0.5:
-                rarity_weight = 30 # very very rare 
-            elif 0.03 <= ball.rarity <= 0.1:
-                rarity_weight = 20  # ultra rare
+        # Reveal footballers in a few batches instead of editing the message for every pack
+        batch_size = -(-packs // REVEAL_STEPS)
+        for start in range(0, packs, batch_size):
+            batch = instances[start : start + batch_size]
+            lines = []
+            for instance in batch:
+                special_info = ""
+                if instance.specialcard:
+                    special_emoji = self.format_special_emoji(instance.specialcard)
+                    special_info = f" {special_emoji} {instance.specialcard.name}"
+                lines.append(
+                    f"🏆 **{instance.countryball.country}** (Rarity: {instance.countryball.rarity}){special_info}"
+                )
+            walkout_embed = discord.Embed(
+                title=f"🏆 Revealed {start + len(batch)}/{packs} footballers!",
+                description="\n".join(lines),
+                color=discord.Color.random()
+            )
+            walkout_embed.set_thumbnail(url=interaction.user.display_avatar.url)
+            walkout_embed.set_footer(text="FootballDex Pack Opening")
+            await message.edit(embed=walkout_embed)
+            await asyncio.sleep(1.5)  # Pause between each reveal
 
-            final_weight = base_weight * rarity_weight
-            weighted_choices.append((ball, final_weight))
+        special_summary = ""
+        if special_counts:
+            special_summary = "\n\n**Specials Pulled:**\n" + "\n".join(f"**{name}** ({count})" for name, count in special_counts.items())
 
-        choices = []
-        for ball, weight in weighted_choices:
-            choices.extend([ball] * int(weight))
+        top_5 = sorted(pulled_balls, key=lambda b: b.rarity, reverse=False)[:5]
+        top_5_summary = "\n**Top 5 Pulls:**\n" + ", ".join(f"**{b.country}**" for b in top_5)
+        balance = await self.bot.wallets.balance(user_id, PACKS_CURRENCY)
 
-        if not choices:
-            return None
+        # Final message after all reveals
+        final_embed = discord.Embed(
+            title="🎉 All Footballers Revealed!",
+            description=(
+                f"Your Multi-Packly has been done!\n\n"
+                f"*Here is what you got in your multipackly:*\n"
+                f"**{', '.join(b.country for b in pulled_balls)}!**\n"
+                f"{top_5_summary}\n"
+                f"{special_summary}\n"
+                f"**New Packly Balance: {balance}**"
+            ),
+            color=discord.Color.green()
+        )
+        final_embed.set_footer(text="FootballDex MultiPacklys")
+        await message.edit(embed=final_embed)
 
-        return random.choice(choices)
+    def pack_sampler(self) -> AliasSampler[Ball]:
+        """
+        Sampler of the balls found in packs, weighted with the pack tiers. It is rebuilt
+        along with the spawn sampler when the cache is reloaded.
+        """
+        if self._pack_sampler_source is not self.bot.ball_sampler:
+            pool = [x for x in balls.values() if x.enabled and 0.03 <= x.rarity <= 30.0]
+            self._pack_sampler = AliasSampler(pool, [pack_weight(x.rarity) for x in pool])
+            self._pack_sampler_source = self.bot.ball_sampler
+        return self._pack_sampler
+
+    def draw_special(self) -> Special | None:
+        """
+        Roll each active special with its rarity as probability, from the cached specials.
+        """
+        for special in self.bot.special_schedule.active():
+            if not special.hidden and random.random() < special.rarity:
+                return special
+        return None
+
+    async def get_random_ball(self, player: Player) -> Ball | None:
+        sampler = self.pack_sampler()
+        if not sampler:
+            return None
+        return sampler.sample()
 
         # put this inside your Cog class (same indentation as other methods)
     async def safe_send_pinged_embed(self, interaction: discord.Interaction, user: discord.User, embed: discord.Embed, *, content_mention: str | None = None):
@@ -283,55 +366,40 @@ class Claim(commands.GroupCog, name="packs"):
             except Exception:
                 pass
 
-    def check_daily_usage(self, user_id: str) -> tuple[bool, int]:
+    async def check_daily_usage(self, user_id: int) -> tuple[bool, int]:
         """
         Check if user can use daily command and return remaining uses.
         Returns (can_use, remaining_uses)
         """
         now = datetime.now(timezone.utc)
+        count, first_use = await self.bot.cooldowns.get(user_id, DAILY_USAGE)
         
-        if user_id not in daily_usage_tracking:
-            # First time using daily command
-            daily_usage_tracking[user_id] = {
-                'count': 0,
-                'first_use': now
-            }
-            return True, 3
-        
-        user_data = daily_usage_tracking[user_id]
-        time_since_first_use = now - user_data['first_use']
-        
-        # Reset if 24 hours have passed since first use
-        if time_since_first_use >= DAILY_COOLDOWN:
-            daily_usage_tracking[user_id] = {
-                'count': 0,
-                'first_use': now
-            }
+        # Reset on first use, or if 24 hours have passed since first use
+        if first_use is None or now - first_use >= DAILY_COOLDOWN:
+            await self.bot.cooldowns.set(user_id, DAILY_USAGE, 0, now)
             return True, 3
         
         # Check if user has used all 3 attempts
-        if user_data['count'] >= 3:
+        if count >= 3:
             return False, 0
         
-        remaining = 3 - user_data['count']
+        remaining = 3 - count
         return True, remaining
 
-    def increment_daily_usage(self, user_id: str):
+    async def increment_daily_usage(self, user_id: int):
         """Increment the daily usage count for a user"""
-        if user_id in daily_usage_tracking:
-            daily_usage_tracking[user_id]['count'] += 1
+        count, first_use = await self.bot.cooldowns.get(user_id, DAILY_USAGE)
+        if first_use is not None:
+            await self.bot.cooldowns.set(user_id, DAILY_USAGE, count + 1, first_use)
 
-    def get_daily_cooldown_remaining(self, user_id: str) -> timedelta | None:
+    async def get_daily_cooldown_remaining(self, user_id: int) -> timedelta | None:
         """Get remaining cooldown time for daily command"""
-        if user_id not in daily_usage_tracking:
-            return None
-        
-        user_data = daily_usage_tracking[user_id]
-        if user_data['count'] < 3:
+        count, first_use = await self.bot.cooldowns.get(user_id, DAILY_USAGE)
+        if first_use is None or count < 3:
             return None
         
         now = datetime.now(timezone.utc)
-        cooldown_end = user_data['first_use'] + DAILY_COOLDOWN
+        cooldown_end = first_use + DAILY_COOLDOWN
         
         if now >= cooldown_end:
             return None
@@ -339,9 +407,7 @@ class Claim(commands.GroupCog, name="packs"):
         return cooldown_end - now
 
     async def getdasigmaballmate(self, player: Player) -> Ball | None:
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
-        )
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(rarity__gte=0.03, rarity__lte=5.0, enabled=True).all()
 
         if not all_balls:
@@ -405,10 +471,10 @@ class Claim(commands.GroupCog, name="packs"):
             return
 
         # Check daily usage limits
-        can_use, remaining_uses = self.check_daily_usage(user_id)
+        can_use, remaining_uses = await self.check_daily_usage(interaction.user.id)
         
         if not can_use:
-            cooldown_remaining = self.get_daily_cooldown_remaining(user_id)
+            cooldown_remaining = await self.get_daily_cooldown_remaining(interaction.user.id)
             if cooldown_remaining:
                 hours = int(cooldown_remaining.total_seconds() // 3600)
                 minutes = int((cooldown_remaining.total_seconds() % 3600) // 60)
@@ -421,10 +487,10 @@ class Claim(commands.GroupCog, name="packs"):
         await interaction.response.defer()
         
         # Increment usage count
-        self.increment_daily_usage(user_id)
+        await self.increment_daily_usage(interaction.user.id)
         
         # Get updated remaining uses after incrementing
-        _, new_remaining = self.check_daily_usage(user_id)
+        _, new_remaining = await self.check_daily_usage(interaction.user.id)
         player, _ = await Player.get_or_create(discord_id=str(user_id))
         ball = await self.get_random_ball(player)
 
@@ -624,8 +690,6 @@ class Claim(commands.GroupCog, name="packs"):
     @app_commands.command(name="packly", description="Claim your footballer from the packly!")
     @app_commands.checks.cooldown(1, 60, key=lambda i: i.user.id)
     async def packly(self, interaction: discord.Interaction):
-        user_id = str(interaction.user.id)
-
         min_creation = datetime.now(timezone.utc) - timedelta(days=14)
         if interaction.user.created_at > min_creation:
             await interaction.response.send_message(
@@ -635,20 +699,16 @@ class Claim(commands.GroupCog, name="packs"):
             return
         
         # Ensure user starts with 1 pack if no balance is set
-        if user_id not in wallet_balance:
-            wallet_balance[user_id] = 1  # Initialize with 1 pack
+        await self.bot.wallets.balance(interaction.user.id, PACKS_CURRENCY, initial=1)
 
-        # Check if the user has enough packs to claim
-        if wallet_balance[user_id] < 1:
+        # Deduct 1 pack from user's wallet for claiming a ball, if they have enough
+        if await self.bot.wallets.debit(interaction.user.id, PACKS_CURRENCY, 1) is None:
             await interaction.response.send_message(
                 "You don't have enough packs!",
                 ephemeral=True
             )
             return
 
-        # Deduct 1 pack from user's wallet for claiming a ball
-        wallet_balance[user_id] -= 1
-
         # Assign a random ball to the user
         player, _ = await Player.get_or_create(discord_id=str(interaction.user.id))
         ball = await self.get_random_ball(player)
@@ -721,8 +781,6 @@ class Claim(commands.GroupCog, name="packs"):
     @app_commands.describe(packs="Number of packs to open (1-75)")
     @app_commands.checks.cooldown(1, 60, key=lambda i: i.user.id)
     async def multipackly(self, interaction: discord.Interaction, packs: int):
-        user_id = str(interaction.user.id)
-
         min_creation = datetime.now(timezone.utc) - timedelta(days=14)
         if interaction.user.created_at > min_creation:
             await interaction.response.send_message(
@@ -731,10 +789,6 @@ class Claim(commands.GroupCog, name="packs"):
             )
             return
 
-        # Ensure user starts with 1 pack if no balance is set
-        if user_id not in wallet_balance:
-            wallet_balance[user_id] = 1
-
         # Validate pack number
         if packs < 1 or packs > 75:
             await interaction.response.send_message(
@@ -743,15 +797,44 @@ class Claim(commands.GroupCog, name="packs"):
             )
             return
 
-        if wallet_balance[user_id] < packs:
+        # Only one multipackly per user at a time, so nobody can hog the workers
+        user_id = interaction.user.id
+        if user_id in self.active_users:
+            await interaction.response.send_message(
+                "Your previous packs are still being opened!",
+                ephemeral=True
+            )
+            return
+        self.active_users.add(user_id)
+
+        try:
+            # Ensure user starts with 1 pack if no balance is set
+            await self.bot.wallets.balance(user_id, PACKS_CURRENCY, initial=1)
+            # Deduct packs
+            debited = await self.bot.wallets.debit(user_id, PACKS_CURRENCY, packs)
+        except BaseException:
+            self.active_users.discard(user_id)
+            raise
+        if debited is None:
+            self.active_users.discard(user_id)
             await interaction.response.send_message(
                 "You don't have enough packs!",
                 ephemeral=True
             )
             return
 
-        # Deduct packs
-        wallet_balance[user_id] -= packs
+        # Reserve a place in the queue right away, the worker waits for the opening message
+        sent = asyncio.Event()
+        try:
+            self.pack_queue.put_nowait((user_id, packs, interaction, sent))
+        except asyncio.QueueFull:
+            self.active_users.discard(user_id)
+            await self.bot.wallets.credit(user_id, PACKS_CURRENCY, packs)
+            await interaction.response.send_message(
+                "Too many packs are being opened right now, please try again in a minute.",
+                ephemeral=True
+            )
+            return
 
         # Create the first embed (opening animation)
         first_embed = discord.Embed(
@@ -762,96 +845,11 @@ class Claim(commands.GroupCog, name="packs"):
         first_embed.set_thumbnail(url=interaction.user.display_avatar.url)
         first_embed.set_footer(text="FootballDex MultiPacklys")
 
-        # Send the first embed
-        await interaction.response.send_message(embed=first_embed)
-        message = await interaction.original_response()
-
-        pulled_balls = []
-
-        special_counts = {}
-
-
-        # Small pause to simulate animation
-        await asyncio.sleep(4)
-
-        # Reveal footballers one by one
-        for _ in range(packs):
-            player, _ = await Player.get_or_create(discord_id=str(interaction.user.id))
-            ball = await self.get_random_ball(player)
-
-            if not ball:
-                await interaction.followup.send("No footballers are available.", ephemeral=True)
-                return
-
-            # Get random special for this pack
-            special = await self.get_random_special()
-
-            # Create an instance of the ball for the user
-            instance = await BallInstance.create(
-                ball=ball,
-                player=player,
-                attack_bonus=random.randint(-20, 20),
-                health_bonus=random.randint(-20, 20),
-                special=special,
-            )
-
-            # Create the walkout embed
-            special_info = ""
-            if special:
-                special_emoji = ""
-                if special.emoji:
-                    try:
-                        emoji_id = int(special.emoji)
-                        special_emoji = self.bot.get_emoji(emoji_id) or "⚡"
-                    except ValueError:
-                        special_emoji = special.emoji
-                else:
-                    special_emoji = "⚡"
-                special_info = f"\n{special_emoji} **Special:** {special.name}"
-
-            if special:
-                special_counts[special.name] = special_counts.get(special.name, 0) + 1
-
-            walkout_embed = discord.Embed(
-                title=f"🏆 You pulled {ball.country}!",
-                description=f"**Rarity:** {ball.rarity}\n⚽ **Attack:** {ball.attack}\n❤️ **Health:** {ball.health}{special_info}",
-                color=discord.Color.random()
-            )
-            walkout_embed.set_thumbnail(url=interaction.user.display_avatar.url)
-            walkout_embed.set_footer(text="FootballDex Pack Opening")
-
-            # Edit the message to show the walkout
-            await message.edit(embed=walkout_embed)
-
-            pulled_balls.append(ball)
-            balance = wallet_balance.get(user_id, 0)
-
-            await asyncio.sleep(0.5)  # Pause between each reveal
-
-            special_summary = ""
-            if special_counts:
-                special_summary = "\n\n**Specials Pulled:**\n" + "\n".join(f"**{name}** ({count})" for name, count in special_counts.items())
-
-
-            top_5 = sorted(pulled_balls, key=lambda b: b.rarity, reverse=False)[:5]
-            top_5_summary = "\n**Top 5 Pulls:**\n" + ", ".join(f"**{b.country}**" for b in top_5)
-
-
-        # Final message after all reveals
-        final_embed = discord.Embed(
-        title="🎉 All Footballers Revealed!",
-        description=(
-        f"Your Multi-Packly has been done!\n\n"
-        f"*Here is what you got in your multipackly:*\n"
-        f"**{', '.join(b.country for b in pulled_balls)}!**\n"
-        f"{top_5_summary}\n"
-        f"{special_summary}\n"
-        f"**New Packly Balance: {balance}**"
-        ),
-        color=discord.Color.green()
-)
-        final_embed.set_footer(text="FootballDex MultiPacklys")
-        await message.edit(embed=final_embed)
+        # Send the first embed, the packs are opened by the workers, or refunded if this fails
+        try:
+            await interaction.response.send_message(embed=first_embed)
+        finally:
+            sent.set()
 
 
     # Command to add packs to a user's wallet
@@ -868,19 +866,17 @@ class Claim(commands.GroupCog, name="packs"):
             )
             return
 
-        # Ensure the target user has a wallet entry
-        target_user_id = str(user.id)
-        if target_user_id not in wallet_balance:
-            wallet_balance[target_user_id] = 1  # Initialize with 1 pack if no balance exists
+        # Ensure the target user has a wallet entry, with 1 pack if no balance exists
+        await self.bot.wallets.balance(user.id, PACKS_CURRENCY, initial=1)
 
         # Add packs to the target user's wallet
-        wallet_balance[target_user_id] += packs
+        new_balance = await self.bot.wallets.credit(user.id, PACKS_CURRENCY, packs)
 
         embed = discord.Embed(
             title="📦 Pack Added Successfully!",
             description=(
                 f"**{interaction.user.display_name}** has added you **{packs}** pack(s)! 🎁\n\n"
-                f"🪙 **Your New Balance:** `{wallet_balance[target_user_id]} packs`"
+                f"🪙 **Your New Balance:** `{new_balance} packs`"
             ),
             color=discord.Color.green()
         )
@@ -906,19 +902,19 @@ class Claim(commands.GroupCog, name="packs"):
             )
             return
 
-        # Ensure the target user has a wallet entry
-        target_user_id = str(user.id)
-        if target_user_id not in wallet_balance:
-            wallet_balance[target_user_id] = 0  # Initialize with 0 packs if no balance exists
+        # Ensure the target user has a wallet entry, with 0 packs if no balance exists
+        balance = await self.bot.wallets.balance(user.id, PACKS_CURRENCY, initial=0)
 
         # Remove packs from the target user's wallet (ensure it doesn't go below 0)
-        wallet_balance[target_user_id] = max(0, wallet_balance[target_user_id] - packs)
+        new_balance = await self.bot.wallets.debit(user.id, PACKS_CURRENCY, min(packs, balance))
+        if new_balance is None:
+            new_balance = await self.bot.wallets.balance(user.id, PACKS_CURRENCY)
 
         embed = discord.Embed(
             title="FootballDex Packs Removed!",
             description=(
                 f"{interaction.user.mention} has removed **{packs}** pack(s) from {user.mention}'s wallet.\n"
-                f"🪙 **{user.name}'s New Balance**: `{wallet_balance[target_user_id]} packs`"
+                f"🪙 **{user.name}'s New Balance**: `{new_balance} packs`"
             ),
             color=discord.Color.red()
         )
@@ -930,8 +926,6 @@ class Claim(commands.GroupCog, name="packs"):
     @app_commands.command(name="gamblepack", description="Gamble your packlys for a chance to win double – or lose it all!")
     @app_commands.describe(amount="How many packs to gamble (fixed 50/50 chance)")
     async def gamblepack(self, interaction: discord.Interaction, amount: int = 1):
-        user_id = str(interaction.user.id)
-
         min_creation = datetime.now(timezone.utc) - timedelta(days=14)
         if interaction.user.created_at > min_creation:
             await interaction.response.send_message(
@@ -952,16 +946,13 @@ class Claim(commands.GroupCog, name="packs"):
 
 
         # Ensure user has balance
-        if user_id not in wallet_balance:
-            wallet_balance[user_id] = 0
+        await self.bot.wallets.balance(interaction.user.id, PACKS_CURRENCY, initial=0)
 
-        if wallet_balance[user_id] < amount:
+        # Deduct packs immediately
+        if await self.bot.wallets.debit(interaction.user.id, PACKS_CURRENCY, amount) is None:
             await interaction.response.send_message("❌ You don't have enough packlys to gamble that many.", ephemeral=True)
             return
 
-        # Deduct packs immediately
-        wallet_balance[user_id] -= amount
-
         await interaction.response.defer()
 
         suspense = discord.Embed(
@@ -979,7 +970,7 @@ class Claim(commands.GroupCog, name="packs"):
 
         if result == "win":
             reward = amount * 2
-            wallet_balance[user_id] += reward
+            await self.bot.wallets.credit(interaction.user.id, PACKS_CURRENCY, reward)
             suspense.title = f"🎉 You WON {reward} packlys!"
             suspense.color = discord.Color.green()
             suspense.description = f"Luck is on your side. You risked {amount}, and won {reward}!"
@@ -997,7 +988,7 @@ class Claim(commands.GroupCog, name="packs"):
             await log_channel.send(
                 f"🎲 **{interaction.user.mention}** gambled `{amount}` packlys and **{result.upper()}**.\n"
                 f"🎯 Win chance: `50%`\n"
-                f"📦 New balance: `{wallet_balance[user_id]}`"
+                f"📦 New balance: `{await self.bot.wallets.balance(interaction.user.id, PACKS_CURRENCY)}`"
             )
 
     
@@ -1027,7 +1018,7 @@ class Claim(commands.GroupCog, name="packs"):
             return  # Stop here, so user reads tutorial first
         
         # Get the user's pack balance (defaults to 0 if they haven't added any packs)
-        balance = wallet_balance.get(user_id, 0)
+        balance = await self.bot.wallets.balance(interaction.user.id, PACKS_CURRENCY)
         
         embed = discord.Embed(
             title=f"{username}'s Wallet",
@@ -3,43 +3,75 @@ from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 import asyncio
-from ballsdex.core.models import GuildConfig, BallInstance
+from ballsdex.core.models import GuildConfig, BroadcastJob, BroadcastProgress
 from ballsdex.settings import settings
 from ballsdex.core.utils.utils import is_staff
+from ballsdex.packages.broadcast.dispatcher import GLOBAL_RATE, BroadcastDispatcher, RateLimiter
 from datetime import datetime, timedelta, timezone
 import traceback
 import math
 import logging
-import io
 
 
 logging.basicConfig(level=logging.ERROR) 
 logger = logging.getLogger(__name__)
 
+# interrupted broadcasts older than this are not resumed
+RESUME_WINDOW = timedelta(days=1)
+REPORT_INTERVAL = 10
+
+
 class Broadcast(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.pages = {} 
+        clusters = bot.cluster.clusters if bot.cluster else 1
+        self.limiter = RateLimiter(GLOBAL_RATE / clusters)
+        self.jobs: dict[int, asyncio.Task] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    @property
+    def cluster_id(self) -> int:
+        return self.bot.cluster.cluster_id if self.bot.cluster else 0
 
     async def cog_load(self):
         """Runs when cog loads"""
         await self.bot.wait_until_ready()
-        pass
+        self.create_task(self.resume_jobs())
+
+    async def cog_unload(self):
+        for task in (*self.jobs.values(), *self.tasks):
+            task.cancel()
+
+    def create_task(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def spawn_channels(self) -> dict[int, int]:
+        """Spawn channel of each guild handled by this process, from the spawner's cache"""
+        spawner = self.bot.get_cog("CountryBallsSpawner")
+        return spawner.cache if spawner is not None else {}
 
     async def get_broadcast_channels(self):
         try:
             channels = set()
-            async for config in GuildConfig.filter(enabled=True, spawn_channel__isnull=False):
-                channel = self.bot.get_channel(config.spawn_channel)
-                if channel:
-                    channels.add(config.spawn_channel)
+            missing = []
+            cache = self.spawn_channels()
+            for guild_id, channel_id in cache.items():
+                if self.bot.get_channel(channel_id):
+                    channels.add(channel_id)
                 else:
-                    try:
-                        config.enabled = False
-                        await config.save()
-                        logger.debug(f"Disabled guild {config.guild_id} due to missing channel {config.spawn_channel}")
-                    except Exception as e:
-                        logger.error(f"Error disabling guild {config.guild_id}: {str(e)}")
+                    missing.append(guild_id)
+            if missing:
+                try:
+                    await GuildConfig.filter(guild_id__in=missing).update(enabled=False)
+                    for guild_id in missing:
+                        cache.pop(guild_id, None)
+                    logger.debug(f"Disabled {len(missing)} guilds due to missing channels")
+                except Exception as e:
+                    logger.error(f"Error disabling guilds {missing}: {str(e)}")
             return channels
         except Exception as e:
             logger.error(f"Error getting broadcast channels: {str(e)}")
@@ -163,6 +195,11 @@ class Broadcast(commands.Cog):
                 'unknown_guilds': 0
             }
             
+            guild_stats = await self.bot.guild_stats.totals([
+                channel.guild.id for channel_id in channels
+                if (channel := self.bot.get_channel(channel_id)) and channel.guild
+            ])
+
             for channel_id in channels:
                 try:
                     channel = self.bot.get_channel(channel_id)
@@ -187,17 +224,9 @@ class Broadcast(commands.Cog):
                         )
                     })
 
-                    total_catches = await BallInstance.filter(server_id=guild.id).count()
-                    if total_catches >= 20: 
-                        recent_catches = await BallInstance.filter(
-                            server_id=guild.id
-                        ).order_by("-catch_date").limit(10).prefetch_related("player")
-
-                        if recent_catches:
-                            unique_catchers = len(set(ball.player.discord_id for ball in recent_catches))
-                            if unique_catchers == 1:
-                                player = recent_catches[0].player
-                                channel_list[-1]['value'] += f"\n└ ⚠️ **The last 10 balls were all caught by {player}**"
+                    stats = guild_stats.get(guild.id)
+                    if stats and stats.catches >= 20 and stats.streak >= 10:
+                        channel_list[-1]['value'] += f"\n└ ⚠️ **The last {stats.streak} balls were all caught by {stats.last_catcher}**"
 
                 except Exception as e:
                     logger.error(f"Error processing channel {channel_id}: {str(e)}")
@@ -236,6 +265,82 @@ class Broadcast(commands.Cog):
             logger.error(traceback.format_exc())
             await interaction.response.send_message("An error occurred while executing the command. Please try again later.")
 
+    async def run_job(self, job: BroadcastJob, progress: BroadcastProgress | None = None):
+        """Start sending a broadcast to the spawn channels of this process"""
+        if progress is None:
+            progress = await BroadcastProgress.get_or_none(job=job, cluster=self.cluster_id)
+        if progress is not None and not progress.finished and job.pk not in self.jobs:
+            channels = set(self.spawn_channels().values())
+            dispatcher = BroadcastDispatcher(self.bot, job, progress, channels, self.limiter)
+            task = asyncio.create_task(dispatcher.run())
+            self.jobs[job.pk] = task
+
+            def done(task: asyncio.Task):
+                self.jobs.pop(job.pk, None)
+                if not task.cancelled() and task.exception():
+                    logger.error(f"Broadcast #{job.pk} failed", exc_info=task.exception())
+
+            task.add_done_callback(done)
+        # a single process reports the progress of every cluster
+        if self.cluster_id == 0 and job.report_message_id:
+            self.create_task(self.report_progress(job))
+
+    async def report_progress(self, job: BroadcastJob):
+        """Edit the response of the command with the progress until every cluster is done"""
+        message = self.bot.get_partial_messageable(job.report_channel_id).get_partial_message(
+            job.report_message_id
+        )
+        while True:
+            rows = await BroadcastProgress.filter(job=job)
+            finished = all(x.finished for x in rows)
+            text = (
+                f"Broadcast {'complete' if finished else 'in progress'}!\n"
+                f"Successfully sent: {sum(x.sent for x in rows)}/{sum(x.total for x in rows)} channels\n"
+                f"Failed: {sum(x.failed for x in rows)} channels"
+            )
+            if len(rows) > 1 and not finished:
+                text += f"\nClusters done: {sum(x.finished for x in rows)}/{len(rows)}"
+            try:
+                await message.edit(content=text)
+            except discord.HTTPException as e:
+                logger.warning(f"Cannot report the progress of broadcast #{job.pk}: {str(e)}")
+                return
+            if finished:
+                return
+            await asyncio.sleep(REPORT_INTERVAL)
+
+    async def resume_jobs(self):
+        """Resume the broadcasts interrupted by a restart"""
+        # the spawn channels come from the spawner, which may load after this package
+        for _ in range(60):
+            if self.bot.get_cog("CountryBallsSpawner") is not None:
+                break
+            await asyncio.sleep(1)
+        cutoff = datetime.now(timezone.utc) - RESUME_WINDOW
+        for progress in await BroadcastProgress.filter(
+            cluster=self.cluster_id, finished=False
+        ).select_related("job"):
+            if progress.job.created_at < cutoff:
+                progress.finished = True
+                await progress.save(update_fields=("finished",))
+                continue
+            logger.info(f"Resuming broadcast #{progress.job.pk}")
+            await self.run_job(progress.job, progress)
+        if self.cluster_id == 0:
+            # jobs already finished here but still running on other clusters
+            for job in await BroadcastJob.filter(
+                progress__finished=False, created_at__gte=cutoff
+            ).distinct():
+                if job.pk not in self.jobs:
+                    self.create_task(self.report_progress(job))
+
+    @commands.Cog.listener()
+    async def on_cluster_broadcast(self, data):
+        """A broadcast sent from another cluster, for the spawn channels of this one"""
+        job = await BroadcastJob.get_or_none(id=data["job"])
+        if job is not None:
+            await self.run_job(job)
+
     @app_commands.command(name="broadcast", description="Send a broadcast message to all ball spawn channels")
     @app_commands.default_permissions(administrator=True)
     @app_commands.choices(broadcast_type=[
@@ -268,16 +373,12 @@ class Broadcast(commands.Cog):
 
         try:
             channels = await self.get_broadcast_channels()
-            if not channels:
+            if not channels and self.bot.cluster is None:
                 await interaction.response.send_message("No ball spawn channels are currently configured.")
                 return
 
             await interaction.response.send_message("Broadcasting message...")
             
-            success_count = 0
-            fail_count = 0
-            failed_channels = []
-            
             broadcast_message = None
             if message:
                 broadcast_message = (
@@ -289,66 +390,40 @@ class Broadcast(commands.Cog):
                 if not anonymous:
                     broadcast_message += f"\n*Sent by {interaction.user.name}*"
             
-            file = None
             file_data = None
             if attachment and broadcast_type in ["both", "image"]:
                 try:
+                    # downloaded once, every channel is sent the same bytes
                     file_data = await attachment.read()
-                    file = await attachment.to_file()
                 except Exception as e:
                     logger.error(f"Error downloading attachment: {str(e)}")
                     logger.error(traceback.format_exc())
                     await interaction.followup.send("An error occurred while downloading the attachment. Only the text message will be sent.")
-            
-            for channel_id in channels:
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    if channel:
-                        if broadcast_type == "text":
-                            await channel.send(broadcast_message)
-                        elif broadcast_type == "image" and file_data:
-                            new_file = discord.File(
-                                io.BytesIO(file_data),
-                                filename=attachment.filename,
-                                spoiler=attachment.is_spoiler()
-                            )
-                            await channel.send(file=new_file)
-                        else:  # both
-                            if file_data and broadcast_message:
-                                new_file = discord.File(
-                                    io.BytesIO(file_data),
-                                    filename=attachment.filename,
-                                    spoiler=attachment.is_spoiler()
-                                )
-                                await channel.send(broadcast_message, file=new_file)
-                            elif file_data:
-                                new_file = discord.File(
-                                    io.BytesIO(file_data),
-                                    filename=attachment.filename,
-                                    spoiler=attachment.is_spoiler()
-                                )
-                                await channel.send(file=new_file)
-                            elif broadcast_message:
-                                await channel.send(broadcast_message)
-                        success_count += 1
-                    else:
-                        fail_count += 1
-                        failed_channels.append(f"Unknown Channel (ID: {channel_id})")
-                except Exception as e:
-                    logger.error(f"Error broadcasting to channel {channel_id}: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    fail_count += 1
-                    if channel:
-                        failed_channels.append(f"{channel.guild.name} - #{channel.name}")
-                    else:
-                        failed_channels.append(f"Unknown Channel (ID: {channel_id})")
-            
-            result_message = f"Broadcast complete!\nSuccessfully sent: {success_count} channels\nFailed: {fail_count} channels"
-            if failed_channels:
-                result_message += "\n\nFailed channels:\n" + "\n".join(failed_channels)
-            
-            await interaction.followup.send(result_message)
-                
+            if broadcast_type == "image":
+                broadcast_message = None
+            if not broadcast_message and not file_data:
+                await interaction.followup.send("There is nothing left to send.")
+                return
+
+            response = await interaction.original_response()
+            job = await BroadcastJob.create(
+                author_id=interaction.user.id,
+                message=broadcast_message,
+                attachment=file_data,
+                filename=attachment.filename if file_data and attachment else None,
+                spoiler=attachment.is_spoiler() if file_data and attachment else False,
+                report_channel_id=response.channel.id,
+                report_message_id=response.id,
+            )
+            # one progress row per cluster, resumed by each of them after a restart
+            clusters = self.bot.cluster.clusters if self.bot.cluster else 1
+            await BroadcastProgress.bulk_create(
+                [BroadcastProgress(job=job, cluster=i) for i in range(clusters)]
+            )
+            if self.bot.cluster is not None:
+                self.bot.cluster.publish("broadcast", {"job": job.pk})
+            await self.run_job(job)
+
         except Exception as e:
             logger.error(f"Error in broadcast: {str(e)}")
             logger.error(traceback.format_exc())
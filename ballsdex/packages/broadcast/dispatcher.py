@@ -0,0 +1,158 @@
+"""
+Concurrent delivery of broadcasts to the spawn channels, resumable after a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import discord
+
+from ballsdex.core.models import BroadcastJob, BroadcastProgress
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.packages.broadcast.dispatcher")
+
+# Discord allows 50 requests per second for the whole bot, shared by every cluster
+GLOBAL_RATE = 45
+CONCURRENCY = 10
+SAVE_INTERVAL = 5
+
+
+class RateLimiter:
+    """
+    Space out requests to stay under a number of requests per second.
+
+    Each channel is a separate rate limit bucket that discord.py already tracks, this only
+    covers the global limit which is not known until it is hit.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(self.next, now)
+        self.next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BroadcastDispatcher:
+    """
+    Send a broadcast job to the spawn channels of this process.
+
+    Channels are sent in increasing ID order by `CONCURRENCY` workers. The progress row is
+    saved every `SAVE_INTERVAL` seconds with the highest channel ID below which every channel
+    was handled, so a restarted process skips them. Channels sent after this checkpoint may
+    receive the message twice if the process stops.
+
+    Parameters
+    ----------
+    bot: BallsDexBot
+        The bot sending the messages.
+    job: BroadcastJob
+        The content of the broadcast.
+    progress: BroadcastProgress
+        The progress of this process, updated as the messages are sent.
+    channels: set[int]
+        The spawn channels of this process.
+    limiter: RateLimiter
+        Limiter shared by all the broadcasts of this process.
+    """
+
+    def __init__(
+        self,
+        bot: "BallsDexBot",
+        job: BroadcastJob,
+        progress: BroadcastProgress,
+        channels: set[int],
+        limiter: RateLimiter,
+    ):
+        self.bot = bot
+        self.job = job
+        self.progress = progress
+        self.limiter = limiter
+        self.channels = sorted(x for x in channels if x > progress.checkpoint)
+        self.done = [False] * len(self.channels)
+        # channels before this index are all handled
+        self.handled = 0
+        if not progress.total:
+            progress.total = len(channels)
+
+    def _kwargs(self) -> dict[str, Any]:
+        kwargs: dict[str, Any] = {}
+        if self.job.message:
+            kwargs["content"] = self.job.message
+        if self.job.attachment:
+            # the downloaded bytes are shared by every request, BytesIO does not copy them
+            kwargs["file"] = discord.File(
+                io.BytesIO(self.job.attachment),
+                filename=self.job.filename or "attachment",
+                spoiler=self.job.spoiler,
+            )
+        return kwargs
+
+    async def send(self, channel_id: int) -> bool:
+        await self.limiter.wait()
+        try:
+            await self.bot.get_partial_messageable(channel_id).send(**self._kwargs())
+        except discord.HTTPException as e:
+            log.debug(f"Failed to broadcast to channel {channel_id}: {e}")
+            return False
+        except Exception:
+            # connection errors and timeouts must not stop the worker
+            log.warning(f"Failed to broadcast to channel {channel_id}", exc_info=True)
+            return False
+        return True
+
+    async def _worker(self, channels):
+        for index, channel_id in channels:
+            if await self.send(channel_id):
+                self.progress.sent += 1
+            else:
+                self.progress.failed += 1
+            self.done[index] = True
+            while self.handled < len(self.done) and self.done[self.handled]:
+                self.handled += 1
+            if self.handled:
+                self.progress.checkpoint = self.channels[self.handled - 1]
+
+    async def _save_periodically(self):
+        while True:
+            await asyncio.sleep(SAVE_INTERVAL)
+            await self.save()
+
+    async def save(self):
+        await BroadcastProgress.filter(id=self.progress.pk).update(
+            checkpoint=self.progress.checkpoint,
+            total=self.progress.total,
+            sent=self.progress.sent,
+            failed=self.progress.failed,
+            finished=self.progress.finished,
+        )
+
+    async def run(self):
+        # a single iterator shared by the workers hands each channel once
+        channels = iter(enumerate(self.channels))
+        saver = asyncio.create_task(self._save_periodically())
+        try:
+            # if a worker fails, the others are cancelled instead of sending on their own
+            async with asyncio.TaskGroup() as group:
+                for _ in range(CONCURRENCY):
+                    group.create_task(self._worker(channels))
+            self.progress.finished = True
+        finally:
+            saver.cancel()
+            await self.save()
+        log.info(
+            f"Broadcast #{self.job.pk} sent to {self.progress.sent} channels, "
+            f"{self.progress.failed} failed"
+        )
@@ -1,6 +1,7 @@
+import asyncio
 import importlib
 import logging
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Any, Callable, cast
 
 import discord
 from discord.ext import commands
@@ -8,7 +9,7 @@ from tortoise.exceptions import DoesNotExist
 
 from ballsdex.core.models import GuildConfig
 from ballsdex.packages.countryballs.countryball import BallSpawnView
-from ballsdex.packages.countryballs.spawn import BaseSpawnManager
+from ballsdex.packages.countryballs.spawn import BaseSpawnManager, RawMessage
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -32,18 +33,79 @@ class CountryBallsSpawner(commands.Cog):
         spawn_manager = getattr(module, class_name)
         self.spawn_manager = spawn_manager(bot)
 
+        self._parse_message_create: Callable[[Any], None] | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def cog_load(self):
+        if settings.spawn_fast_path:
+            # the gateway reads this same dict, no reconnection needed
+            parsers = self.bot._connection.parsers
+            self._parse_message_create = parsers["MESSAGE_CREATE"]
+            parsers["MESSAGE_CREATE"] = self.parse_message_create
+
+    async def cog_unload(self):
+        if self._parse_message_create:
+            self.bot._connection.parsers["MESSAGE_CREATE"] = self._parse_message_create
+            self._parse_message_create = None
+
     async def load_cache(self):
         i = 0
         async for config in GuildConfig.filter(enabled=True, spawn_channel__isnull=False).only(
             "guild_id", "spawn_channel"
         ):
+            if not self.bot.owns_guild(config.guild_id):
+                continue  # handled by another cluster
             self.cache[config.guild_id] = config.spawn_channel
             i += 1
         grammar = "" if i == 1 else "s"
         log.info(f"Loaded {i} guild{grammar} in cache.")
 
+    def parse_message_create(self, data: dict[str, Any]):
+        """
+        Replaces the MESSAGE_CREATE parser of discord.py when the spawn fast path is enabled.
+
+        Spawn activity is read from the raw payload, and the `discord.Message` object is only
+        built when something else may need it.
+        """
+        guild_id = data.get("guild_id")
+        if (
+            guild_id is not None
+            and not data["author"].get("bot")
+            and data.get("webhook_id") is None
+            and int(guild_id) in self.cache
+            and int(guild_id) not in self.bot.blacklist_guild
+        ):
+            guild = self.bot._connection._get_guild(int(guild_id))
+            if guild:
+                message = RawMessage(data, guild, self.bot._connection)
+                task = asyncio.create_task(self.handle_spawn(cast(discord.Message, message)))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+        if self._parse_message_create and self.needs_message(data):
+            self._parse_message_create(data)
+
+    def needs_message(self, data: dict[str, Any]) -> bool:
+        """
+        Whether a raw message must go through discord.py: DMs, possible text commands, or when
+        other listeners are waiting for messages.
+        """
+        if "guild_id" not in data:
+            return True
+        if self.bot._listeners.get("message") or any(
+            getattr(x, "__self__", None) is not self
+            for x in self.bot.extra_events.get("on_message", ())
+        ):
+            return True
+        if data.get("content", "").startswith(settings.prefix):
+            return True
+        user = self.bot.user
+        return user is not None and any(int(x["id"]) == user.id for x in data.get("mentions", ()))
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        if self._parse_message_create:
+            return  # already handled from the raw event
         if message.author.bot or message.webhook_id is not None:
             return
         guild = message.guild
@@ -53,7 +115,10 @@ class CountryBallsSpawner(commands.Cog):
             return
         if guild.id in self.bot.blacklist_guild:
             return
+        await self.handle_spawn(message)
 
+    async def handle_spawn(self, message: discord.Message):
+        guild = cast(discord.Guild, message.guild)
         result = await self.spawn_manager.handle_message(message)
         if result is False:
             return
@@ -4,25 +4,14 @@ import logging
 import math
 import random
 import string
-from datetime import datetime
 from typing import TYPE_CHECKING
 
 import discord
 from discord.ui import Button, Modal, TextInput, View, button
-from tortoise.timezone import get_default_timezone
-from tortoise.timezone import now as tortoise_now
 
 from ballsdex.core.metrics import caught_balls
-from ballsdex.core.models import (
-    Ball,
-    BallInstance,
-    Player,
-    Special,
-    Trade,
-    TradeObject,
-    balls,
-    specials,
-)
+from ballsdex.core.models import Ball, BallInstance, Player, Special, Trade, TradeObject
+from ballsdex.core.utils.owned import owned_balls
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -196,11 +185,9 @@ class BallSpawnView(View):
         """
         Get a new instance with a random countryball. Rarity values are taken into account.
         """
-        countryballs = list(filter(lambda m: m.enabled, balls.values()))
-        if not countryballs:
+        if not bot.ball_sampler:
             raise RuntimeError("No ball to spawn")
-        rarities = [x.rarity for x in countryballs]
-        cb = random.choices(population=countryballs, weights=rarities, k=1)[0]
+        cb = bot.ball_sampler.sample()
         return cls(bot, cb)
 
     @property
@@ -208,30 +195,8 @@ class BallSpawnView(View):
         return self.model.country
 
     def get_random_special(self) -> Special | None:
-        population = [
-            x
-            for x in specials.values()
-            # handle null start/end dates with infinity times
-            if (x.start_date or datetime.min.replace(tzinfo=get_default_timezone()))
-            <= tortoise_now()
-            <= (x.end_date or datetime.max.replace(tzinfo=get_default_timezone()))
-        ]
-
-        if not population:
-            return None
-
-        common_weight: float = 1 - sum(x.rarity for x in population)
-
-        if common_weight < 0:
-            common_weight = 0
-
-        weights = [x.rarity for x in population] + [common_weight]
-        # None is added representing the common countryball
-        special: Special | None = random.choices(
-            population=population + [None], weights=weights, k=1
-        )[0]
-
-        return special
+        # None represents the common countryball
+        return self.bot.special_schedule.sample()
 
     async def spawn(self, channel: discord.TextChannel) -> bool:
         """
@@ -349,7 +314,7 @@ class BallSpawnView(View):
         self.caught = True
         self.catch_button.disabled = True
         player = player or (await Player.get_or_create(discord_id=user.id))[0]
-        is_new = not await BallInstance.filter(player=player, ball=self.model).exists()
+        is_new = self.model.pk not in await owned_balls.get(player.pk)
 
         if self.ballinstance:
             # if specified, do not create a countryball but switch owner
@@ -362,6 +327,7 @@ class BallSpawnView(View):
             self.ballinstance.player = player
             self.ballinstance.locked = None  # type: ignore
             await self.ballinstance.save(update_fields=("player_id", "trade_player_id", "locked"))
+            owned_balls.transfer(self.ballinstance, self.ballinstance.trade_player_id)
             return self.ballinstance, is_new
 
         # stat may vary by +/- 20% of base stat
@@ -393,6 +359,8 @@ class BallSpawnView(View):
         )
 
         # logging and stats
+        if guild:
+            self.bot.guild_stats.record(guild.id, user.id, ball.catch_date)
         log.log(
             logging.INFO if user.id in self.bot.catch_log else logging.DEBUG,
             f"{user} caught {settings.collectible_name} {self.model}, {special=}",
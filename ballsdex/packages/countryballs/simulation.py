@@ -0,0 +1,406 @@
+"""
+Offline simulation of the spawn managers.
+
+Message streams, synthetic or recorded, are replayed through any `BaseSpawnManager` on an
+event loop with a virtual clock, so hours of traffic run in seconds and `asyncio.sleep` in the
+managers costs nothing. Fake messages carry only the attributes the managers read.
+
+Run `python3 -m ballsdex.packages.countryballs.simulation --help` for the options. Several
+managers can be given to compare them on the same stream.
+
+Recorded streams are JSON lines files, one message per line, sorted by time:
+
+    {"t": 12.5, "guild": 1234, "members": 250, "author": 5678, "content": "hello"}
+
+`t` is in seconds from the start of the recording.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import heapq
+import importlib
+import json
+import math
+import random
+import selectors
+import sys
+import time
+import types
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generator, Iterable, Iterator, cast
+
+import discord
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+    from ballsdex.packages.countryballs.spawn import BaseSpawnManager
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SIZE_BUCKETS = ((5, "1-4"), (100, "5-99"), (1000, "100-999"), (math.inf, "1000+"))
+CONTENTS = ("ok", "lol", "hello everyone", "what are we doing today?", "a" * 80)
+
+
+class _VirtualSelector:
+    """
+    Selector that never blocks. Waiting for a timeout advances the clock of the loop instead.
+    """
+
+    def __init__(self, selector: selectors.BaseSelector, loop: VirtualClockLoop):
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout: float | None = None):
+        events = self._selector.select(0)
+        if not events and timeout:
+            self._loop.advance(timeout)
+        return events
+
+    def __getattr__(self, name: str):
+        return getattr(self._selector, name)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop whose clock only moves when every task is waiting on a timer, jumping straight
+    to the next scheduled callback.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._virtual_time = 0.0
+        self._selector = _VirtualSelector(self._selector, self)  # type: ignore
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float):
+        self._virtual_time += seconds
+
+    def now(self) -> datetime:
+        return EPOCH + timedelta(seconds=self._virtual_time)
+
+
+@dataclass(slots=True, eq=False)
+class FakeGuild:
+    id: int
+    member_count: int
+    name: str = "Simulated guild"
+
+
+@dataclass(slots=True, eq=False)
+class FakeAuthor:
+    id: int
+    bot: bool = False
+
+
+@dataclass(slots=True, eq=False)
+class FakeMessage:
+    guild: FakeGuild
+    author: FakeAuthor
+    content: str
+    created_at: datetime
+    _state: Any
+    webhook_id: int | None = None
+
+
+@dataclass(slots=True)
+class SimulatedMessage:
+    """
+    A message of the stream, `t` being seconds since the start.
+    """
+
+    t: float
+    guild_id: int
+    member_count: int
+    author_id: int
+    content: str
+
+
+@dataclass
+class SimulationReport:
+    manager: str
+    guilds: int
+    duration: float
+    messages: int = 0
+    spawns: int = 0
+    cpu_time: float = 0
+    max_cpu_time: float = 0
+    contended: int = 0
+    max_in_flight: int = 0
+    memory: int = 0
+    wall_time: float = 0
+    guild_sizes: dict[int, str] = field(default_factory=dict)
+    spawns_per_bucket: dict[str, int] = field(default_factory=dict)
+
+    def print(self):
+        hours = self.duration / 3600
+        guild_hours = max(self.guilds * hours, 1e-9)
+        messages = max(self.messages, 1)
+        print(f"== {self.manager}")
+        print(
+            f"{self.messages} messages in {self.guilds} guilds over {hours:.1f} hours, "
+            f"simulated in {self.wall_time:.2f} s"
+        )
+        print(f"{'spawns':<28} {self.spawns:>12} ({self.spawns / guild_hours:.3f} /guild-hour)")
+        for _, name in SIZE_BUCKETS:
+            count = sum(1 for x in self.guild_sizes.values() if x == name)
+            if count:
+                rate = self.spawns_per_bucket.get(name, 0) / (count * hours)
+                print(f"{f'  {name} members':<28} {rate:>12.3f} /guild-hour ({count} guilds)")
+        print(f"{'cpu per message':<28} {self.cpu_time / messages * 1e6:>12.2f} µs")
+        print(f"{'slowest message':<28} {self.max_cpu_time * 1e6:>12.2f} µs")
+        print(
+            f"{'contended messages':<28} {self.contended:>12} "
+            f"({self.contended / messages:.1%}, max {self.max_in_flight} in flight)"
+        )
+        print(f"{'memory per guild':<28} {self.memory / max(self.guilds, 1):>12.0f} bytes")
+
+
+class _Timed:
+    """
+    Await a coroutine while measuring the time spent running its steps, excluding the time
+    spent suspended.
+    """
+
+    __slots__ = ("coro", "elapsed")
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.elapsed = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = self.coro.send(value)
+                else:
+                    yielded = self.coro.throw(error)
+            except StopIteration as e:
+                self.elapsed += time.perf_counter() - start
+                return e.value
+            self.elapsed += time.perf_counter() - start
+            try:
+                value = yield yielded
+                error = None
+            except BaseException as e:
+                value = None
+                error = e
+
+
+def synthetic_stream(
+    guilds: int, duration: float, seed: int = 0, max_rate: float = 3000
+) -> Iterator[SimulatedMessage]:
+    """
+    Generate messages for guilds of random sizes.
+
+    Member counts are log-uniform up to 100k. Each guild posts as a Poisson process whose rate
+    grows with its size, from a few chatters with very unequal activity.
+
+    Parameters
+    ----------
+    guilds: int
+        Number of guilds.
+    duration: float
+        Length of the stream in seconds.
+    seed: int
+        Seed of the random generator, the same seed gives the same stream.
+    max_rate: float
+        Maximum number of messages per hour in a guild.
+    """
+    rng = random.Random(seed)
+    profiles: list[tuple[int, int, float, list[int], list[float]]] = []
+    heap: list[tuple[float, int]] = []
+    for i in range(guilds):
+        members = int(math.exp(rng.uniform(math.log(2), math.log(100_000))))
+        rate = min(rng.lognormvariate(0.8 * math.log(members), 1.0), max_rate) / 3600
+        chatters = min(members, rng.randint(1, 40))
+        authors = [rng.getrandbits(60) for _ in range(chatters)]
+        weights = [1 / (x + 1) for x in range(chatters)]
+        profiles.append((rng.getrandbits(60), members, rate, authors, weights))
+        heap.append((rng.expovariate(rate), i))
+    heapq.heapify(heap)
+
+    while heap and heap[0][0] < duration:
+        t, i = heap[0]
+        guild_id, members, rate, authors, weights = profiles[i]
+        heapq.heapreplace(heap, (t + rng.expovariate(rate), i))
+        yield SimulatedMessage(
+            t, guild_id, members, rng.choices(authors, weights)[0], rng.choice(CONTENTS)
+        )
+
+
+def recorded_stream(path: Path) -> Iterator[SimulatedMessage]:
+    """
+    Read a recorded stream, see the module documentation for the format.
+    """
+    with path.open() as file:
+        for line in file:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            yield SimulatedMessage(
+                float(data["t"]),
+                int(data["guild"]),
+                int(data["members"]),
+                int(data["author"]),
+                data.get("content", ""),
+            )
+
+
+def deep_sizeof(obj: Any, exclude: Iterable[Any] = ()) -> int:
+    """
+    Approximate the memory held by an object and everything it references, ignoring shared
+    objects like modules, classes and functions.
+    """
+    seen = {id(x) for x in exclude}
+    shared = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+    size = 0
+    pending = [obj]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, shared):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        pending.extend(gc.get_referents(current))
+    return size
+
+
+def _size_bucket(member_count: int) -> str:
+    for limit, name in SIZE_BUCKETS:
+        if member_count < limit:
+            return name
+    return SIZE_BUCKETS[-1][1]
+
+
+async def _simulate(
+    manager: BaseSpawnManager, stream: Iterable[SimulatedMessage], report: SimulationReport
+):
+    loop = cast(VirtualClockLoop, asyncio.get_running_loop())
+    state = types.SimpleNamespace(intents=discord.Intents(message_content=True))
+    guilds: dict[int, FakeGuild] = {}
+    authors: dict[int, FakeAuthor] = {}
+    in_flight: dict[int, int] = {}
+    tasks: set[asyncio.Task] = set()
+
+    async def handle(message: FakeMessage):
+        guild_id = message.guild.id
+        timed = _Timed(manager.handle_message(cast(discord.Message, message)))
+        try:
+            result = await timed
+        finally:
+            in_flight[guild_id] -= 1
+            report.cpu_time += timed.elapsed
+            report.max_cpu_time = max(report.max_cpu_time, timed.elapsed)
+        if result is not False:
+            report.spawns += 1
+            bucket = report.guild_sizes[guild_id]
+            report.spawns_per_bucket[bucket] = report.spawns_per_bucket.get(bucket, 0) + 1
+
+    for item in stream:
+        if item.t > loop.time():
+            await asyncio.sleep(item.t - loop.time())
+        guild = guilds.get(item.guild_id)
+        if guild is None:
+            guild = guilds[item.guild_id] = FakeGuild(item.guild_id, item.member_count)
+            report.guild_sizes[item.guild_id] = _size_bucket(item.member_count)
+        author = authors.get(item.author_id)
+        if author is None:
+            author = authors[item.author_id] = FakeAuthor(item.author_id)
+
+        # like discord.py, every event is dispatched to its own task
+        report.messages += 1
+        if in_flight.get(guild.id):
+            report.contended += 1
+        in_flight[guild.id] = in_flight.get(guild.id, 0) + 1
+        report.max_in_flight = max(report.max_in_flight, len(tasks) + 1)
+        message = FakeMessage(guild, author, item.content, loop.now(), state)
+        task = asyncio.create_task(handle(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    report.duration = max(report.duration, loop.time())
+    report.guilds = len(guilds)
+    report.memory = deep_sizeof(manager, exclude=(getattr(manager, "bot", None), loop, state))
+
+
+def simulate(
+    manager_class: type[BaseSpawnManager],
+    stream: Iterable[SimulatedMessage],
+    duration: float = 0,
+) -> SimulationReport:
+    """
+    Replay a message stream through a new instance of a spawn manager.
+
+    Parameters
+    ----------
+    manager_class: type[BaseSpawnManager]
+        The spawn manager to evaluate. It receives a placeholder instead of the bot.
+    stream: Iterable[SimulatedMessage]
+        The messages, sorted by time.
+    duration: float
+        Length of the simulated period in seconds, defaults to the time of the last message.
+    """
+    loop = VirtualClockLoop()
+    manager = manager_class(cast("BallsDexBot", types.SimpleNamespace()))
+    report = SimulationReport(f"{manager_class.__module__}.{manager_class.__name__}", 0, duration)
+    start = time.perf_counter()
+    try:
+        loop.run_until_complete(_simulate(manager, stream, report))
+    finally:
+        loop.close()
+    report.wall_time = time.perf_counter() - start
+    return report
+
+
+def _import(path: str) -> type[BaseSpawnManager]:
+    module_path, class_name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m ballsdex.packages.countryballs.simulation",
+        description="Replay a message stream through spawn managers with a virtual clock.",
+    )
+    parser.add_argument(
+        "managers",
+        nargs="*",
+        default=["ballsdex.packages.countryballs.spawn.SpawnManager"],
+        help="Import path of the spawn managers to compare",
+    )
+    parser.add_argument("--guilds", type=int, default=200, help="Number of synthetic guilds")
+    parser.add_argument("--hours", type=float, default=6, help="Length of the synthetic stream")
+    parser.add_argument(
+        "--max-rate", type=float, default=3000, help="Maximum messages per hour in a guild"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic stream")
+    parser.add_argument(
+        "--replay", type=Path, help="Recorded JSON lines stream to use instead of synthetic data"
+    )
+    args = parser.parse_args()
+
+    for path in args.managers:
+        # same thresholds for every manager relying on the global generator
+        random.seed(args.seed)
+        if args.replay:
+            stream = recorded_stream(args.replay)
+            duration = 0
+        else:
+            duration = args.hours * 3600
+            stream = synthetic_stream(args.guilds, duration, args.seed, args.max_rate)
+        simulate(_import(path), stream, duration).print()
+
+
+if __name__ == "__main__":
+    main()
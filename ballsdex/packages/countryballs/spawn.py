@@ -1,11 +1,12 @@
 import asyncio
+import heapq
 import logging
 import random
 from abc import abstractmethod
 from collections import deque, namedtuple
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
 import discord
 from discord.utils import format_dt
@@ -18,8 +19,85 @@ if TYPE_CHECKING:
 log = logging.getLogger("ballsdex.packages.countryballs")
 
 SPAWN_CHANCE_RANGE = (40, 55)
+# seconds during which the messages of a guild are not counted after one was
+SPAWN_MESSAGE_COOLDOWN = 10
 
-CachedMessage = namedtuple("CachedMessage", ["content", "author_id"])
+RawAuthor = namedtuple("RawAuthor", ["id", "bot"])
+
+
+class RawMessage:
+    """
+    Lightweight view of a raw MESSAGE_CREATE gateway payload, given to the spawn managers
+    instead of a `discord.Message` when the spawn fast path is enabled.
+
+    Only the attributes below are available. `author` has an `id` and a `bot` flag.
+    """
+
+    __slots__ = ("id", "channel_id", "guild", "author", "content", "webhook_id", "_state")
+
+    def __init__(self, data: dict[str, Any], guild: discord.Guild, state: Any):
+        self.id = int(data["id"])
+        self.channel_id = int(data["channel_id"])
+        self.guild = guild
+        self.author = RawAuthor(int(data["author"]["id"]), data["author"].get("bot", False))
+        self.content: str = data.get("content", "")
+        self.webhook_id = int(data["webhook_id"]) if data.get("webhook_id") else None
+        self._state = state
+
+    @property
+    def created_at(self) -> datetime:
+        return discord.utils.snowflake_time(self.id)
+
+
+class ChatterWindow:
+    """
+    The authors of the most recent messages in a guild, with statistics maintained as
+    messages enter and leave the window, in constant time.
+
+    Only the author ID and whether the message was short are kept for each message, packed
+    in a single integer.
+
+    Parameters
+    ----------
+    maxlen: int
+        Number of messages kept.
+    """
+
+    __slots__ = ("maxlen", "entries", "author_counts", "short_count")
+
+    def __init__(self, maxlen: int = 100):
+        self.maxlen = maxlen
+        # author_id << 1 | is_short
+        self.entries: deque[int] = deque()
+        self.author_counts: dict[int, int] = {}
+        self.short_count = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def append(self, author_id: int, short: bool):
+        if len(self.entries) >= self.maxlen:
+            old = self.entries.popleft()
+            self.short_count -= old & 1
+            old_author = old >> 1
+            remaining = self.author_counts[old_author] - 1
+            if remaining:
+                self.author_counts[old_author] = remaining
+            else:
+                del self.author_counts[old_author]
+        self.entries.append(author_id << 1 | short)
+        self.short_count += short
+        self.author_counts[author_id] = self.author_counts.get(author_id, 0) + 1
+
+    @property
+    def distinct_authors(self) -> int:
+        return len(self.author_counts)
+
+    def share(self, author_id: int) -> float:
+        """
+        Part of the window's capacity filled by messages of this author.
+        """
+        return self.author_counts.get(author_id, 0) / self.maxlen
 
 
 class BaseSpawnManager:
@@ -42,7 +120,8 @@ class BaseSpawnManager:
         Parameters
         ----------
         message: discord.Message
-            The message that triggered the event
+            The message that triggered the event. With the spawn fast path enabled, this is
+            a `RawMessage` exposing only a few attributes.
 
         Returns
         -------
@@ -92,71 +171,94 @@ class SpawnCooldown:
     threshold: int
         The number `scaled_message_count` has to reach for spawn.
         Determined randomly with `SPAWN_CHANCE_RANGE`
-    lock: asyncio.Lock
-        Used to ratelimit messages and ignore fast spam
-    message_cache: ~collections.deque[CachedMessage]
-        A list of recent messages used to reduce the spawn chance when too few different chatters
-        are present. Limited to the 100 most recent messages in the guild.
+    cooldown_until: float
+        Event loop time before which messages are not counted, used to ratelimit messages and
+        ignore fast spam
+    last_seen: float
+        Event loop time of the last message, used to forget inactive guilds
+    message_cache: ChatterWindow
+        The authors of the recent messages, used to reduce the spawn chance when too few
+        different chatters are present. Limited to the 100 most recent messages in the guild.
     """
 
     time: datetime
     # initialize partially started, to reduce the dead time after starting the bot
     scaled_message_count: float = field(default=SPAWN_CHANCE_RANGE[0] // 2)
     threshold: int = field(default_factory=lambda: random.randint(*SPAWN_CHANCE_RANGE))
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
-    message_cache: deque[CachedMessage] = field(default_factory=lambda: deque(maxlen=100))
+    cooldown_until: float = field(default=0, init=False)
+    last_seen: float = field(default=0, init=False)
+    message_cache: ChatterWindow = field(default_factory=ChatterWindow)
 
     def reset(self, time: datetime):
         self.scaled_message_count = 1.0
         self.threshold = random.randint(*SPAWN_CHANCE_RANGE)
-        try:
-            self.lock.release()
-        except RuntimeError:  # lock is not acquired
-            pass
         self.time = time
 
+    def on_cooldown(self) -> bool:
+        return asyncio.get_running_loop().time() < self.cooldown_until
+
     async def increase(self, message: discord.Message) -> bool:
-        # this is a deque, not a list
-        # its property is that, once the max length is reached (100 for us),
-        # the oldest element is removed, thus we only have the last 100 messages in memory
-        self.message_cache.append(
-            CachedMessage(content=message.content, author_id=message.author.id)
-        )
+        # once the max length is reached (100 for us), the oldest message is removed
+        self.message_cache.append(message.author.id, len(message.content) < 5)
 
-        if self.lock.locked():
+        now = asyncio.get_running_loop().time()
+        if now < self.cooldown_until:
             return False
-
-        async with self.lock:
-            message_multiplier = 1
-            if message.guild.member_count < 5 or message.guild.member_count > 1000:  # type: ignore
-                message_multiplier /= 2
-            if message._state.intents.message_content and len(message.content) < 5:
-                message_multiplier /= 2
-            if len(set(x.author_id for x in self.message_cache)) < 4 or (
-                len(list(filter(lambda x: x.author_id == message.author.id, self.message_cache)))
-                / self.message_cache.maxlen  # type: ignore
-                > 0.4
-            ):
-                message_multiplier /= 2
-            self.scaled_message_count += message_multiplier
-            await asyncio.sleep(10)
+        self.cooldown_until = now + SPAWN_MESSAGE_COOLDOWN
+
+        message_multiplier = 1
+        if message.guild.member_count < 5 or message.guild.member_count > 1000:  # type: ignore
+            message_multiplier /= 2
+        if message._state.intents.message_content and len(message.content) < 5:
+            message_multiplier /= 2
+        if (
+            self.message_cache.distinct_authors < 4
+            or self.message_cache.share(message.author.id) > 0.4
+        ):
+            message_multiplier /= 2
+        self.scaled_message_count += message_multiplier
         return True
 
 
 class SpawnManager(BaseSpawnManager):
+    # guilds without messages for that many seconds are forgotten, and start over like after
+    # a restart when they become active again
+    idle_timeout = 3 * 3600
+
     def __init__(self, bot: "BallsDexBot"):
         super().__init__(bot)
         self.cooldowns: dict[int, SpawnCooldown] = {}
+        # one (expiry, guild_id) entry per cooldown, postponed lazily when popped
+        self.expiry: list[tuple[float, int]] = []
+
+    def evict_idle(self, now: float):
+        """
+        Forget the guilds that have been inactive for longer than `idle_timeout`.
+        """
+        while self.expiry and self.expiry[0][0] <= now:
+            _, guild_id = heapq.heappop(self.expiry)
+            cooldown = self.cooldowns.get(guild_id)
+            if cooldown is None:
+                continue
+            expires = cooldown.last_seen + self.idle_timeout
+            if expires <= now:
+                del self.cooldowns[guild_id]
+            else:
+                heapq.heappush(self.expiry, (expires, guild_id))
 
     async def handle_message(self, message: discord.Message) -> bool:
         guild = message.guild
         if not guild:
             return False
 
+        now = asyncio.get_running_loop().time()
+        self.evict_idle(now)
         cooldown = self.cooldowns.get(guild.id, None)
         if not cooldown:
             cooldown = SpawnCooldown(message.created_at)
             self.cooldowns[guild.id] = cooldown
+            heapq.heappush(self.expiry, (now + self.idle_timeout, guild.id))
+        cooldown.last_seen = now
 
         delta_t = (message.created_at - cooldown.time).total_seconds()
         # change how the threshold varies according to the member count, while nuking farm servers
@@ -227,19 +329,14 @@ class SpawnManager(BaseSpawnManager):
         penalities: list[str] = []
         if guild.member_count < 5 or guild.member_count > 1000:
             penalities.append("Server has less than 5 or more than 1000 members")
-        if any(len(x.content) < 5 for x in cooldown.message_cache):
+        if cooldown.message_cache.short_count:
             penalities.append("Some cached messages are less than 5 characters long")
 
-        authors_set = set(x.author_id for x in cooldown.message_cache)
-        low_chatters = len(authors_set) < 4
+        low_chatters = cooldown.message_cache.distinct_authors < 4
         # check if one author has more than 40% of messages in cache
         major_chatter = any(
-            (
-                len(list(filter(lambda x: x.author_id == author, cooldown.message_cache)))
-                / cooldown.message_cache.maxlen  # type: ignore
-                > 0.4
-            )
-            for author in authors_set
+            cooldown.message_cache.share(author) > 0.4
+            for author in cooldown.message_cache.author_counts
         )
         # this mess is needed since either conditions make up to a single penality
         if low_chatters:
@@ -275,7 +372,7 @@ class SpawnManager(BaseSpawnManager):
         )
 
         informations: list[str] = []
-        if cooldown.lock.locked():
+        if cooldown.on_cooldown():
             informations.append("The manager is currently on cooldown.")
         if delta < 600:
             informations.append(
@@ -25,6 +25,7 @@ from ballsdex.core.models import (
 )
 from ballsdex.settings import settings
 from ballsdex.core.bot import BallsDexBot
+from ballsdex.core.utils.owned import owned_balls
 import ballsdex.packages.config.components as Components
 from collections import defaultdict
 
@@ -55,7 +56,7 @@ class Owners(commands.GroupCog, name="owners"):
         super().__init__()
 
     async def get_random_ball(self, player: Player) -> Ball | None:
-        owned_ids = await BallInstance.filter(player=player).values_list("ball_id", flat=True)
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(rarity__gte=0.03, rarity__lte=30.0, enabled=True).all()
 
         if not all_balls:
@@ -82,7 +83,7 @@ class Owners(commands.GroupCog, name="owners"):
         return random.choice(choices)
 
     async def getdasigmaballmate(self, player: Player) -> Ball | None:
-        owned_ids = await BallInstance.filter(player=player).values_list("ball_id", flat=True)
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(rarity__gte=0.03, rarity__lte=5.0, enabled=True).all() # same with the get_random_balls
 
         if not all_balls:
@@ -28,9 +28,9 @@ from ballsdex.core.models import (
 )
 from ballsdex.settings import settings
 from ballsdex.core.bot import BallsDexBot
+from ballsdex.core.utils.owned import owned_balls
 import ballsdex.packages.config.components as Components
 from collections import defaultdict
-from ballsdex.core.image_generator.image_gen import draw_card
 from io import BytesIO
 from ballsdex.core.utils.transformers import (
     BallEnabledTransform,
@@ -44,14 +44,12 @@ from ballsdex.core.utils.transformers import (
 # - paqueta
 # -------
 
-# Pick wallet storage - stores {user_id: number_of_picks}
-pick_wallet = defaultdict(int)
+# Pick balances are kept in bot.wallets under this currency
+PICKS_CURRENCY = "picks"
 
-# Custom daily usage tracking - stores {user_id: {'count': int, 'first_use': datetime}}
-daily_usage_tracking = {}
-
-# Command execution cooldown tracking - stores {user_id: datetime}
-command_cooldowns = {}
+# Daily usage and command execution cooldowns are kept in bot.cooldowns under these names
+DAILY_USAGE = "picks.daily"
+COMMAND_USAGE = "picks.command"
 
 # Ongoing pick sessions tracking - stores {user_id: {'daily': bool, 'weekly': bool, 'picks': bool}}
 ongoing_pick_sessions = defaultdict(lambda: {'daily': False, 'weekly': False, 'picks': False})
@@ -68,17 +66,17 @@ COMMAND_COOLDOWN = timedelta(seconds=5)  # 5-second cooldown between commands
 gamble_cooldowns = {} 
 
 
-def check_command_cooldown(user_id: int) -> tuple[bool, timedelta | None]:
+async def check_command_cooldown(bot: BallsDexBot, user_id: int) -> tuple[bool, timedelta | None]:
     """
     Check if user can execute a command based on the 5-second cooldown.
     Returns (can_execute, remaining_cooldown)
     """
     now = datetime.now(timezone.utc)
+    _, last_command_time = await bot.cooldowns.get(user_id, COMMAND_USAGE)
     
-    if user_id not in command_cooldowns:
+    if last_command_time is None:
         return True, None
     
-    last_command_time = command_cooldowns[user_id]
     time_since_last = now - last_command_time
     
     if time_since_last >= COMMAND_COOLDOWN:
@@ -88,9 +86,9 @@ def check_command_cooldown(user_id: int) -> tuple[bool, timedelta | None]:
     return False, remaining
 
 
-def set_command_cooldown(user_id: int):
+async def set_command_cooldown(bot: BallsDexBot, user_id: int):
     """Set the command cooldown timestamp for a user"""
-    command_cooldowns[user_id] = datetime.now(timezone.utc)
+    await bot.cooldowns.set(user_id, COMMAND_USAGE, 1, datetime.now(timezone.utc))
 
 
 def start_pick_session(user_id: int, pick_type: str):
@@ -170,9 +168,7 @@ class Picks(commands.GroupCog, name="picks"):
 
     async def get_random_balls_for_daily(self, player: Player, count: int = 5) -> list[Ball]:
         """Get random balls for daily picks with rarity range 0.1-30.0"""
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
-        )
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(rarity__gte=0.1, rarity__lte=30.0, enabled=True).all()
 
         if not all_balls:
@@ -227,9 +223,7 @@ class Picks(commands.GroupCog, name="picks"):
 
     async def get_random_balls_for_weekly(self, player: Player, count: int = 5) -> list[Ball]:
         """Get random balls for weekly picks with rarity range 0.03-2.5"""
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
-        )
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(rarity__gte=0.03, rarity__lte=2.5, enabled=True).all()
 
         if not all_balls:
@@ -282,9 +276,7 @@ class Picks(commands.GroupCog, name="picks"):
 
     async def get_random_balls_for_picks(self, player: Player, count: int = 5) -> list[Ball]:
         """Get random balls for picks pick with rarity range 0.1-30.0 (0.1 very hard to get)"""
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
-        )
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(rarity__gte=0.1, rarity__lte=30.0, enabled=True).all()
 
         if not all_balls:
@@ -343,9 +335,7 @@ class Picks(commands.GroupCog, name="picks"):
 
     async def get_random_ball_any(self, player: Player) -> Ball | None:
         """Get any random ball for wallet picks (no rarity restrictions)"""
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
-        )
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(enabled=True).all()
 
         if not all_balls:
@@ -371,55 +361,40 @@ class Picks(commands.GroupCog, name="picks"):
 
         return random.choice(choices)
 
-    def check_daily_usage(self, user_id: str) -> tuple[bool, int]:
+    async def check_daily_usage(self, user_id: int) -> tuple[bool, int]:
         """
         Check if user can use daily command and return remaining uses.
         Returns (can_use, remaining_uses)
         """
         now = datetime.now(timezone.utc)
+        count, first_use = await self.bot.cooldowns.get(user_id, DAILY_USAGE)
         
-        if user_id not in daily_usage_tracking:
-            # First time using daily command
-            daily_usage_tracking[user_id] = {
-                'count': 0,
-                'first_use': now
-            }
-            return True, 1
-        
-        user_data = daily_usage_tracking[user_id]
-        time_since_first_use = now - user_data['first_use']
-        
-        # Reset if 24 hours have passed since first use
-        if time_since_first_use >= DAILY_COOLDOWN:
-            daily_usage_tracking[user_id] = {
-                'count': 0,
-                'first_use': now
-            }
+        # Reset on first use, or if 24 hours have passed since first use
+        if first_use is None or now - first_use >= DAILY_COOLDOWN:
+            await self.bot.cooldowns.set(user_id, DAILY_USAGE, 0, now)
             return True, 1
         
         # Check if user has used their 1 daily attempt
-        if user_data['count'] >= 1:
+        if count >= 1:
             return False, 0
         
-        remaining = 1 - user_data['count']
+        remaining = 1 - count
         return True, remaining
 
-    def increment_daily_usage(self, user_id: str):
+    async def increment_daily_usage(self, user_id: int):
         """Increment the daily usage count for a user"""
-        if user_id in daily_usage_tracking:
-            daily_usage_tracking[user_id]['count'] += 1
+        count, first_use = await self.bot.cooldowns.get(user_id, DAILY_USAGE)
+        if first_use is not None:
+            await self.bot.cooldowns.set(user_id, DAILY_USAGE, count + 1, first_use)
 
-    def get_daily_cooldown_remaining(self, user_id: str) -> timedelta | None:
+    async def get_daily_cooldown_remaining(self, user_id: int) -> timedelta | None:
         """Get remaining cooldown time for daily command"""
-        if user_id not in daily_usage_tracking:
-            return None
-        
-        user_data = daily_usage_tracking[user_id]
-        if user_data['count'] < 1:
+        count, first_use = await self.bot.cooldowns.get(user_id, DAILY_USAGE)
+        if first_use is None or count < 1:
             return None
         
         now = datetime.now(timezone.utc)
-        cooldown_end = user_data['first_use'] + DAILY_COOLDOWN
+        cooldown_end = first_use + DAILY_COOLDOWN
         
         if now >= cooldown_end:
             return None
@@ -439,7 +414,7 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Check command cooldown first
-        can_execute, remaining_cooldown = check_command_cooldown(user_id)
+        can_execute, remaining_cooldown = await check_command_cooldown(self.bot, user_id)
         if not can_execute:
             seconds_remaining = int(remaining_cooldown.total_seconds())
             await interaction.response.send_message(
@@ -449,7 +424,7 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Set command cooldown
-        set_command_cooldown(user_id)
+        await set_command_cooldown(self.bot, user_id)
 
         user_id_str = str(user_id)
 
@@ -463,10 +438,10 @@ class Picks(commands.GroupCog, name="picks"):
             return
 
         # Check daily usage limits
-        can_use, remaining_uses = self.check_daily_usage(user_id)
+        can_use, remaining_uses = await self.check_daily_usage(user_id)
         
         if not can_use:
-            cooldown_remaining = self.get_daily_cooldown_remaining(user_id)
+            cooldown_remaining = await self.get_daily_cooldown_remaining(user_id)
             if cooldown_remaining:
                 hours = int(cooldown_remaining.total_seconds() // 3600)
                 minutes = int((cooldown_remaining.total_seconds() % 3600) // 60)
@@ -515,7 +490,7 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Increment usage count
-        self.increment_daily_usage(user_id)
+        await self.increment_daily_usage(user_id)
         
         ball = view.selected_ball
         
@@ -590,7 +565,7 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Check command cooldown first
-        can_execute, remaining_cooldown = check_command_cooldown(user_id)
+        can_execute, remaining_cooldown = await check_command_cooldown(self.bot, user_id)
         if not can_execute:
             seconds_remaining = int(remaining_cooldown.total_seconds())
             await interaction.response.send_message(
@@ -600,7 +575,7 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Set command cooldown
-        set_command_cooldown(user_id)
+        await set_command_cooldown(self.bot, user_id)
 
         user_id_str = str(user_id)
 
@@ -711,8 +686,7 @@ class Picks(commands.GroupCog, name="picks"):
 
     @app_commands.command(name="wallet", description="Check your pick wallet balance")
     async def wallet(self, interaction: discord.Interaction[BallsDexBot]):
-        user_id = str(interaction.user.id)
-        balance = pick_wallet[user_id]
+        balance = await self.bot.wallets.balance(interaction.user.id, PICKS_CURRENCY)
         
         embed = Embed(
             title=f"{interaction.user.display_name}'s Wallet",
@@ -725,9 +699,7 @@ class Picks(commands.GroupCog, name="picks"):
 
     async def get_random_balls_for_wallet(self, player: Player, count: int = 5) -> list[Ball]:
         """Get random balls for wallet picks (no rarity restrictions)"""
-        owned_ids = set(
-            await BallInstance.filter(player=player).values_list("ball__id", flat=True)
-        )
+        owned_ids = await owned_balls.get(player.pk)
         all_balls = await Ball.filter(enabled=True).all()
 
         if not all_balls:
@@ -784,7 +756,7 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Check command cooldown first
-        can_execute, remaining_cooldown = check_command_cooldown(user_id)
+        can_execute, remaining_cooldown = await check_command_cooldown(self.bot, user_id)
         if not can_execute:
             seconds_remaining = int(remaining_cooldown.total_seconds())
             await interaction.response.send_message(
@@ -794,11 +766,10 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Set command cooldown
-        set_command_cooldown(user_id)
+        await set_command_cooldown(self.bot, user_id)
 
-        user_id_str = str(user_id)
-        
-        if pick_wallet[user_id_str] <= 0:
+        balance = await self.bot.wallets.balance(user_id, PICKS_CURRENCY)
+        if balance <= 0:
             await interaction.response.send_message("You don't have any picks in your wallet!", ephemeral=True)
             return
         
@@ -821,7 +792,7 @@ class Picks(commands.GroupCog, name="picks"):
             description += f"{i+1}. {emoji} **{ball.country}** (Rarity: {ball.rarity})\n"
         
         pick_embed.description = description
-        pick_embed.set_footer(text=f"Picks remaining: {pick_wallet[user_id_str]-1} after this pick")
+        pick_embed.set_footer(text=f"Picks remaining: {balance-1} after this pick")
         
         # Start the pick session
         start_pick_session(user_id, 'picks')
@@ -840,8 +811,12 @@ class Picks(commands.GroupCog, name="picks"):
             await msg.edit(embed=timeout_embed, view=None)
             return
         
-        # Deduct pick from wallet
-        pick_wallet[user_id_str] -= 1
+        # Deduct pick from wallet, it may have been spent elsewhere in the meantime
+        if await self.bot.wallets.debit(user_id, PICKS_CURRENCY, 1) is None:
+            empty_embed = Embed(title="❌ No picks left!", color=Color.red())
+            empty_embed.description = "You don't have any picks in your wallet!"
+            await msg.edit(embed=empty_embed, view=None)
+            return
         
         ball = view.selected_ball
         
@@ -890,7 +865,7 @@ class Picks(commands.GroupCog, name="picks"):
         user_id = interaction.user.id
         
         # Check command cooldown first
-        can_execute, remaining_cooldown = check_command_cooldown(user_id)
+        can_execute, remaining_cooldown = await check_command_cooldown(self.bot, user_id)
         if not can_execute:
             seconds_remaining = int(remaining_cooldown.total_seconds())
             await interaction.response.send_message(
@@ -900,10 +875,8 @@ class Picks(commands.GroupCog, name="picks"):
             return
         
         # Set command cooldown
-        set_command_cooldown(user_id)
+        await set_command_cooldown(self.bot, user_id)
 
-        user_id_str = str(user_id)
-        
         if amount <= 0:
             await interaction.response.send_message("You must gamble at least 1 pick!", ephemeral=True)
             return
@@ -912,8 +885,9 @@ class Picks(commands.GroupCog, name="picks"):
             await interaction.response.send_message("You can only gamble a maximum of 100 picks at once!", ephemeral=True)
             return
         
-        if pick_wallet[user_id_str] < amount:
-            await interaction.response.send_message(f"You only have {pick_wallet[user_id_str]} picks in your wallet!", ephemeral=True)
+        balance = await self.bot.wallets.balance(user_id, PICKS_CURRENCY)
+        if balance < amount:
+            await interaction.response.send_message(f"You only have {balance} picks in your wallet!", ephemeral=True)
             return
         
         # Check gamble cooldown (30 seconds)
@@ -927,7 +901,10 @@ class Picks(commands.GroupCog, name="picks"):
                 return
         
         # Deduct picks immediately
-        pick_wallet[user_id_str] -= amount
+        if await self.bot.wallets.debit(user_id, PICKS_CURRENCY, amount) is None:
+            balance = await self.bot.wallets.balance(user_id, PICKS_CURRENCY)
+            await interaction.response.send_message(f"You only have {balance} picks in your wallet!", ephemeral=True)
+            return
 
         await interaction.response.defer()
 
@@ -949,7 +926,7 @@ class Picks(commands.GroupCog, name="picks"):
 
         if result == "win":
             reward = amount * 2
-            pick_wallet[user_id_str] += reward
+            await self.bot.wallets.credit(user_id, PICKS_CURRENCY, reward)
             suspense.title = f"🎉 You WON {reward} picks!"
             suspense.color = Color.green()
             suspense.description = f"Luck is on your side. You risked {amount}, and won {reward}!"
@@ -970,14 +947,13 @@ class Picks(commands.GroupCog, name="picks"):
             await interaction.response.send_message("Amount must be positive!", ephemeral=True)
             return
         
-        user_id = str(user.id)
-        pick_wallet[user_id] += amount
+        new_balance = await self.bot.wallets.credit(user.id, PICKS_CURRENCY, amount)
         
         embed = Embed(
             title="FootballDex Picks Added!",
             description=(
                 f"{interaction.user.mention} has added **{amount}** pick(s) to {user.mention}'s wallet.\n"
-                f"🪙 **{user.name}'s New Balance**: `{pick_wallet[user_id]} picks`"
+                f"🪙 **{user.name}'s New Balance**: `{new_balance} picks`"
             ),
             color=Color.green()
         )
@@ -986,7 +962,7 @@ class Picks(commands.GroupCog, name="picks"):
         
         await interaction.response.send_message(embed=embed)
         
-        logger.info(f"[OWNER ADD] {interaction.user} added {amount} picks to {user} (New balance: {pick_wallet[user_id]})")
+        logger.info(f"[OWNER ADD] {interaction.user} added {amount} picks to {user} (New balance: {new_balance})")
 
     @app_commands.command(name="owners-remove-pick", description="Remove picks from a user's wallet (Owners only)")
     async def owners_remove_pick(self, interaction: discord.Interaction[BallsDexBot], user: discord.Member, amount: int):
@@ -998,19 +974,17 @@ class Picks(commands.GroupCog, name="picks"):
             await interaction.response.send_message("Amount must be positive!", ephemeral=True)
             return
         
-        user_id = str(user.id)
-        
-        if pick_wallet[user_id] < amount:
-            await interaction.response.send_message(f"{user.mention} only has {pick_wallet[user_id]} picks!", ephemeral=True)
+        new_balance = await self.bot.wallets.debit(user.id, PICKS_CURRENCY, amount)
+        if new_balance is None:
+            balance = await self.bot.wallets.balance(user.id, PICKS_CURRENCY)
+            await interaction.response.send_message(f"{user.mention} only has {balance} picks!", ephemeral=True)
             return
         
-        pick_wallet[user_id] -= amount
-        
         embed = Embed(
             title="FootballDex Picks Removed!",
             description=(
                 f"{interaction.user.mention} has removed **{amount}** pick(s) from {user.mention}'s wallet.\n"
-                f"🪙 **{user.name}'s New Balance**: `{pick_wallet[user_id]} picks`"
+                f"🪙 **{user.name}'s New Balance**: `{new_balance} picks`"
             ),
             color=Color.red()
         )
@@ -1019,7 +993,7 @@ class Picks(commands.GroupCog, name="picks"):
         
         await interaction.response.send_message(embed=embed)
         
-        logger.info(f"[OWNER REMOVE] {interaction.user} removed {amount} picks from {user} (New balance: {pick_wallet[user_id]})")
+        logger.info(f"[OWNER REMOVE] {interaction.user} removed {amount} picks from {user} (New balance: {new_balance})")
 
 
 async def setup(bot):
@@ -1,5 +1,6 @@
-import zipfile
-from io import BytesIO
+import asyncio
+import functools
+import logging
 from typing import TYPE_CHECKING
 
 import discord
@@ -8,17 +9,17 @@ from discord.ext import commands
 from discord.utils import format_dt
 from tortoise.exceptions import DoesNotExist
 from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
 
+from ballsdex.core.models import Block, DonationPolicy, FriendPolicy, Friendship, MentionPolicy
+from ballsdex.core.models import Player as PlayerModel
 from ballsdex.core.models import (
-    BallInstance,
-    Block,
-    DonationPolicy,
-    FriendPolicy,
-    Friendship,
-    MentionPolicy,
+    PlayerBallCount,
+    PlayerStats,
+    PrivacyPolicy,
+    TradeCooldownPolicy,
+    balls,
 )
-from ballsdex.core.models import Player as PlayerModel
-from ballsdex.core.models import PrivacyPolicy, Trade, TradeCooldownPolicy, TradeObject, balls
 from ballsdex.core.utils.buttons import ConfirmChoiceView
 from ballsdex.core.utils.enums import (
     DONATION_POLICY_MAP,
@@ -27,12 +28,17 @@ from ballsdex.core.utils.enums import (
     PRIVATE_POLICY_MAP,
 )
 from ballsdex.core.utils.enums import TRADE_COOLDOWN_POLICY_MAP as TRADE_POLICY_MAP
+from ballsdex.core.utils.owned import ball_mask, mask_ids, owned_balls
 from ballsdex.core.utils.paginator import FieldPageSource, Pages
+from ballsdex.core.utils.player_stats import player_stats, trade_partners
+from ballsdex.packages.players.export import ExportTooLarge, export_player
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
 
+log = logging.getLogger("ballsdex.packages.players.cog")
+
 
 class Player(commands.GroupCog):
     """
@@ -42,11 +48,18 @@ class Player(commands.GroupCog):
     def __init__(self, bot: "BallsDexBot"):
         self.bot = bot
         self.active_friend_requests = {}
+        self.exports: dict[int, asyncio.Task] = {}
+        # exports hold a database connection for their whole duration
+        self.export_semaphore = asyncio.Semaphore(2)
         if not self.bot.intents.members and self.__cog_app_commands_group__:
             privacy_command = self.__cog_app_commands_group__.get_command("privacy")
             if privacy_command:
                 privacy_command.parameters[0]._Parameter__parent.choices.pop()  # type: ignore
 
+    async def cog_unload(self):
+        for task in self.exports.values():
+            task.cancel()
+
     friend = app_commands.Group(name="friend", description="Friend commands")
     blocked = app_commands.Group(name="block", description="Block commands")
     policy = app_commands.Group(name="policy", description="Policy commands")
@@ -229,7 +242,12 @@ class Player(commands.GroupCog):
         if view.value is None or not view.value:
             return
         player, _ = await PlayerModel.get_or_create(discord_id=interaction.user.id)
-        await player.delete()
+        # the statistics rows are maintained by triggers, delete them with the player
+        async with in_transaction():
+            await PlayerBallCount.filter(player=player).delete()
+            await PlayerStats.filter(player=player).delete()
+            await player.delete()
+        owned_balls.invalidate(player.pk)
 
     @friend.command(name="add")
     async def friend_add(
@@ -545,23 +563,17 @@ class Player(commands.GroupCog):
         """
         await interaction.response.defer(thinking=True, ephemeral=True)
         try:
-            player = await PlayerModel.get(discord_id=interaction.user.id).prefetch_related(
-                "balls"
-            )
+            player = await PlayerModel.get(discord_id=interaction.user.id)
         except DoesNotExist:
             await interaction.followup.send("You haven't got any info to show!", ephemeral=True)
             return
-        ball = await BallInstance.filter(player=player).prefetch_related("special", "trade_player")
+        stats = await player_stats(player)
 
         user = interaction.user
         bot_countryballs = {x: y.emoji_id for x, y in balls.items() if y.enabled}
         total_countryballs = len(bot_countryballs)
-        owned_countryballs = set(
-            x[0]
-            for x in await player.balls.filter(ball__enabled=True)
-            .distinct()
-            .values_list("ball_id")
-        )
+        owned = await owned_balls.get(player.pk)
+        owned_countryballs = mask_ids(owned.mask & ball_mask(bot_countryballs))
 
         if total_countryballs > 0:
             completion_percentage = (
@@ -570,19 +582,7 @@ class Player(commands.GroupCog):
         else:
             completion_percentage = "0.0%"
 
-        caught_owned = [x for x in ball if x.trade_player is None]
-        balls_owned = [x for x in ball]
-        special = [x for x in ball if x.special is not None]
-        trades = await Trade.filter(
-            Q(player1__discord_id=interaction.user.id) | Q(player2__discord_id=interaction.user.id)
-        ).values_list("player1__discord_id", "player2__discord_id")
-
-        trade_partners = set()
-        for p1, p2 in trades:
-            if p1 != interaction.user.id:
-                trade_partners.add(p1)
-            if p2 != interaction.user.id:
-                trade_partners.add(p2)
+        partners = await trade_partners(player)
 
         friends = await Friendship.filter(
             Q(player1__discord_id=interaction.user.id) | Q(player2__discord_id=interaction.user.id)
@@ -605,11 +605,11 @@ class Player(commands.GroupCog):
             f"**Amount of Blocked Users:** {blocks}\n"
             "## Player Stats\n"
             f"**Completion:** {completion_percentage}\n"
-            f"**{settings.collectible_name.title()}s Owned:** {len(balls_owned):,}\n"
-            f"**Caught {settings.collectible_name.title()}s Owned**: {len(caught_owned):,}\n"
-            f"**Special {settings.collectible_name.title()}s:** {len(special):,}\n"
-            f"**Trades Completed:** {len(trades):,}\n"
-            f"**Amount of Users Traded With:** {len(trade_partners):,}"
+            f"**{settings.collectible_name.title()}s Owned:** {stats.balls:,}\n"
+            f"**Caught {settings.collectible_name.title()}s Owned**: {stats.caught:,}\n"
+            f"**Special {settings.collectible_name.title()}s:** {stats.specials:,}\n"
+            f"**Trades Completed:** {stats.trades:,}\n"
+            f"**Amount of Users Traded With:** {partners:,}"
         )
         embed.set_footer(text="Keep collecting and trading to improve your stats!")
         embed.set_thumbnail(url=user.display_avatar)  # type: ignore
@@ -621,11 +621,24 @@ class Player(commands.GroupCog):
             app_commands.Choice(name=settings.collectible_name.title(), value="balls"),
             app_commands.Choice(name="Trades", value="trades"),
             app_commands.Choice(name="All", value="all"),
-        ]
+        ],
+        format=[
+            app_commands.Choice(name="CSV", value="csv"),
+            app_commands.Choice(name="JSON Lines", value="jsonl"),
+        ],
     )
-    async def export(self, interaction: discord.Interaction["BallsDexBot"], type: str):
+    async def export(
+        self, interaction: discord.Interaction["BallsDexBot"], type: str, format: str = "csv"
+    ):
         """
         Export your player data.
+
+        Parameters
+        ----------
+        type: str
+            The data to export.
+        format: str
+            The format of the exported files, CSV by default.
         """
         player = await PlayerModel.get_or_none(discord_id=interaction.user.id)
         if player is None:
@@ -633,96 +646,77 @@ class Player(commands.GroupCog):
                 "You don't have any player data to export.", ephemeral=True
             )
             return
-        await interaction.response.defer()
-        files = []
-        if type == "balls":
-            data = await get_items_csv(player)
-            filename = f"{interaction.user.id}_{settings.collectible_name}.csv"
-            data.filename = filename  # type: ignore
-            files.append(data)
-        elif type == "trades":
-            data = await get_trades_csv(player)
-            filename = f"{interaction.user.id}_trades.csv"
-            data.filename = filename  # type: ignore
-            files.append(data)
-        elif type == "all":
-            balls = await get_items_csv(player)
-            trades = await get_trades_csv(player)
-            balls_filename = f"{interaction.user.id}_{settings.collectible_name}.csv"
-            trades_filename = f"{interaction.user.id}_trades.csv"
-            balls.filename = balls_filename  # type: ignore
-            trades.filename = trades_filename  # type: ignore
-            files.append(balls)
-            files.append(trades)
-        else:
-            await interaction.followup.send("Invalid input!", ephemeral=True)
+        if type not in ("balls", "trades", "all") or format not in ("csv", "jsonl"):
+            await interaction.response.send_message("Invalid input!", ephemeral=True)
             return
-        zip_file = BytesIO()
-        with zipfile.ZipFile(zip_file, "w") as z:
-            for file in files:
-                z.writestr(file.filename, file.getvalue())
-        zip_file.seek(0)
-        if zip_file.tell() > 25_000_000:
-            await interaction.followup.send(
-                "Your data is too large to export."
-                "Please contact the bot support for more information.",
-                ephemeral=True,
+        task = self.exports.get(interaction.user.id)
+        if task is not None and not task.done():
+            await interaction.response.send_message(
+                "Your previous export is still being prepared.", ephemeral=True
             )
             return
-        files = [discord.File(zip_file, "player_data.zip")]
-        try:
-            await interaction.user.send("Here is your player data:", files=files)
-            await interaction.followup.send(
-                "Your player data has been sent via DMs.", ephemeral=True
-            )
-        except discord.Forbidden:
-            await interaction.followup.send(
-                "I couldn't send the player data to you in DM. "
-                "Either you blocked me or you disabled DMs in this server.",
-                ephemeral=True,
-            )
-
-
-async def get_items_csv(player: PlayerModel) -> BytesIO:
-    """
-    Get a CSV file with all items of the player.
-    """
-    balls = await BallInstance.filter(player=player).prefetch_related(
-        "ball", "trade_player", "special"
-    )
-    txt = (
-        f"id,hex id,{settings.collectible_name},catch date,trade_player"
-        ",special,attack,attack bonus,hp,hp_bonus\n"
-    )
-    for ball in balls:
-        txt += (
-            f"{ball.id},{ball.id:0X},{ball.ball.country},{ball.catch_date},"  # type: ignore
-            f"{ball.trade_player.discord_id if ball.trade_player else 'None'},{ball.special},"
-            f"{ball.attack},{ball.attack_bonus},{ball.health},{ball.health_bonus}\n"
+        await interaction.response.send_message(
+            "Your player data is being exported, it will be sent to you in DMs.", ephemeral=True
         )
-    return BytesIO(txt.encode("utf-8"))
-
+        datasets = ["balls", "trades"] if type == "all" else [type]
+        task = asyncio.create_task(self.send_export(interaction, player, datasets, format))
+        self.exports[interaction.user.id] = task
+        task.add_done_callback(functools.partial(self._export_done, interaction.user.id))
+
+    def _export_done(self, user_id: int, task: asyncio.Task):
+        self.exports.pop(user_id, None)
+        if not task.cancelled() and (exc := task.exception()):
+            log.error(f"Failed to send the export of user {user_id}", exc_info=exc)
+
+    async def _export_followup(
+        self, interaction: discord.Interaction["BallsDexBot"], content: str
+    ):
+        # the interaction token may have expired while the export was prepared
+        try:
+            await interaction.followup.send(content, ephemeral=True)
+        except discord.HTTPException as e:
+            log.warning(f"Could not send export message to user {interaction.user.id}: {e!r}")
+
+    async def send_export(
+        self,
+        interaction: discord.Interaction["BallsDexBot"],
+        player: PlayerModel,
+        datasets: list[str],
+        format: str,
+    ):
+        """
+        Build the export of a player in the background and send it in DMs.
+        """
+        async with self.export_semaphore:
+            try:
+                archive = await export_player(player, datasets, format)
+            except ExportTooLarge:
+                await self._export_followup(
+                    interaction,
+                    "Your data is too large to export. "
+                    "Please contact the bot support for more information.",
+                )
+                return
+            except Exception:
+                log.exception(f"Failed to export the data of player {player.discord_id}")
+                await self._export_followup(
+                    interaction, "An error occured while exporting your data."
+                )
+                return
 
-async def get_trades_csv(player: PlayerModel) -> BytesIO:
-    """
-    Get a CSV file with all trades of the player.
-    """
-    trade_history = (
-        await Trade.filter(Q(player1=player) | Q(player2=player))
-        .order_by("date")
-        .prefetch_related("player1", "player2")
-    )
-    txt = "id,date,player1,player2,player1 received,player2 received\n"
-    for trade in trade_history:
-        player1_items = await TradeObject.filter(
-            trade=trade, player=trade.player1
-        ).prefetch_related("ballinstance")
-        player2_items = await TradeObject.filter(
-            trade=trade, player=trade.player2
-        ).prefetch_related("ballinstance")
-        txt += (
-            f"{trade.id},{trade.date},{trade.player1.discord_id},{trade.player2.discord_id},"
-            f"{','.join([i.ballinstance.to_string() for i in player2_items])},"  # type: ignore
-            f"{','.join([i.ballinstance.to_string() for i in player1_items])}\n"  # type: ignore
-        )
-    return BytesIO(txt.encode("utf-8"))
+        with archive:
+            try:
+                await interaction.user.send(
+                    "Here is your player data:", file=discord.File(archive, "player_data.zip")
+                )
+            except discord.Forbidden:
+                await self._export_followup(
+                    interaction,
+                    "I couldn't send the player data to you in DM. "
+                    "Either you blocked me or you disabled DMs in this server.",
+                )
+            except discord.HTTPException:
+                log.exception(f"Failed to send the export of player {player.discord_id}")
+                await self._export_followup(
+                    interaction, "An error occured while sending your data."
+                )
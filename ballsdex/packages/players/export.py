@@ -0,0 +1,206 @@
+"""
+Streaming export of the data of a player.
+
+Each dataset is read with a single query through a server-side cursor, and written in batches
+to a compressed archive which stays in memory up to `MEMORY_LIMIT` before spilling to disk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from contextlib import aclosing
+from typing import IO, TYPE_CHECKING, Any, AsyncIterator, cast
+
+from tortoise import connections
+
+from ballsdex.core.models import BallInstance, balls, specials
+from ballsdex.settings import settings
+
+if TYPE_CHECKING:
+    from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+    from ballsdex.core.models import Player
+
+# Discord's upload limit, the archive is discarded past this size
+SIZE_LIMIT = 25_000_000
+MEMORY_LIMIT = 8_000_000
+BATCH_SIZE = 1000
+
+ITEMS_QUERY = """
+SELECT i.id, i.ball_id, i.special_id, i.favorite, i.catch_date, i.attack_bonus,
+    i.health_bonus, p.discord_id AS trade_player
+FROM ballinstance i
+LEFT JOIN player p ON p.id = i.trade_player_id
+WHERE i.player_id = $1 AND NOT i.deleted
+ORDER BY i.id
+"""
+
+TRADES_QUERY = """
+SELECT t.id, t.date, p1.discord_id AS player1, p2.discord_id AS player2,
+    o.player_id = t.player1_id AS from_player1,
+    i.id AS instance_id, i.ball_id, i.special_id, i.favorite
+FROM trade t
+JOIN player p1 ON p1.id = t.player1_id
+JOIN player p2 ON p2.id = t.player2_id
+LEFT JOIN tradeobject o ON o.trade_id = t.id
+LEFT JOIN ballinstance i ON i.id = o.ballinstance_id
+WHERE t.player1_id = $1 OR t.player2_id = $1
+ORDER BY t.date, t.id, o.id
+"""
+
+
+class ExportTooLarge(Exception):
+    pass
+
+
+async def records(query: str, *args: Any) -> AsyncIterator[dict[str, Any]]:
+    """
+    Iterate over the rows of a query with a server-side cursor, in a read-only snapshot.
+    """
+    client = cast("AsyncpgDBClient", connections.get("default"))
+    async with client.acquire_connection() as connection:
+        async with connection.transaction(isolation="repeatable_read", readonly=True):
+            async for record in connection.cursor(query, *args, prefetch=BATCH_SIZE):
+                yield dict(record)
+
+
+def _instance(record: dict[str, Any], id_key: str = "id") -> BallInstance:
+    return BallInstance(
+        id=record[id_key],
+        ball=balls[record["ball_id"]],
+        special=specials.get(record["special_id"]),
+        favorite=record["favorite"],
+        attack_bonus=record.get("attack_bonus", 0),
+        health_bonus=record.get("health_bonus", 0),
+    )
+
+
+async def item_rows(player: "Player") -> AsyncIterator[dict[str, Any]]:
+    async with aclosing(records(ITEMS_QUERY, player.pk)) as cursor:
+        async for record in cursor:
+            instance = _instance(record)
+            yield {
+                "id": instance.pk,
+                "hex id": f"{instance.pk:0X}",
+                settings.collectible_name: instance.countryball.country,
+                "catch date": record["catch_date"],
+                "trade_player": record["trade_player"],
+                "special": instance.specialcard.name if instance.specialcard else None,
+                "attack": instance.attack,
+                "attack bonus": instance.attack_bonus,
+                "hp": instance.health,
+                "hp_bonus": instance.health_bonus,
+            }
+
+
+async def trade_rows(player: "Player") -> AsyncIterator[dict[str, Any]]:
+    # the query returns one row per traded instance, grouped back into one row per trade
+    trade: dict[str, Any] | None = None
+    async with aclosing(records(TRADES_QUERY, player.pk)) as cursor:
+        async for record in cursor:
+            if trade is None or trade["id"] != record["id"]:
+                if trade is not None:
+                    yield trade
+                trade = {
+                    "id": record["id"],
+                    "date": record["date"],
+                    "player1": record["player1"],
+                    "player2": record["player2"],
+                    "player1 received": [],
+                    "player2 received": [],
+                }
+            if record["instance_id"] is not None:
+                side = "player2 received" if record["from_player1"] else "player1 received"
+                trade[side].append(_instance(record, "instance_id").to_string())
+    if trade is not None:
+        yield trade
+
+
+DATASETS = {
+    "balls": (item_rows, settings.collectible_name),
+    "trades": (trade_rows, "trades"),
+}
+
+
+def _write_batch(file: IO[str], rows: list[dict[str, Any]], format: str, header: bool):
+    if format == "jsonl":
+        for row in rows:
+            file.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+        return
+    writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()))
+    if header:
+        writer.writeheader()
+    writer.writerows(
+        {k: ",".join(v) if isinstance(v, list) else v for k, v in row.items()} for row in rows
+    )
+
+
+async def _write_dataset(
+    archive: zipfile.ZipFile,
+    buffer: IO[bytes],
+    filename: str,
+    rows: AsyncIterator[dict[str, Any]],
+    format: str,
+):
+    with archive.open(filename, "w", force_zip64=True) as entry:
+        file = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+        batch: list[dict[str, Any]] = []
+        header = True
+        async with aclosing(rows):
+            async for row in rows:
+                batch.append(row)
+                if len(batch) < BATCH_SIZE:
+                    continue
+                # compression is CPU bound, keep it out of the event loop
+                await asyncio.to_thread(_write_batch, file, batch, format, header)
+                batch, header = [], False
+                if buffer.tell() > SIZE_LIMIT:
+                    raise ExportTooLarge
+        if batch:
+            await asyncio.to_thread(_write_batch, file, batch, format, header)
+        file.flush()
+        file.detach()
+
+
+async def export_player(player: "Player", datasets: list[str], format: str = "csv") -> IO[bytes]:
+    """
+    Export the data of a player as a zip archive.
+
+    Parameters
+    ----------
+    player: Player
+        The player to export.
+    datasets: list[str]
+        The data to include, keys of `DATASETS`.
+    format: str
+        ``csv`` or ``jsonl`` (JSON Lines).
+
+    Returns
+    -------
+    IO[bytes]
+        The archive, at position 0. Close it once sent.
+
+    Raises
+    ------
+    ExportTooLarge
+        The compressed archive exceeds `SIZE_LIMIT`.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=MEMORY_LIMIT)
+    try:
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for dataset in datasets:
+                rows, name = DATASETS[dataset]
+                filename = f"{player.discord_id}_{name}.{format}"
+                await _write_dataset(archive, buffer, filename, rows(player), format)
+        if buffer.tell() > SIZE_LIMIT:
+            raise ExportTooLarge
+    except BaseException:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
@@ -15,6 +15,7 @@ from ballsdex.core.models import (
     Trade,
     Special,
 )
+from ballsdex.core.utils.player_stats import player_stats, recent_catches
 from ballsdex.settings import settings
 from ballsdex.core.bot import BallsDexBot
 import ballsdex.packages.config.components as Components
@@ -113,31 +114,29 @@ class Profiles(commands.GroupCog, name="profile"):
             return await interaction.followup.send("That user does not have a profile yet.", ephemeral=True)
 
         profile = self.get_profile(user.id)
-        data = await BallInstance.filter(player=player)
+        stats = await player_stats(player)
 
         days = 7
         now_cutoff = datetime.now() - timedelta(days=days)
 
         # total number of balls
-        total_count = await BallInstance.filter(player=player).count()
+        total_count = stats.balls
 
         # number caught in the last days
-        recent_count = await BallInstance.filter(player=player, catch_date__gte=now_cutoff).count()
+        recent_count = recent_catches(stats, days)
 
         # servers caught in during recent window: query only server_id values
         recent_server_ids = await BallInstance.filter(
             player=player,
             catch_date__gte=now_cutoff
-        ).values_list('server_id', flat=True)
+        ).distinct().values_list('server_id', flat=True)
 
         # make a set and ignore falsy/None server_ids
         recent_servers_count = len({sid for sid in recent_server_ids if sid})
 
-        # special count (DB COUNT)
-        special_count = await BallInstance.filter(player=player, special=True).count()
+        special_count = stats.specials
 
         # Determine rank based on total number of balls
-        total_count = len(data)
         if total_count >= 3000:
             rank = "🐐 GOAT"
         elif total_count >= 2000:
@@ -13,13 +13,14 @@ from ballsdex.core.models import BallInstance, Player
 from ballsdex.core.models import Trade as TradeModel
 from ballsdex.core.utils.buttons import ConfirmChoiceView
 from ballsdex.core.utils.paginator import Pages
-from ballsdex.core.utils.sorting import FilteringChoices, SortingChoices, filter_balls, sort_balls
+from ballsdex.core.utils.sorting import FilteringChoices, SortingChoices, filter_balls
 from ballsdex.core.utils.transformers import (
     BallEnabledTransform,
     BallInstanceTransform,
     SpecialEnabledTransform,
     TradeCommandType,
 )
+from ballsdex.packages.balls.countryballs_paginator import CountryballsQuerySource
 from ballsdex.packages.trade.display import TradeViewFormat
 from ballsdex.packages.trade.menu import BulkAddView, TradeMenu, TradeViewMenu
 from ballsdex.packages.trade.trade_user import TradingUser
@@ -273,17 +274,17 @@ class Trade(commands.GroupCog):
             query = query.filter(ball=countryball)
         if special:
             query = query.filter(special=special)
-        if sort:
-            query = sort_balls(sort, query)
         if filter:
             query = filter_balls(filter, query, interaction.guild_id)
-        balls = await query
-        if not balls:
+        query = query.filter(tradeable=True, ball__tradeable=True).filter(
+            Q(special=None) | Q(special__tradeable=True)
+        )
+        balls = await CountryballsQuerySource.create(query, sort)
+        if not balls.total:
             await interaction.followup.send(
                 f"No {settings.plural_collectible_name} found.", ephemeral=True
             )
             return
-        balls = [x for x in balls if x.is_tradeable]
 
         view = BulkAddView(interaction, balls, self)  # type: ignore
         await view.start(
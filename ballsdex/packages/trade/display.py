@@ -1,3 +1,4 @@
+import asyncio
 from typing import TYPE_CHECKING, Iterable
 
 import discord
@@ -10,6 +11,9 @@ from ballsdex.packages.trade.trade_user import TradingUser
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
 
+# number of following pages whose traders are resolved in advance
+PREFETCH_PAGES = 3
+
 
 class TradeViewFormat(menus.ListPageSource):
     def __init__(
@@ -36,13 +40,16 @@ class TradeViewFormat(menus.ListPageSource):
         embed.set_footer(
             text=f"Trade {menu.current_page + 1}/{menu.source.get_max_pages()} | Trade date: "
         )
-        fill_trade_embed_fields(
-            embed,
-            self.bot,
-            await TradingUser.from_trade_model(trade, trade.player1, self.bot, self.is_admin),
-            await TradingUser.from_trade_model(trade, trade.player2, self.bot, self.is_admin),
-            is_admin=self.is_admin,
+        # start resolving the traders of the next pages while this one is displayed
+        following = self.entries[menu.current_page + 1 : menu.current_page + 1 + PREFETCH_PAGES]
+        self.bot.user_resolver.prefetch(
+            player.discord_id for x in following for player in (x.player1, x.player2)
+        )
+        trader1, trader2 = await asyncio.gather(
+            TradingUser.from_trade_model(trade, trade.player1, self.bot, self.is_admin),
+            TradingUser.from_trade_model(trade, trade.player2, self.bot, self.is_admin),
         )
+        fill_trade_embed_fields(embed, self.bot, trader1, trader2, is_admin=self.is_admin)
         return embed
 
 
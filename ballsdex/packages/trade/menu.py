@@ -2,16 +2,20 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
-from typing import TYPE_CHECKING, List, Set, cast
+from typing import TYPE_CHECKING, Iterable, List, Set, cast
 
 import discord
 from discord.ui import Button, View, button
 from discord.utils import format_dt, utcnow
+from tortoise.transactions import in_transaction
 
+from ballsdex.core.metrics import trade_settlement
 from ballsdex.core.models import BallInstance, Player, Trade, TradeCooldownPolicy, TradeObject
 from ballsdex.core.utils import menus
 from ballsdex.core.utils.buttons import ConfirmChoiceView
+from ballsdex.core.utils.owned import owned_balls
 from ballsdex.core.utils.paginator import Pages
 from ballsdex.packages.balls.countryballs_paginator import CountryballsViewer
 from ballsdex.packages.trade.display import fill_trade_embed_fields
@@ -346,38 +350,65 @@ class TradeMenu:
         await self.cancel()
 
     async def perform_trade(self):
-        valid_transferable_countryballs: list[BallInstance] = []
-
-        trade = await Trade.create(player1=self.trader1.player, player2=self.trader2.player)
+        """
+        Transfer the proposals in a single transaction.
 
-        for countryball in self.trader1.proposal:
-            await countryball.refresh_from_db()
-            if countryball.player.discord_id != self.trader1.player.discord_id:
-                # This is a invalid mutation, the player is not the owner of the countryball
-                raise InvalidTradeOperation()
-            countryball.player = self.trader2.player
-            countryball.trade_player = self.trader1.player
-            countryball.favorite = False
-            valid_transferable_countryballs.append(countryball)
-            await TradeObject.create(
-                trade=trade, ballinstance=countryball, player=self.trader1.player
+        The ownership of every ball is checked with one locking query, then each side is
+        reassigned with one update and the trade history is inserted at once.
+        """
+        start = time.perf_counter()
+        player1 = self.trader1.player
+        player2 = self.trader2.player
+        proposal1 = {x.pk: x for x in self.trader1.proposal}
+        proposal2 = {x.pk: x for x in self.trader2.proposal}
+
+        async with in_transaction():
+            # locking rows in a stable order avoids deadlocks with concurrent transfers
+            rows = (
+                await BallInstance.filter(id__in=[*proposal1, *proposal2])
+                .only("id", "player_id")
+                .order_by("id")
+                .select_for_update()
             )
-
-        for countryball in self.trader2.proposal:
-            if countryball.player.discord_id != self.trader2.player.discord_id:
-                # This is a invalid mutation, the player is not the owner of the countryball
+            owners = {x.pk: x.player_id for x in rows}
+            if any(owners.get(x) != player1.pk for x in proposal1) or any(
+                owners.get(x) != player2.pk for x in proposal2
+            ):
+                # This is a invalid mutation, a player is not the owner of the countryball
                 raise InvalidTradeOperation()
-            countryball.player = self.trader1.player
-            countryball.trade_player = self.trader2.player
-            countryball.favorite = False
-            valid_transferable_countryballs.append(countryball)
-            await TradeObject.create(
-                trade=trade, ballinstance=countryball, player=self.trader2.player
+
+            trade = await Trade.create(player1=player1, player2=player2)
+            for ids, new_owner, old_owner in (
+                (proposal1, player2, player1),
+                (proposal2, player1, player2),
+            ):
+                if ids:
+                    await BallInstance.filter(id__in=list(ids)).update(
+                        player_id=new_owner.pk,
+                        trade_player_id=old_owner.pk,
+                        favorite=False,
+                        locked=None,
+                    )
+            await TradeObject.bulk_create(
+                [
+                    TradeObject(trade=trade, ballinstance=x, player=player)
+                    for proposal, player in ((proposal1, player1), (proposal2, player2))
+                    for x in proposal.values()
+                ]
             )
 
-        for countryball in valid_transferable_countryballs:
-            await countryball.unlock()
-            await countryball.save()
+        # bulk updates don't refresh the objects nor trigger the model signals
+        for proposal, new_owner, old_owner in (
+            (proposal1, player2, player1),
+            (proposal2, player1, player2),
+        ):
+            for countryball in proposal.values():
+                countryball.player = new_owner
+                countryball.trade_player = old_owner
+                countryball.favorite = False
+                countryball.locked = None  # type: ignore
+                owned_balls.transfer(countryball, old_owner.pk)
+        trade_settlement.observe(time.perf_counter() - start)
 
     async def confirm(self, trader: TradingUser) -> bool:
         """
@@ -432,12 +463,12 @@ class CountryballsSelector(Pages):
     def __init__(
         self,
         interaction: discord.Interaction["BallsDexBot"],
-        balls: List[BallInstance],
+        balls: List[BallInstance] | menus.PageSource,
         cog: TradeCog,
     ):
         self.bot = interaction.client
         self.interaction = interaction
-        source = CountryballsSource(balls)
+        source = balls if isinstance(balls, menus.PageSource) else CountryballsSource(balls)
         super().__init__(source, interaction=interaction)
         self.add_item(self.select_ball_menu)
         self.add_item(self.confirm_button)
@@ -467,15 +498,19 @@ class CountryballsSelector(Pages):
         self.select_ball_menu.options = options
         self.select_ball_menu.max_values = len(options)
 
+    async def fetch_balls(self, values: Iterable[str]) -> List[BallInstance]:
+        """
+        Load the selected balls with a single query.
+        """
+        return await BallInstance.filter(id__in=[int(x) for x in values]).select_related(
+            "ball", "player"
+        )
+
     @discord.ui.select(min_values=1, max_values=25)
     async def select_ball_menu(
         self, interaction: discord.Interaction["BallsDexBot"], item: discord.ui.Select
     ):
-        for value in item.values:
-            ball_instance = await BallInstance.get(id=int(value)).prefetch_related(
-                "ball", "player"
-            )
-            self.balls_selected.add(ball_instance)
+        self.balls_selected.update(await self.fetch_balls(item.values))
         await interaction.response.defer()
 
     @discord.ui.button(label="Select Page", style=discord.ButtonStyle.secondary)
@@ -483,12 +518,9 @@ class CountryballsSelector(Pages):
         self, interaction: discord.Interaction["BallsDexBot"], button: Button
     ):
         await interaction.response.defer(thinking=True, ephemeral=True)
-        for ball in self.select_ball_menu.options:
-            ball_instance = await BallInstance.get(id=int(ball.value)).prefetch_related(
-                "ball", "player"
-            )
-            if ball_instance not in self.balls_selected:
-                self.balls_selected.add(ball_instance)
+        self.balls_selected.update(
+            await self.fetch_balls(x.value for x in self.select_ball_menu.options)
+        )
         await interaction.followup.send(
             (
                 f"All {settings.plural_collectible_name} on this page have been selected.\n"
@@ -533,25 +565,28 @@ class CountryballsSelector(Pages):
                     f"{settings.collectible_name.title()} #{ball.pk:0X} is not tradeable.",
                     ephemeral=True,
                 )
-            if await ball.is_locked():
-                return await interaction.followup.send(
-                    f"{settings.collectible_name.title()} #{ball.pk:0X} is locked "
-                    "for trade and won't be added to the proposal.",
-                    ephemeral=True,
-                )
+        if any(ball.favorite for ball in self.balls_selected):
             view = ConfirmChoiceView(interaction)
-            if ball.favorite:
-                await interaction.followup.send(
-                    f"One or more of the {settings.plural_collectible_name} is favorited, "
-                    "are you sure you want to add it to the trade?",
-                    view=view,
-                    ephemeral=True,
-                )
-                await view.wait()
-                if not view.value:
-                    return
-            trader.proposal.append(ball)
-            await ball.lock_for_trade()
+            await interaction.followup.send(
+                f"One or more of the {settings.plural_collectible_name} is favorited, "
+                "are you sure you want to add it to the trade?",
+                view=view,
+                ephemeral=True,
+            )
+            await view.wait()
+            if not view.value:
+                return
+
+        locked = await BallInstance.lock_many_for_trade(self.balls_selected)
+        if len(locked) != len(self.balls_selected):
+            await BallInstance.unlock_many(locked)
+            ball = min(self.balls_selected - set(locked), key=lambda x: x.pk)
+            return await interaction.followup.send(
+                f"{settings.collectible_name.title()} #{ball.pk:0X} is locked "
+                "for trade and won't be added to the proposal.",
+                ephemeral=True,
+            )
+        trader.proposal.extend(locked)
         grammar = (
             f"{settings.collectible_name}"
             if len(self.balls_selected) == 1
@@ -25,7 +25,9 @@ class TradingUser:
         cls, trade: "Trade", player: "Player", bot: "BallsDexBot", is_admin: bool = False
     ):
         proposal = await trade.tradeobjects.filter(player=player).prefetch_related("ballinstance")
-        user = await bot.fetch_user(player.discord_id)
+        user = await bot.user_resolver.resolve(player.discord_id)
+        if user is None:
+            user = bot.user_resolver.placeholder(player.discord_id)
         blacklisted = (
             await BlacklistedID.exists(discord_id=player.discord_id) if is_admin else None
         )
@@ -65,12 +65,28 @@ class Settings:
         default spawn range
     spawn_manager: str
         Python path to a class implementing `BaseSpawnManager`, handling cooldowns and anti-cheat
+    spawn_fast_path: bool
+        Read spawn activity from the raw gateway payloads, without building message objects
     webhook_url: str | None
         URL of a Discord webhook for admin notifications
     client_id: str
         ID of the Discord application
     client_secret: str
         Secret key of the Discord application (not the bot token)
+    card_cache_memory_size: int
+        Maximum size of the in-memory rendered card cache, in megabytes. 0 disables it.
+    card_cache_disk_path: str | None
+        Directory where rendered cards are persisted between restarts, disabled if `None`
+    card_renderer_workers: int
+        Number of processes drawing cards. 0 draws them in a thread of the bot process.
+    card_renderer_queue_size: int
+        Maximum number of cards waiting to be drawn before new renders are rejected.
+    card_renderer_asset_memory: int
+        Memory used by each rendering process to keep decoded images, in megabytes.
+    loop_monitor_interval: float
+        Seconds between two measures of the event loop delay, 0 disables the monitor.
+    loop_monitor_threshold: float
+        Delay in seconds above which the code blocking the event loop is sampled and logged.
     """
 
     bot_token: str = ""
@@ -118,6 +134,18 @@ class Settings:
 
     spawn_chance_range: tuple[int, int] = (40, 55)
     spawn_manager: str = "ballsdex.packages.countryballs.spawn.SpawnManager"
+    spawn_fast_path: bool = False
+
+    # rendered card cache
+    card_cache_memory_size: int = 128
+    card_cache_disk_path: str | None = None
+    card_renderer_workers: int = 2
+    card_renderer_queue_size: int = 32
+    card_renderer_asset_memory: int = 256
+
+    # event loop delay and blocking code
+    loop_monitor_interval: float = 0.1
+    loop_monitor_threshold: float = 0.5
 
     # django admin panel
     webhook_url: str | None = None
@@ -197,6 +225,22 @@ def read_settings(path: "Path"):
     settings.spawn_manager = content.get(
         "spawn-manager", "ballsdex.packages.countryballs.spawn.SpawnManager"
     )
+    settings.spawn_fast_path = content.get("spawn-fast-path", False)
+
+    if card_cache := content.get("card-cache"):
+        settings.card_cache_memory_size = card_cache.get("memory-size", 128)
+        if disk_path := card_cache.get("disk-path"):
+            # relative to the config file, the admin panel runs from another directory
+            settings.card_cache_disk_path = str((path.parent / disk_path).resolve())
+
+    if card_renderer := content.get("card-renderer"):
+        settings.card_renderer_workers = card_renderer.get("workers", 2)
+        settings.card_renderer_queue_size = card_renderer.get("queue-size", 32)
+        settings.card_renderer_asset_memory = card_renderer.get("asset-memory", 256)
+
+    if loop_monitor := content.get("loop-monitor"):
+        settings.loop_monitor_interval = loop_monitor.get("interval", 0.1)
+        settings.loop_monitor_threshold = loop_monitor.get("threshold", 0.5)
 
     if admin := content.get("admin-panel"):
         settings.webhook_url = admin.get("webhook-url")
@@ -360,6 +404,43 @@ spawn-chance-range: [40, 55]
 
 spawn-manager: ballsdex.packages.countryballs.spawn.SpawnManager
 
+# count spawn activity from the raw gateway events, skipping the creation of message objects
+# for the servers without spawns. Messages are then only fully processed when they can be
+# text commands, other packages listening to messages may stop working
+spawn-fast-path: false
+
+# cache of rendered cards, avoids drawing the same card again
+card-cache:
+
+  # maximum memory used by the cache in megabytes, 0 disables it
+  memory-size: 128
+
+  # optional directory where rendered cards are also stored, kept between restarts
+  # relative paths are resolved from the location of this file
+  disk-path:
+
+# processes drawing the cards, keeping the bot responsive under heavy card traffic
+card-renderer:
+
+  # number of rendering processes, 0 draws cards in a thread of the bot process instead
+  workers: 2
+
+  # maximum number of cards waiting to be drawn, further requests are rejected
+  queue-size: 32
+
+  # memory used by each process to keep decoded images, in megabytes
+  asset-memory: 256
+
+# measures how long the bot stays unresponsive, and finds the code responsible
+loop-monitor:
+
+  # seconds between two measures of the event loop delay, 0 disables the monitor
+  interval: 0.1
+
+  # when the bot is unresponsive for longer than this, in seconds, the code running is
+  # sampled and logged. The "blocking" text command lists the worst offenders
+  threshold: 0.5
+
 # sentry details, leave empty if you don't know what this is
 # https://sentry.io/ for error tracking
 sentry:
@@ -414,6 +495,10 @@ def update_settings(path: "Path"):
     add_sentry = "sentry:" not in content
     add_catch_messages = "catch:" not in content
     add_extra_models = "extra-tortoise-models:" not in content
+    add_card_cache = "card-cache:" not in content
+    add_card_renderer = "card-renderer:" not in content
+    add_spawn_fast_path = "spawn-fast-path:" not in content
+    add_loop_monitor = "loop-monitor:" not in content
 
     for line in content.splitlines():
         if line.startswith("owners:"):
@@ -559,6 +644,55 @@ extra-tortoise-models:
 extra-django-apps:
 """
 
+    if add_card_cache:
+        content += """
+# cache of rendered cards, avoids drawing the same card again
+card-cache:
+
+  # maximum memory used by the cache in megabytes, 0 disables it
+  memory-size: 128
+
+  # optional directory where rendered cards are also stored, kept between restarts
+  # relative paths are resolved from the location of this file
+  disk-path:
+"""
+
+    if add_card_renderer:
+        content += """
+# processes drawing the cards, keeping the bot responsive under heavy card traffic
+card-renderer:
+
+  # number of rendering processes, 0 draws cards in a thread of the bot process instead
+  workers: 2
+
+  # maximum number of cards waiting to be drawn, further requests are rejected
+  queue-size: 32
+
+  # memory used by each process to keep decoded images, in megabytes
+  asset-memory: 256
+"""
+
+    if add_spawn_fast_path:
+        content += """
+# count spawn activity from the raw gateway events, skipping the creation of message objects
+# for the servers without spawns. Messages are then only fully processed when they can be
+# text commands, other packages listening to messages may stop working
+spawn-fast-path: false
+"""
+
+    if add_loop_monitor:
+        content += """
+# measures how long the bot stays unresponsive, and finds the code responsible
+loop-monitor:
+
+  # seconds between two measures of the event loop delay, 0 disables the monitor
+  interval: 0.1
+
+  # when the bot is unresponsive for longer than this, in seconds, the code running is
+  # sampled and logged. The "blocking" text command lists the worst offenders
+  threshold: 0.5
+"""
+
     if any(
         (
             add_owners,
@@ -574,6 +708,10 @@ extra-django-apps:
             add_sentry,
             add_catch_messages,
             add_extra_models,
+            add_card_cache,
+            add_card_renderer,
+            add_spawn_fast_path,
+            add_loop_monitor,
         )
     ):
         path.write_text(content)